@@ -524,6 +524,7 @@ MIDDLEWARE_CLASSES = [
     'django.middleware.locale.LocaleMiddleware',
 
     'codejail.django_integration.ConfigureCodeJailMiddleware',
+    'capa.safe_exec.django_integration.ConfigureWorkerPoolMiddleware',
 
     # catches any uncaught RateLimitExceptions and returns a 403 instead of a 500
     'ratelimitbackend.middleware.RateLimitMiddleware',
@@ -617,6 +618,23 @@ MODULESTORE = {
 # require student context.
 MODULESTORE_FIELD_OVERRIDE_PROVIDERS = ()
 
+# Local disk cache for course assets served by the contentserver middleware,
+# disabled unless ROOT is set.  Assets of at least MIN_SIZE bytes are kept out
+# of memcached, and are written to ROOT (up to MAX_SIZE bytes in total) the
+# first time they are served in full.  Each process checks the total size at most
+# once every EVICTION_INTERVAL seconds.  If X_ACCEL_REDIRECT_PREFIX is set, cached
+# assets are sent by nginx from an internal location which aliases ROOT; entries
+# are created with FILE_MODE so that nginx can read them, and ROOT and its
+# subdirectories must be traversable by the nginx user.
+CONTENTSERVER_DISK_CACHE = {
+    'ROOT': None,
+    'MIN_SIZE': 1024 * 1024,
+    'MAX_SIZE': 10 * 1024 * 1024 * 1024,
+    'EVICTION_INTERVAL': 5 * 60,
+    'FILE_MODE': 0o644,
+    'X_ACCEL_REDIRECT_PREFIX': None,
+}
+
 #################### Python sandbox ############################################
 
 CODE_JAIL = {
@@ -630,6 +648,15 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # Pre-started sandbox workers, see capa/safe_exec/worker_pool.py.
+    'worker_pool': {
+        # How many workers each process keeps.  0 starts a new sandboxed
+        # Python for every execution instead.
+        'size': 0,
+        # How many executions a worker runs before it is replaced.
+        'max_runs': 100,
+    },
 }
 
 ############################ DJANGO_BUILTINS ################################
@@ -1268,6 +1295,12 @@ EVENT_TRACKING_BACKENDS = {
 }
 EVENT_TRACKING_PROCESSORS = []
 
+# Record the time spent in each stage of the event tracking pipeline as custom
+# metrics named track.<stage>.<name>.time_ms.  The processors and backends of
+# event-tracking are only timed by 'track.instrumentation.InstrumentedRoutingBackend',
+# which aws.py uses in place of RoutingBackend when this is enabled.
+TRACKING_INSTRUMENTATION_ENABLED = False
+
 #### PASSWORD POLICY SETTINGS #####
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from models import DiscussionCommunity
+from models import DiscussionCommunity, NodeBBProfileUpdate
 
 
 class DiscussionCommunityAdmin(admin.ModelAdmin):
@@ -9,3 +9,11 @@ class DiscussionCommunityAdmin(admin.ModelAdmin):
 
 admin.site.register(DiscussionCommunity, DiscussionCommunityAdmin)
 
+
+class NodeBBProfileUpdateAdmin(admin.ModelAdmin):
+    list_display = ('user', 'attempts', 'next_attempt_at', 'created', 'modified', )
+    raw_id_fields = ('user', )
+
+
+admin.site.register(NodeBBProfileUpdate, NodeBBProfileUpdateAdmin)
+
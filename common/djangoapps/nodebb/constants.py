@@ -2,3 +2,11 @@ COMMUNITY_ID_SPLIT_INDEX = 0
 COMMUNITY_URL_SPLIT_CHAR = '/'
 CONVERSATIONALIST_ENTRY_INDEX = 0
 TEAM_PLAYER_ENTRY_INDEX = 0
+
+# Outbox of the profile updates of users
+PROFILE_UPDATES_BATCH_SIZE = 100
+PROFILE_UPDATES_MAX_ATTEMPTS = 10
+PROFILE_UPDATES_MAX_RETRY_DELAY = 60 * 60  # seconds
+PROFILE_UPDATES_DRAIN_LOCK_KEY = 'nodebb.profile_updates.drain_lock'
+PROFILE_UPDATES_DRAIN_LOCK_TIMEOUT = 10 * 60  # seconds
+PROFILE_UPDATES_DRAIN_TIME_BUDGET = 5 * 60  # seconds, below the drain lock timeout
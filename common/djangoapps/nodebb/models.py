@@ -1,7 +1,10 @@
 """
     Models related to nodeBB integrations
 """
-from django.db import models
+from django.contrib.auth.models import User
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from jsonfield.fields import JSONField
 from model_utils.models import TimeStampedModel
 from django.conf import settings
 
@@ -32,3 +35,49 @@ class TeamGroupChat(TimeStampedModel):
 
     def __str__(self):
         return "%s" % self.room_id
+
+
+class NodeBBProfileUpdate(TimeStampedModel):
+    """
+        Model to store the profile data of a user waiting to be sent to NodeBB
+
+        Updates of the same user are merged in a single row, later values overwriting earlier ones,
+        and the row is deleted by the drainer once its latest data has been sent.
+    """
+
+    user = models.OneToOneField(User, related_name='nodebb_profile_update')
+    profile_data = JSONField(default=dict)
+    version = models.PositiveIntegerField(default=1)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    def __str__(self):
+        return "%s" % self.user
+
+    @classmethod
+    def enqueue(cls, user, profile_data):
+        """
+        Merge the given profile data into the pending update of the user
+        """
+        with transaction.atomic():
+            try:
+                # savepoint, so that the user's existing update doesn't abort the transaction. The update is
+                # created first since locking a missing row would take a gap lock on the user index.
+                with transaction.atomic():
+                    cls.objects.create(user=user, profile_data=profile_data)
+                return
+            except IntegrityError:
+                update = cls.objects.select_for_update().get(user=user)
+
+            update.profile_data.update(profile_data)
+            update.version = F('version') + 1
+            update.save()
+
+    @classmethod
+    def queue_stats(cls, now):
+        """
+        Return the number of pending updates, and the seconds since the oldest of them was queued
+        """
+        stats = cls.objects.aggregate(depth=models.Count('id'), oldest=models.Min('created'))
+        lag = (now - stats['oldest']).total_seconds() if stats['oldest'] else 0
+        return stats['depth'], lag
@@ -16,14 +16,13 @@ from mailchimp_pipeline.signals.handlers import (
     send_user_info_to_mailchimp
 )
 from nodebb.helpers import get_community_id
-from nodebb.models import DiscussionCommunity, TeamGroupChat
+from nodebb.models import DiscussionCommunity, NodeBBProfileUpdate, TeamGroupChat
 from nodebb.tasks import (
     task_activate_user_on_nodebb,
     task_create_user_on_nodebb,
     task_delete_user_on_nodebb,
     task_join_group_on_nodebb,
-    task_un_join_group_on_nodebb,
-    task_update_user_profile_on_nodebb
+    task_un_join_group_on_nodebb
 )
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from openedx.core.djangoapps.signals.signals import COURSE_CERT_AWARDED
@@ -76,8 +75,7 @@ def sync_user_profile_info_with_nodebb(sender, instance, **kwargs):
         "birthday": "01/01/%s" % instance.year_of_birth,
         "language": instance.language,
     }
-    task_update_user_profile_on_nodebb.delay(
-        username=user.username, profile_data=data_to_sync)
+    NodeBBProfileUpdate.enqueue(user, data_to_sync)
 
 
 @receiver(post_save, sender=UserExtendedProfile)
@@ -106,8 +104,7 @@ def sync_extended_profile_info_with_nodebb(sender, instance, **kwargs):
 
     # sanity to confirm that some data actually exists to sync, during registration
     if 'registration' not in request.path or any(data_to_sync.values()):
-        task_update_user_profile_on_nodebb.delay(
-            username=user.username, profile_data=data_to_sync)
+        NodeBBProfileUpdate.enqueue(user, data_to_sync)
 
 
 @receiver(post_save, sender=Organization)
@@ -131,8 +128,7 @@ def sync_organization_info_with_nodebb(sender, instance, created, **kwargs):  #
 
     user = request.user
 
-    task_update_user_profile_on_nodebb.delay(
-        username=user.username, profile_data=data_to_sync)
+    NodeBBProfileUpdate.enqueue(user, data_to_sync)
 
 
 @receiver(post_save, sender=User, dispatch_uid='update_user_profile_on_nodebb')
@@ -171,8 +167,7 @@ def update_user_profile_on_nodebb(sender, instance, created, **kwargs):
             'last_name': instance.last_name
         }
 
-        task_update_user_profile_on_nodebb.delay(
-            username=instance.username, profile_data=data_to_sync)
+        NodeBBProfileUpdate.enqueue(instance, data_to_sync)
 
 
 @receiver(post_delete, sender=User)
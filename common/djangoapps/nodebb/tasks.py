@@ -1,13 +1,29 @@
 """
 Tasks to synchronize users with NodeBB
 """
+from datetime import timedelta
+
 from celery.utils.log import get_task_logger
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
 from celery.task import task
+from edx_django_utils.monitoring import set_custom_metric
+from requests.exceptions import ConnectionError
 
 from common.lib.nodebb_client.client import NodeBBClient
+from nodebb.constants import (
+    PROFILE_UPDATES_BATCH_SIZE,
+    PROFILE_UPDATES_DRAIN_LOCK_KEY,
+    PROFILE_UPDATES_DRAIN_LOCK_TIMEOUT,
+    PROFILE_UPDATES_DRAIN_TIME_BUDGET,
+    PROFILE_UPDATES_MAX_ATTEMPTS,
+    PROFILE_UPDATES_MAX_RETRY_DELAY
+)
+from nodebb.models import NodeBBProfileUpdate
 
 LOGGER = get_task_logger(__name__)
 
@@ -136,3 +152,106 @@ def task_archive_community_on_nodebb(category_id):
     status_code, response = NodeBBClient().categories.archive(category_id=category_id)
     handle_response(task_archive_community_on_nodebb, 'Archive category with id {}'.format(category_id),
                     status_code, response)
+
+
+@task(routing_key=settings.HIGH_PRIORITY_QUEUE)
+def task_drain_nodebb_profile_updates():
+    """
+    Celery task to send the pending profile updates of users to NodeBB, scheduled periodically
+    """
+    # a drain still running from the previous schedule would send the same updates again
+    if not cache.add(PROFILE_UPDATES_DRAIN_LOCK_KEY, 'true', PROFILE_UPDATES_DRAIN_LOCK_TIMEOUT):
+        LOGGER.info('Skipping: drain of profile updates, another one is running')
+        return
+
+    try:
+        sent_count, failed_count = drain_profile_updates()
+    finally:
+        cache.delete(PROFILE_UPDATES_DRAIN_LOCK_KEY)
+
+    depth, lag = NodeBBProfileUpdate.queue_stats(timezone.now())
+    set_custom_metric('nodebb_profile_updates_sent', sent_count)
+    set_custom_metric('nodebb_profile_updates_failed', failed_count)
+    set_custom_metric('nodebb_profile_updates_queue_depth', depth)
+    set_custom_metric('nodebb_profile_updates_queue_lag', lag)
+    LOGGER.info('Drained profile updates: {} sent, {} failed, {} pending, oldest queued {:.0f}s ago'.format(
+        sent_count, failed_count, depth, lag
+    ))
+
+
+def drain_profile_updates():
+    """
+    Send the due profile updates to NodeBB in batches, oldest first, until none is left, NodeBB fails or the
+    time budget of the drain is spent. Only the updates queued before the drain started are sent, those queued
+    meanwhile wait for the next drain. Return the number of updates sent and failed.
+    """
+    nodebb_client = NodeBBClient()
+    sent_count = failed_count = 0
+    started_at = timezone.now()
+    deadline = started_at + timedelta(seconds=PROFILE_UPDATES_DRAIN_TIME_BUDGET)
+
+    while True:
+        now = timezone.now()
+        updates = list(
+            NodeBBProfileUpdate.objects.filter(
+                Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now),
+                modified__lte=started_at
+            ).select_related('user').order_by('created')[:PROFILE_UPDATES_BATCH_SIZE]
+        )
+        if not updates:
+            return sent_count, failed_count
+
+        for update in updates:
+            if timezone.now() >= deadline:
+                LOGGER.info('Stopping: drain of profile updates, its time budget is spent')
+                return sent_count, failed_count
+
+            username = update.user.username
+            try:
+                status_code, response = nodebb_client.users.update_profile(
+                    username=username, profile_data=update.profile_data
+                )
+            except ConnectionError as error:
+                status_code, response = 503, error
+
+            if status_code >= 500:
+                # NodeBB is unavailable, the other updates wait for the next drain
+                failed_count += 1
+                _retry_profile_update_later(update, now, status_code, response)
+                return sent_count, failed_count
+
+            if status_code >= 400:
+                failed_count += 1
+                LOGGER.error('Failure: Update user profile task for user: {}, status_code: {}, response: {}'.format(
+                    username, status_code, response
+                ))
+            else:
+                sent_count += 1
+            _remove_profile_update(update)
+
+
+def _retry_profile_update_later(update, now, status_code, response):
+    """
+    Delay the next attempt of the update exponentially, or drop it after too many attempts
+    """
+    attempts = update.attempts + 1
+    if attempts >= PROFILE_UPDATES_MAX_ATTEMPTS:
+        LOGGER.error('Failure: Update user profile task for user: {}, giving up after {} attempts, '
+                     'status_code: {}, response: {}'.format(update.user.username, attempts, status_code, response))
+        _remove_profile_update(update)
+        return
+
+    retry_delay = min(RETRY_DELAY * 2 ** (attempts - 1), PROFILE_UPDATES_MAX_RETRY_DELAY)
+    NodeBBProfileUpdate.objects.filter(pk=update.pk).update(
+        attempts=attempts, next_attempt_at=now + timedelta(seconds=retry_delay)
+    )
+    LOGGER.info('Retrying: Update user profile task for user: {} in {}s'.format(update.user.username, retry_delay))
+
+
+def _remove_profile_update(update):
+    """
+    Remove the update unless newer profile data was queued for the user meanwhile, which is then due on the next drain
+    """
+    removed_count, __ = NodeBBProfileUpdate.objects.filter(pk=update.pk, version=update.version).delete()
+    if not removed_count:
+        NodeBBProfileUpdate.objects.filter(pk=update.pk).update(attempts=0, next_attempt_at=None)
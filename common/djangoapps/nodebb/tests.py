@@ -1,9 +1,17 @@
 import mock
 
+from django.db.models.query import QuerySet
+from django.db.models.signals import post_save, pre_save
 from django.test import TestCase
+from django.utils import timezone
+from factory.django import mute_signals
 from requests.exceptions import ConnectionError
 
 from common.lib.nodebb_client.client import NodeBBClient
+from nodebb.constants import PROFILE_UPDATES_MAX_ATTEMPTS
+from nodebb.models import NodeBBProfileUpdate
+from nodebb.tasks import task_drain_nodebb_profile_updates
+from student.tests.factories import UserFactory
 from tasks import (task_create_user_on_nodebb, task_update_user_profile_on_nodebb, task_delete_user_on_nodebb,
                    task_activate_user_on_nodebb, task_join_group_on_nodebb, task_update_onboarding_surveys_status)
 
@@ -103,3 +111,119 @@ class NodeBBUserCreationTestCase(TestCase):
                 task_update_onboarding_surveys_status.delay(username=username)
 
                 method.assert_called_with(username=username)
+
+
+class NodeBBProfileUpdateTestCase(TestCase):
+    """
+    Tests for the outbox of the profile updates of users and its drain
+    """
+    @mute_signals(pre_save, post_save)
+    def setUp(self):
+        super(NodeBBProfileUpdateTestCase, self).setUp()
+        self.user = UserFactory(username='testuser')
+        self.other_user = UserFactory(username='otheruser')
+        patcher = mock.patch('common.lib.nodebb_client.users.ForumUser.update_profile', return_value=(200, {}))
+        self.mocked_update_profile = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_enqueue_merges_updates_of_a_user(self):
+        NodeBBProfileUpdate.enqueue(self.user, {'first_name': 'test', 'email': 'testuser@test.com'})
+        NodeBBProfileUpdate.enqueue(self.user, {'first_name': 'changed'})
+
+        update = NodeBBProfileUpdate.objects.get(user=self.user)
+        self.assertEqual(update.profile_data, {'first_name': 'changed', 'email': 'testuser@test.com'})
+        self.assertEqual(update.version, 2)
+
+    @mock.patch('nodebb.tasks.set_custom_metric')
+    def test_drain_sends_latest_data(self, mocked_set_custom_metric):
+        NodeBBProfileUpdate.enqueue(self.user, {'first_name': 'test'})
+        NodeBBProfileUpdate.enqueue(self.user, {'first_name': 'changed'})
+        NodeBBProfileUpdate.enqueue(self.other_user, {'last_name': 'user'})
+
+        task_drain_nodebb_profile_updates()
+
+        self.mocked_update_profile.assert_has_calls([
+            mock.call(username='testuser', profile_data={'first_name': 'changed'}),
+            mock.call(username='otheruser', profile_data={'last_name': 'user'}),
+        ], any_order=True)
+        self.assertEqual(self.mocked_update_profile.call_count, 2)
+        self.assertFalse(NodeBBProfileUpdate.objects.exists())
+        mocked_set_custom_metric.assert_any_call('nodebb_profile_updates_sent', 2)
+        mocked_set_custom_metric.assert_any_call('nodebb_profile_updates_queue_depth', 0)
+
+    def test_drain_backs_off_while_nodebb_is_unavailable(self):
+        self.mocked_update_profile.return_value = (500, {})
+        NodeBBProfileUpdate.enqueue(self.user, {'first_name': 'test'})
+        NodeBBProfileUpdate.enqueue(self.other_user, {'last_name': 'user'})
+
+        task_drain_nodebb_profile_updates()
+        task_drain_nodebb_profile_updates()
+
+        self.assertEqual(self.mocked_update_profile.call_count, 1)
+        failed_update = NodeBBProfileUpdate.objects.get(attempts=1)
+        self.assertGreater(failed_update.next_attempt_at, timezone.now())
+        self.assertTrue(NodeBBProfileUpdate.objects.filter(attempts=0, next_attempt_at__isnull=True).exists())
+
+    def test_drain_gives_up_after_max_attempts(self):
+        self.mocked_update_profile.side_effect = ConnectionError
+        NodeBBProfileUpdate.enqueue(self.user, {'first_name': 'test'})
+        NodeBBProfileUpdate.objects.filter(user=self.user).update(attempts=PROFILE_UPDATES_MAX_ATTEMPTS - 1)
+
+        task_drain_nodebb_profile_updates()
+
+        self.assertFalse(NodeBBProfileUpdate.objects.exists())
+
+    def test_drain_drops_rejected_updates(self):
+        self.mocked_update_profile.return_value = (404, {})
+        NodeBBProfileUpdate.enqueue(self.user, {'first_name': 'test'})
+
+        task_drain_nodebb_profile_updates()
+
+        self.assertFalse(NodeBBProfileUpdate.objects.exists())
+
+    def test_enqueue_locks_only_existing_updates(self):
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True,
+                               side_effect=QuerySet.select_for_update) as mocked_select_for_update:
+            NodeBBProfileUpdate.enqueue(self.user, {'first_name': 'test'})
+            self.assertFalse(mocked_select_for_update.called)
+
+            NodeBBProfileUpdate.enqueue(self.user, {'last_name': 'user'})
+            self.assertEqual(mocked_select_for_update.call_count, 1)
+
+        update = NodeBBProfileUpdate.objects.get(user=self.user)
+        self.assertEqual(update.profile_data, {'first_name': 'test', 'last_name': 'user'})
+        self.assertEqual(update.version, 2)
+
+    def test_drain_keeps_data_queued_while_sending(self):
+        def update_profile(username, profile_data):
+            if self.mocked_update_profile.call_count == 1:
+                NodeBBProfileUpdate.enqueue(self.user, {'first_name': 'changed'})
+                NodeBBProfileUpdate.enqueue(self.other_user, {'last_name': 'user'})
+            return 200, {}
+
+        self.mocked_update_profile.side_effect = update_profile
+        NodeBBProfileUpdate.enqueue(self.user, {'first_name': 'test'})
+
+        task_drain_nodebb_profile_updates()
+
+        # the updates queued during the drain wait for the next one
+        self.mocked_update_profile.assert_called_once_with(username='testuser', profile_data={'first_name': 'test'})
+        self.assertEqual(NodeBBProfileUpdate.objects.count(), 2)
+
+        task_drain_nodebb_profile_updates()
+
+        self.mocked_update_profile.assert_has_calls([
+            mock.call(username='testuser', profile_data={'first_name': 'changed'}),
+            mock.call(username='otheruser', profile_data={'last_name': 'user'}),
+        ], any_order=True)
+        self.assertEqual(self.mocked_update_profile.call_count, 3)
+        self.assertFalse(NodeBBProfileUpdate.objects.exists())
+
+    @mock.patch('nodebb.tasks.PROFILE_UPDATES_DRAIN_TIME_BUDGET', 0)
+    def test_drain_stops_once_time_budget_is_spent(self):
+        NodeBBProfileUpdate.enqueue(self.user, {'first_name': 'test'})
+
+        task_drain_nodebb_profile_updates()
+
+        self.assertFalse(self.mocked_update_profile.called)
+        self.assertTrue(NodeBBProfileUpdate.objects.filter(user=self.user).exists())
@@ -1,79 +1,246 @@
 """
 Django management command to create users at nodeBB corresponding to edx-platform users.
 """
+import hashlib
+import json
 import time
 from logging import getLogger
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from requests.exceptions import ConnectionError
 
-from nodebb.tasks import (task_create_user_on_nodebb, task_activate_user_on_nodebb,
-                                            task_update_user_profile_on_nodebb, task_update_onboarding_surveys_status)
 from common.lib.nodebb_client.client import NodeBBClient
 from lms.djangoapps.onboarding.helpers import COUNTRIES
 from lms.djangoapps.onboarding.models import UserExtendedProfile
-from philu_commands.models import CreationFailedUsers
+from philu_commands.models import CommandCheckpoint, CreationFailedUsers, NodeBBUserSnapshot
 
 log = getLogger(__name__)
 
+CHECKPOINT_NAME = 'sync_users_with_nodebb'
+MAX_REQUEST_ATTEMPTS = 3
+REQUEST_RETRY_DELAY = 2  # seconds, doubled after every failed attempt
+
+
+def get_user_data(extended_profile):
+    """
+    Return the profile data of the user we keep in sync on NodeBB.
+    """
+    user = extended_profile.user
+    profile = user.profile
+
+    return {
+        'edx_user_id': unicode(user.id),
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'country_of_employment': extended_profile.country_of_employment,
+        'city_of_employment': extended_profile.city_of_employment,
+        'country_of_residence': COUNTRIES.get(profile.country.code),
+        'city_of_residence': profile.city,
+        'birthday': profile.year_of_birth,
+        'language': profile.language,
+        'interests': extended_profile.get_user_selected_interests(),
+        'self_prioritize_areas': extended_profile.get_user_selected_functions()
+    }
+
+
+def get_data_hash(edx_data):
+    """
+    Return the hash of the profile data stored in the snapshot of the user.
+    """
+    return hashlib.md5(json.dumps(edx_data, sort_keys=True)).hexdigest()
+
+
+def request_with_retries(request, **kwargs):
+    """
+    Send a request to nodeBB, retrying it with a backoff while it fails with a server or connection error.
+    Return the tuple of (status_code, response_body) of the last attempt.
+    """
+    for attempt in range(MAX_REQUEST_ATTEMPTS):
+        if attempt:
+            time.sleep(REQUEST_RETRY_DELAY * 2 ** (attempt - 1))
+
+        try:
+            status_code, response = request(**kwargs)
+        except ConnectionError as error:
+            status_code, response = None, error
+            continue
+
+        if status_code < 500:
+            break
+
+    return status_code, response
+
+
+def record_failed_user(user, is_created=False, is_activated=False):
+    """
+    Record the user whose creation on nodeBB didn't complete. Rows already recorded for the email, of which
+    earlier commands left duplicates, are updated rather than adding another one.
+    """
+    updated_count = CreationFailedUsers.objects.filter(email=user.email).update(
+        is_created=is_created, is_activated=is_activated
+    )
+    if not updated_count:
+        CreationFailedUsers.objects.create(email=user.email, is_created=is_created, is_activated=is_activated)
+
+
+def is_synced(edx_data, nodebb_data):
+    """
+    Return whether NodeBB already has the profile data of the user.
+    """
+    # filter nodebb_data to ensure compatibility with edx_data
+    nodebb_data = {key: None if unicode(value) == u'None' else value for key, value in nodebb_data.items()}
+    if not nodebb_data.get('self_prioritize_areas'):
+        nodebb_data['self_prioritize_areas'] = []
+
+    return edx_data.viewitems() <= nodebb_data.viewitems()
+
 
 class Command(BaseCommand):
     help = """
-    This command creates users in nodeBB according to all UserExtendedProfile instances in edx-platform.
+    This command syncs the users of edx-platform with nodeBB, creating those missing in nodeBB and updating
+    those whose profile has changed since it was last synced.
 
-    After creating the users, it also activates them if they are active in edx-platform.
+    Profiles are synced in chunks ordered by user id, and the last user id of each chunk is saved so that
+    an interrupted run resumes after it. Users whose profile hash matches the snapshot of the last synced
+    profile are skipped.
     example:
-        manage.py ... create_nodebb_users
+        manage.py ... sync_users_with_nodebb --chunk-size 500
     """
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of profiles loaded and synced at once.',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            default=False,
+            help='Start from the first user instead of resuming the last interrupted run.',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            default=False,
+            help='Compare every user with nodeBB, even those whose profile matches their snapshot.',
+        )
+
     def handle(self, *args, **options):
-        user_extended_profiles = UserExtendedProfile.objects.all()
         nodebb_client = NodeBBClient()
 
-        status_code, nodebb_users = nodebb_client.users.all()  # returns tuple of (status_code, response_body)
+        # returns tuple of (status_code, response_body)
+        status_code, nodebb_users = request_with_retries(nodebb_client.users.all)
         if status_code != 200:
             log.error('Error: failed to connect to NodeBB. aborting command "{}"'.format('sync_users_with_nodebb'))
             return
 
         nodebb_users = {user['username']: user for user in nodebb_users}
 
-        for extended_profile in user_extended_profiles:
-            user = extended_profile.user
-            profile = user.profile
-
-            edx_data = {
-                'edx_user_id': unicode(user.id),
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'country_of_employment': extended_profile.country_of_employment,
-                'city_of_employment': extended_profile.city_of_employment,
-                'country_of_residence': COUNTRIES.get(profile.country.code),
-                'city_of_residence': profile.city,
-                'birthday': profile.year_of_birth,
-                'language': profile.language,
-                'interests': extended_profile.get_user_selected_interests(),
-                'self_prioritize_areas': extended_profile.get_user_selected_functions()
-            }
+        checkpoint, __ = CommandCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+        if options['restart']:
+            checkpoint.last_id = 0
+        elif checkpoint.last_id:
+            log.info('Resuming "{}" after user {}'.format(CHECKPOINT_NAME, checkpoint.last_id))
+
+        while True:
+            extended_profiles = list(
+                UserExtendedProfile.objects.filter(
+                    user_id__gt=checkpoint.last_id
+                ).select_related(
+                    'user', 'user__profile', 'organization'
+                ).order_by('user_id')[:options['chunk_size']]
+            )
+            if not extended_profiles:
+                break
+
+            self.sync_chunk(nodebb_client, nodebb_users, extended_profiles, options['force'])
+
+            checkpoint.last_id = extended_profiles[-1].user_id
+            checkpoint.save()
+
+        checkpoint.delete()
+
+    def sync_chunk(self, nodebb_client, nodebb_users, extended_profiles, force=False):
+        """
+        Create or update on nodeBB the users of the chunk whose profile has changed, and
+        save the snapshots of those which are now in sync.
+        """
+        snapshots = dict(NodeBBUserSnapshot.objects.filter(
+            user_id__in=[extended_profile.user_id for extended_profile in extended_profiles]
+        ).values_list('user_id', 'data_hash'))
+        synced_hashes = {}
 
+        for extended_profile in extended_profiles:
+            user = extended_profile.user
+            edx_data = get_user_data(extended_profile)
+            data_hash = get_data_hash(edx_data)
             nodebb_data = nodebb_users.get(user.username)
 
             if not nodebb_data:
-                task_create_user_on_nodebb.delay(username=user.username, user_data=edx_data)
-                if user.is_active:
-                    task_activate_user_on_nodebb.delay(username=user.username, active=user.is_active)
-                # if user has submitted all onboarding surveys then update status on NodeBB
-                if not bool(extended_profile.unattended_surveys(_type='list')):
-                    task_update_onboarding_surveys_status.delay(username=user.username)
+                if self.create_user(nodebb_client, extended_profile, edx_data):
+                    synced_hashes[user.id] = data_hash
+                continue
+
+            if not force and snapshots.get(user.id) == data_hash:
                 continue
 
-            # filter nodebb_data to ensure compatibility with edx_data
-            for key in nodebb_data:
-                if unicode(nodebb_data[key]) == u'None':
-                    nodebb_data[key] = None
-            if not nodebb_data.get('self_prioritize_areas'):
-                nodebb_data['self_prioritize_areas'] = []
+            if not is_synced(edx_data, nodebb_data):
+                status_code, response = request_with_retries(
+                    nodebb_client.users.update_profile, username=user.username, profile_data=edx_data
+                )
+                if status_code != 200:
+                    log.error('Error: Can not update user({}) on nodebb due to {}'.format(user.username, response))
+                    continue
+
+            synced_hashes[user.id] = data_hash
+
+        with transaction.atomic():
+            NodeBBUserSnapshot.objects.filter(user_id__in=synced_hashes.keys()).delete()
+            NodeBBUserSnapshot.objects.bulk_create([
+                NodeBBUserSnapshot(user_id=user_id, data_hash=data_hash)
+                for user_id, data_hash in synced_hashes.items()
+            ])
+
+    def create_user(self, nodebb_client, extended_profile, edx_data):
+        """
+        Create the user on nodeBB, activate it if it is active on edx-platform and update its
+        onboarding surveys status if it has submitted all of them. Return whether it was created.
+        """
+        user = extended_profile.user
+
+        status_code, response = request_with_retries(
+            nodebb_client.users.create, username=user.username, user_data=edx_data
+        )
+        if status_code != 200:
+            log.error('Error: Can not create user({}) on nodebb due to {}'.format(user.username, response))
+            record_failed_user(user)
+            return False
+
+        is_activated = False
+        if user.is_active:
+            status_code, response = request_with_retries(
+                nodebb_client.users.activate, username=user.username, active=True
+            )
+            if status_code != 200:
+                log.error('Error: Can not activate user({}) on nodebb due to {}'.format(user.username, response))
+                record_failed_user(user, is_created=True)
+            else:
+                is_activated = True
+
+        # if user has submitted all onboarding surveys then update status on NodeBB
+        if not bool(extended_profile.unattended_surveys(_type='list')):
+            status_code, response = request_with_retries(
+                nodebb_client.users.update_onboarding_surveys_status, username=user.username
+            )
+            if status_code != 200:
+                log.error('Error: Can not update onboarding surveys status of user({}) on nodebb due to {}'.format(
+                    user.username, response
+                ))
+                record_failed_user(user, is_created=True, is_activated=is_activated)
 
-            if not edx_data.viewitems() <= nodebb_data.viewitems():
-                task_update_user_profile_on_nodebb.delay(username=user.username, profile_data=edx_data)
+        return True
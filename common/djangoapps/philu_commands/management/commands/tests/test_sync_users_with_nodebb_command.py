@@ -6,13 +6,17 @@ from django.test import TestCase
 from factory.django import mute_signals
 from mock import call, patch
 from pynodebb.settings import settings as nodebb_settings
+from requests.exceptions import ConnectionError
 
 from lms.djangoapps.onboarding.helpers import COUNTRIES
 from lms.djangoapps.onboarding.models import UserExtendedProfile
 from lms.djangoapps.onboarding.tests.factories import UserFactory
+from philu_commands.management.commands.sync_users_with_nodebb import CHECKPOINT_NAME, MAX_REQUEST_ATTEMPTS
+from philu_commands.models import CommandCheckpoint, CreationFailedUsers, NodeBBUserSnapshot
 
 HTTP_SUCCESS = 200
 HTTP_NOT_FOUND = 404
+HTTP_SERVICE_UNAVAILABLE = 503
 POST_METHOD = 'POST'
 GET_METHOD = 'GET'
 
@@ -54,6 +58,9 @@ class NodeBBSync(TestCase):
         patcher = patch('pynodebb.http_client.HttpClient._request')
         self.mocked_pynodebb_request_func = patcher.start()
         self.addCleanup(patcher.stop)
+        sleep_patcher = patch('philu_commands.management.commands.sync_users_with_nodebb.time.sleep')
+        self.mocked_sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
 
     def test_sync_users_with_nodebb_command_for_user_creation(self):
         """
@@ -64,19 +71,13 @@ class NodeBBSync(TestCase):
         self.mocked_pynodebb_request_func.assert_has_calls([call(POST_METHOD, self.nodebb_api_urls['get_users_data']),
                                                             call(POST_METHOD, self.nodebb_api_urls['user_creation'],
                                                                  **self.user_edx_data),
-                                                            call(POST_METHOD, self.nodebb_api_urls['user_activation'],
-                                                                 username=self.user.username,
-                                                                 active=self.user.is_active,
-                                                                 _uid=nodebb_settings['admin_uid']),
-                                                            call(GET_METHOD,
-                                                                 self.nodebb_api_urls['user_onboarding_status_update'].
-                                                                 format(self.user.username)),
                                                             call(POST_METHOD, self.nodebb_api_urls['user_activation'],
                                                                  username=self.user.username,
                                                                  active=self.user.is_active,
                                                                  _uid=nodebb_settings['admin_uid'])
                                                             ])
-        self.assertEqual(self.mocked_pynodebb_request_func.call_count, 5)
+        self.assertEqual(self.mocked_pynodebb_request_func.call_count, 3)
+        self.assertTrue(NodeBBUserSnapshot.objects.filter(user=self.user).exists())
 
     @patch('lms.djangoapps.onboarding.models.UserExtendedProfile.unattended_surveys', return_value=[])
     def test_sync_users_with_nodebb_command_without_attended_survey(self, mocked_func_of_model):
@@ -97,16 +98,8 @@ class NodeBBSync(TestCase):
                                                                  self.nodebb_api_urls[
                                                                      'user_onboarding_status_update'].format(
                                                                      self.user.username)),
-                                                            call(POST_METHOD, self.nodebb_api_urls['user_activation'],
-                                                                 username=self.user.username,
-                                                                 active=self.user.is_active,
-                                                                 _uid=nodebb_settings['admin_uid']),
-                                                            call(GET_METHOD,
-                                                                 self.nodebb_api_urls[
-                                                                     'user_onboarding_status_update'].format(
-                                                                     self.user.username)),
                                                             ])
-        self.assertEqual(self.mocked_pynodebb_request_func.call_count, 6)
+        self.assertEqual(self.mocked_pynodebb_request_func.call_count, 4)
 
     def test_sync_users_with_nodebb_command_for_bad_request(self):
         """
@@ -131,6 +124,111 @@ class NodeBBSync(TestCase):
                                                             ])
         self.assertEqual(self.mocked_pynodebb_request_func.call_count, 2)
 
+    def test_sync_users_with_nodebb_command_skips_synced_users(self):
+        """
+        This test case is responsible for testing that a user whose profile hasn't changed since it was last synced
+        isn't sent to nodebb again.
+        """
+        self.mocked_pynodebb_request_func.return_value = [HTTP_SUCCESS, [self.nodebb_data]]
+        call_command('sync_users_with_nodebb')
+        call_command('sync_users_with_nodebb')
+        self.assertEqual(self.mocked_pynodebb_request_func.call_count, 3)
+
+        call_command('sync_users_with_nodebb', force=True)
+        self.mocked_pynodebb_request_func.assert_called_with(POST_METHOD, self.nodebb_api_urls['user_update'],
+                                                             **self.user_edx_data)
+        self.assertEqual(self.mocked_pynodebb_request_func.call_count, 5)
+
+    def test_sync_users_with_nodebb_command_for_failed_user_creation(self):
+        """
+        This test case is responsible for testing that a user which fails creation is recorded and synced again
+        on the next run.
+        """
+        self.mocked_pynodebb_request_func.side_effect = [[HTTP_SUCCESS, []], [HTTP_NOT_FOUND, {}]]
+        call_command('sync_users_with_nodebb')
+        self.assertTrue(CreationFailedUsers.objects.filter(email=self.user.email, is_created=False).exists())
+        self.assertFalse(NodeBBUserSnapshot.objects.filter(user=self.user).exists())
+
+    def test_sync_users_with_nodebb_command_records_failed_user_once(self):
+        """
+        This test case is responsible for testing that a user which fails creation on every run is recorded in a
+        single row, holding the status of its last attempt.
+        """
+        self.mocked_pynodebb_request_func.side_effect = [[HTTP_SUCCESS, []], [HTTP_NOT_FOUND, {}]]
+        call_command('sync_users_with_nodebb')
+        self.mocked_pynodebb_request_func.side_effect = [[HTTP_SUCCESS, []], [HTTP_SUCCESS, {}], [HTTP_NOT_FOUND, {}]]
+        call_command('sync_users_with_nodebb')
+
+        failed_users = CreationFailedUsers.objects.filter(email=self.user.email)
+        self.assertEqual(failed_users.count(), 1)
+        self.assertTrue(failed_users[0].is_created)
+        self.assertFalse(failed_users[0].is_activated)
+
+    def test_sync_users_with_nodebb_command_updates_duplicate_failed_users(self):
+        """
+        This test case is responsible for testing that the duplicate rows left for a user by earlier commands are
+        updated rather than failing the sync.
+        """
+        CreationFailedUsers.objects.create(email=self.user.email)
+        CreationFailedUsers.objects.create(email=self.user.email)
+        self.mocked_pynodebb_request_func.side_effect = [[HTTP_SUCCESS, []], [HTTP_SUCCESS, {}], [HTTP_NOT_FOUND, {}]]
+        call_command('sync_users_with_nodebb')
+
+        failed_users = CreationFailedUsers.objects.filter(email=self.user.email)
+        self.assertEqual(failed_users.count(), 2)
+        self.assertTrue(all(failed_user.is_created for failed_user in failed_users))
+
+    def test_sync_users_with_nodebb_command_retries_server_errors(self):
+        """
+        This test case is responsible for testing that requests failing with a server or connection error are retried
+        with a backoff before the user is recorded as failed.
+        """
+        self.mocked_pynodebb_request_func.side_effect = [
+            [HTTP_SUCCESS, []], [HTTP_SERVICE_UNAVAILABLE, {}], ConnectionError(),
+            [HTTP_SUCCESS, {}], [HTTP_SUCCESS, {}]
+        ]
+        call_command('sync_users_with_nodebb')
+        self.assertEqual(self.mocked_pynodebb_request_func.call_count, 5)
+        self.assertEqual(self.mocked_sleep.call_count, 2)
+        self.assertFalse(CreationFailedUsers.objects.filter(email=self.user.email).exists())
+        self.assertTrue(NodeBBUserSnapshot.objects.filter(user=self.user).exists())
+
+        self.mocked_pynodebb_request_func.reset_mock()
+        self.mocked_pynodebb_request_func.side_effect = None
+        self.mocked_pynodebb_request_func.return_value = [HTTP_SERVICE_UNAVAILABLE, {}]
+        NodeBBUserSnapshot.objects.all().delete()
+        call_command('sync_users_with_nodebb')
+        self.assertEqual(self.mocked_pynodebb_request_func.call_count, MAX_REQUEST_ATTEMPTS)
+
+    @patch('lms.djangoapps.onboarding.models.UserExtendedProfile.unattended_surveys', return_value=[])
+    def test_sync_users_with_nodebb_command_for_failed_onboarding_status_update(self, mocked_func_of_model):
+        """
+        This test case is responsible for testing that a created user whose onboarding surveys status fails to update
+        on nodebb is recorded.
+        """
+        self.mocked_pynodebb_request_func.side_effect = [
+            [HTTP_SUCCESS, []], [HTTP_SUCCESS, {}], [HTTP_SUCCESS, {}], [HTTP_NOT_FOUND, {}]
+        ]
+        call_command('sync_users_with_nodebb')
+        self.assertTrue(
+            CreationFailedUsers.objects.filter(email=self.user.email, is_created=True, is_activated=True).exists()
+        )
+
+    def test_sync_users_with_nodebb_command_resumes_from_checkpoint(self):
+        """
+        This test case is responsible for testing that an interrupted run resumes after the last synced user, and
+        that the checkpoint is cleared once the run completes.
+        """
+        self.mocked_pynodebb_request_func.return_value = [HTTP_SUCCESS, [self.nodebb_data]]
+        CommandCheckpoint.objects.create(name=CHECKPOINT_NAME, last_id=self.user.id)
+        call_command('sync_users_with_nodebb')
+        self.assertEqual(self.mocked_pynodebb_request_func.call_count, 1)
+        self.assertFalse(CommandCheckpoint.objects.filter(name=CHECKPOINT_NAME).exists())
+
+        CommandCheckpoint.objects.create(name=CHECKPOINT_NAME, last_id=self.user.id)
+        call_command('sync_users_with_nodebb', restart=True)
+        self.assertEqual(self.mocked_pynodebb_request_func.call_count, 3)
+
     def _generate_edx_user_data(self):
         """
         This function will generate data we send to nodebb for users.
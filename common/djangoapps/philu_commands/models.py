@@ -1,6 +1,7 @@
 """
 Models for philu_commands app
 """
+from django.contrib.auth.models import User
 from django.db import models
 
 
@@ -11,3 +12,21 @@ class CreationFailedUsers(models.Model):
     email = models.EmailField(blank=False)
     is_created = models.BooleanField(default=False)
     is_activated = models.BooleanField(default=False)
+
+
+class NodeBBUserSnapshot(models.Model):
+    """
+    Hash of the profile data last synced to NodeBB for a user by command 'sync_users_with_nodebb'.
+    """
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='nodebb_snapshot')
+    data_hash = models.CharField(max_length=32)
+    modified = models.DateTimeField(auto_now=True)
+
+
+class CommandCheckpoint(models.Model):
+    """
+    Last id processed by a resumable command, so that an interrupted run resumes after it.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    last_id = models.PositiveIntegerField(default=0)
+    modified = models.DateTimeField(auto_now=True)
@@ -4,7 +4,9 @@ import re
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.contrib.staticfiles import finders
 from django.conf import settings
+from django.utils.lru_cache import lru_cache
 
+from openedx.core.djangoapps.contentserver.caching import get_cached_static_urls, set_cached_static_urls
 from xmodule.contentstore.content import StaticContent
 
 from opaque_keys.edx.locator import AssetLocator
@@ -12,6 +14,10 @@ from six import text_type
 
 log = logging.getLogger(__name__)
 XBLOCK_STATIC_RESOURCE_PREFIX = '/static/xblock'
+# The most bytes of urls kept in the rewrite table of a course, so that it stays small enough to cache.
+MAX_STATIC_URL_TABLE_BYTES = 384 * 1024
+# Roughly what pickling adds to the urls of each entry of the table.
+STATIC_URL_TABLE_ENTRY_OVERHEAD = 16
 
 
 def _url_replace_regex(prefix):
@@ -30,6 +36,14 @@ def _url_replace_regex(prefix):
         """.format(prefix=prefix)
 
 
+@lru_cache()
+def _compiled_url_replace_regex(prefix):
+    """
+    Returns _url_replace_regex(prefix), compiled.
+    """
+    return re.compile(_url_replace_regex(prefix))
+
+
 def try_staticfiles_lookup(path):
     """
     Try to lookup a path in staticfiles_storage.  If it fails, return
@@ -121,14 +135,10 @@ def process_static_urls(text, replacement_function, data_dir=None):
 
         return replacement_function(original, prefix, quote, rest)
 
-    return re.sub(
-        _url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
-            static_url=settings.STATIC_URL,
-            data_dir=data_dir
-        )),
-        wrap_part_extraction,
-        text
-    )
+    return _compiled_url_replace_regex(u'(?:{static_url}|/static/)(?!{data_dir})'.format(
+        static_url=settings.STATIC_URL,
+        data_dir=data_dir
+    )).sub(wrap_part_extraction, text)
 
 
 def make_static_urls_absolute(request, html):
@@ -167,6 +177,36 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
     if static_paths_out is None:
         static_paths_out = []
 
+    # Course urls are looked up in a table of the urls already rewritten for the course, which maps each url
+    # to its rewritten url, or to None if it is in the static file pipeline.  Filling it in is what costs: checks
+    # against staticfiles_storage and a contentstore query for each asset.  Most fragments have no static urls,
+    # so the table is only fetched from the cache for the first url to rewrite.
+    url_table_state = {}
+
+    def get_url_table():
+        """
+        Return the table of the course, fetching it from the cache the first time.
+        """
+        if 'table' not in url_table_state:
+            url_table_state['table'] = get_cached_static_urls(course_id) or {}
+            url_table_state['changed'] = False
+        return url_table_state['table']
+
+    def add_to_url_table(url_table, rest, table_url):
+        """
+        Add the rewritten url to the table, unless it would grow past MAX_STATIC_URL_TABLE_BYTES.
+        """
+        if 'bytes' not in url_table_state:
+            url_table_state['bytes'] = sum(
+                len(url) + len(url_table_url or '') + STATIC_URL_TABLE_ENTRY_OVERHEAD
+                for url, url_table_url in url_table.iteritems()
+            )
+        entry_bytes = len(rest) + len(table_url or '') + STATIC_URL_TABLE_ENTRY_OVERHEAD
+        if url_table_state['bytes'] + entry_bytes <= MAX_STATIC_URL_TABLE_BYTES:
+            url_table[rest] = table_url
+            url_table_state['bytes'] += entry_bytes
+            url_table_state['changed'] = True
+
     def replace_static_url(original, prefix, quote, rest):
         """
         Replace a single matched url.
@@ -184,6 +224,15 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
 
         # if we're running with a MongoBacked store course_namespace is not None, then use studio style urls
         elif (not static_asset_path) and course_id:
+            url_table = get_url_table()
+            if rest in url_table:
+                url = url_table[rest]
+                if url is None:
+                    # The url of a static file depends on the theme, so it isn't kept in the table.
+                    url = staticfiles_storage.url(rest)
+                static_paths_out.append((original_uri, url))
+                return "".join([quote, url, quote])
+
             # first look in the static file pipeline and see if we are trying to reference
             # a piece of static content which is in the edx-platform repo (e.g. JS associated with an xmodule)
 
@@ -196,6 +245,7 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
 
             if exists_in_staticfiles_storage:
                 url = staticfiles_storage.url(rest)
+                table_url = None
             else:
                 # if not, then assume it's courseware specific content and then look in the
                 # Mongo-backed database
@@ -207,6 +257,9 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
 
                 if AssetLocator.CANONICAL_NAMESPACE in url:
                     url = url.replace('block@', 'block/', 1)
+                table_url = url
+
+            add_to_url_table(url_table, rest, table_url)
 
         # Otherwise, look the file up in staticfiles_storage, and append the data directory if needed
         else:
@@ -226,4 +279,7 @@ def replace_static_urls(text, data_directory=None, course_id=None, static_asset_
         static_paths_out.append((original_uri, url))
         return "".join([quote, url, quote])
 
-    return process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    text = process_static_urls(text, replace_static_url, data_dir=static_asset_path or data_directory)
+    if url_table_state.get('changed'):
+        set_cached_static_urls(course_id, url_table_state['table'])
+    return text
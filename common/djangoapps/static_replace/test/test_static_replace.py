@@ -8,12 +8,18 @@ from urlparse import parse_qsl, urlparse, urlunparse
 
 import ddt
 import pytest
+from django.core.cache.backends.locmem import LocMemCache
 from django.test import override_settings
 from django.utils.http import urlencode, urlquote
 from mock import Mock, patch
 from opaque_keys.edx.keys import CourseKey
 from PIL import Image
 
+from openedx.core.djangoapps.contentserver.caching import (
+    del_cached_content,
+    get_cached_static_urls,
+    set_cached_static_urls
+)
 from static_replace import (
     _url_replace_regex,
     make_static_urls_absolute,
@@ -132,6 +138,78 @@ def test_mongo_filestore(mock_get_excluded_extensions, mock_get_base_url, mock_m
     mock_static_content.get_canonicalized_asset_path.assert_called_once_with(COURSE_KEY, 'file.png', u'', ['foobar'])
 
 
+@patch('openedx.core.djangoapps.contentserver.caching.CONTENT_CACHE', LocMemCache('static_urls', {}))
+@patch('static_replace.staticfiles_storage', autospec=True)
+@patch('static_replace.StaticContent', autospec=True)
+@patch('static_replace.models.AssetBaseUrlConfig.get_base_url')
+@patch('static_replace.models.AssetExcludedExtensionsConfig.get_excluded_extensions')
+def test_cached_static_urls(mock_get_excluded_extensions, mock_get_base_url, mock_static_content, mock_storage):
+    """
+    Make sure that the rewritten urls of a course are cached, until content of the course changes.
+    """
+    mock_static_content.get_canonicalized_asset_path.return_value = "c4x://mock_url"
+    mock_get_base_url.return_value = u''
+    mock_get_excluded_extensions.return_value = []
+    mock_storage.exists.side_effect = lambda path: path == 'js/file.js'
+    mock_storage.url.return_value = '/static/js/file.abcdef.js'
+
+    source = STATIC_SOURCE + ' "/static/js/file.js" ' + STATIC_SOURCE
+    expected = '"c4x://mock_url" "/static/js/file.abcdef.js" "c4x://mock_url"'
+    assert replace_static_urls(source, DATA_DIRECTORY, course_id=COURSE_KEY) == expected
+    assert mock_storage.exists.call_count == 2
+    assert mock_static_content.get_canonicalized_asset_path.call_count == 1
+
+    assert replace_static_urls(source, DATA_DIRECTORY, course_id=COURSE_KEY) == expected
+    assert mock_storage.exists.call_count == 2
+    assert mock_static_content.get_canonicalized_asset_path.call_count == 1
+
+    del_cached_content(COURSE_KEY.make_asset_key('asset', 'file.png'))
+    assert replace_static_urls(source, DATA_DIRECTORY, course_id=COURSE_KEY) == expected
+    assert mock_storage.exists.call_count == 4
+    assert mock_static_content.get_canonicalized_asset_path.call_count == 2
+
+
+@patch('static_replace.get_cached_static_urls')
+def test_static_urls_fetched_lazily(mock_get_cached_static_urls):
+    """
+    Make sure that the static urls of a course aren't fetched for text without static urls.
+    """
+    assert replace_static_urls('<p>No static urls</p>', DATA_DIRECTORY, course_id=COURSE_KEY) == '<p>No static urls</p>'
+    assert not mock_get_cached_static_urls.called
+
+
+@patch('openedx.core.djangoapps.contentserver.caching.CONTENT_CACHE', LocMemCache('static_urls', {}))
+@patch('static_replace.MAX_STATIC_URL_TABLE_BYTES', 100)
+@patch('static_replace.staticfiles_storage', autospec=True)
+@patch('static_replace.StaticContent', autospec=True)
+@patch('static_replace.models.AssetBaseUrlConfig.get_base_url')
+@patch('static_replace.models.AssetExcludedExtensionsConfig.get_excluded_extensions')
+def test_static_urls_table_size_limit(mock_get_excluded_extensions, mock_get_base_url, mock_static_content,
+                                      mock_storage):
+    """
+    Make sure that the table of static urls of a course stops growing at MAX_STATIC_URL_TABLE_BYTES.
+    """
+    mock_static_content.get_canonicalized_asset_path.side_effect = lambda course_key, path, *args: '/asset/' + path
+    mock_get_base_url.return_value = u''
+    mock_get_excluded_extensions.return_value = []
+    mock_storage.exists.return_value = False
+
+    source = ' '.join('"/static/file{}.png"'.format(index) for index in range(5))
+    replace_static_urls(source, DATA_DIRECTORY, course_id=COURSE_KEY)
+    assert len(get_cached_static_urls(COURSE_KEY)) == 2
+
+
+@patch('openedx.core.djangoapps.contentserver.caching.CONTENT_CACHE', LocMemCache('static_urls', {}))
+@patch('openedx.core.djangoapps.contentserver.caching.STATIC_URLS_MAX_BYTES', 100)
+def test_static_urls_too_large_to_cache():
+    """
+    Make sure that tables of static urls too large for the cache aren't written to it.
+    """
+    set_cached_static_urls(COURSE_KEY, {'file.png': '/asset/file.png'})
+    set_cached_static_urls(COURSE_KEY, {'file{}.png'.format(index): '/asset/file.png' for index in range(10)})
+    assert get_cached_static_urls(COURSE_KEY) == {'file.png': '/asset/file.png'}
+
+
 @patch('static_replace.settings', autospec=True)
 @patch('xmodule.modulestore.django.modulestore', autospec=True)
 @patch('static_replace.staticfiles_storage', autospec=True)
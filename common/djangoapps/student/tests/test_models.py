@@ -16,7 +16,9 @@ from course_modes.models import CourseMode
 from course_modes.tests.factories import CourseModeFactory
 from courseware.models import DynamicUpgradeDeadlineConfiguration
 from opaque_keys.edx.keys import CourseKey
+from opaque_keys.edx.locator import CourseLocator
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from openedx.core.djangoapps.content.course_overviews.tests.factories import CourseOverviewFactory
 from openedx.core.djangoapps.schedules.models import Schedule
 from openedx.core.djangoapps.schedules.tests.factories import ScheduleFactory
 from openedx.core.djangolib.testing.utils import skip_unless_lms
@@ -28,6 +30,7 @@ from student.models import (
     ALLOWEDTOENROLL_TO_ENROLLED,
     PendingNameChange
 )
+from student.roles import CourseStaffRole
 from student.tests.factories import CourseEnrollmentFactory, UserFactory
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory
@@ -126,6 +129,32 @@ class CourseEnrollmentTests(SharedModuleStoreTestCase):
         )
         self.assertListEqual([self.user, self.user_2], all_enrolled_users)
 
+    def test_full_course_ids(self):
+        """CourseEnrollment.full_course_ids should agree with is_course_full for each course."""
+        uncapped_course, full_course, staffed_course = [
+            CourseOverviewFactory.create(
+                id=CourseLocator('edX', 'capped', run), max_student_enrollments_allowed=max_enrollments
+            )
+            for run, max_enrollments in (('uncapped', None), ('full', 1), ('staffed', 2))
+        ]
+        courses = [uncapped_course, full_course, staffed_course]
+        for course in courses:
+            CourseEnrollmentFactory.create(user=self.user, course_id=course.id, is_active=True)
+        # Staff don't count against the capacity, nor do inactive enrollments.
+        CourseEnrollmentFactory.create(user=self.user_2, course_id=staffed_course.id, is_active=True)
+        CourseStaffRole(staffed_course.id).add_users(self.user_2)
+        CourseEnrollmentFactory.create(user=self.user_2, course_id=full_course.id, is_active=False)
+
+        with self.assertNumQueries(3):
+            full_course_ids = CourseEnrollment.objects.full_course_ids(courses)
+
+        self.assertEqual(full_course_ids, {full_course.id})
+        self.assertEqual(
+            full_course_ids,
+            {course.id for course in courses if CourseEnrollment.objects.is_course_full(course)}
+        )
+        self.assertEqual(CourseEnrollment.objects.full_course_ids([uncapped_course]), set())
+
     @skip_unless_lms
     # NOTE: We mute the post_save signal to prevent Schedules from being created for new enrollments
     @factory.django.mute_signals(signals.post_save)
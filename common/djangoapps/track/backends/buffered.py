@@ -0,0 +1,208 @@
+"""
+Event tracker backend which buffers events in memory, and sends them in
+batches to another backend from a background thread, so that storing
+events doesn't add to the time taken by requests.
+
+Example configuration::
+
+  TRACKING_BACKENDS = {
+      'mongo': {
+          'ENGINE': 'track.backends.buffered.BufferedBackend',
+          'OPTIONS': {
+              'backend': {
+                  'ENGINE': 'track.backends.mongodb.MongoBackend',
+                  'OPTIONS': {...},
+              },
+              'max_batch_size': 100,
+              'max_batch_delay': 1.0,
+              'max_queue_size': 10000,
+          }
+      }
+  }
+
+"""
+
+from __future__ import absolute_import
+
+import atexit
+import logging
+import os
+import threading
+import time
+from Queue import Empty, Full, Queue
+
+from django.db import close_old_connections
+
+from track.backends import BaseBackend
+
+log = logging.getLogger(__name__)
+
+# Queued by flush to wake up the background thread.
+_WAKE_UP = object()
+
+
+class BufferedBackend(BaseBackend):
+    """
+    Event tracker backend which queues events, and sends them to another
+    backend in batches of up to `max_batch_size` events, at most
+    `max_batch_delay` seconds after the first event of a batch was queued.
+
+    Events are dropped, and counted in `dropped_events`, when more than
+    `max_queue_size` events are waiting to be sent.  When the process
+    exits, the events still queued are sent, waiting at most
+    `shutdown_timeout` seconds.
+
+    """
+
+    def __init__(self, backend, max_batch_size=100, max_batch_delay=1.0, max_queue_size=10000,
+                 shutdown_timeout=5.0, **kwargs):
+        """
+        :Parameters:
+
+          - `backend`: configuration of the backend to send events to,
+            as a dict with an `ENGINE` and optional `OPTIONS`
+
+        """
+        super(BufferedBackend, self).__init__(**kwargs)
+
+        # Imported here since the tracker instantiates this backend when it is imported.
+        from track.tracker import _instantiate_backend_from_name
+        self.backend = _instantiate_backend_from_name(backend['ENGINE'], backend.get('OPTIONS', {}))
+
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.max_queue_size = max_queue_size
+        self.shutdown_timeout = shutdown_timeout
+
+        self.sent_events = 0
+        self.dropped_events = 0
+        self.failed_events = 0
+
+        self._lock = threading.Lock()
+        # The background thread is started by the first event sent by a
+        # process, since threads don't survive the forking of workers.
+        self._pid = None
+        self._queue = None
+        self._stopping = None
+        self._thread = None
+
+    def send(self, event):
+        """Queue the event to be sent by the background thread"""
+        self._start_thread()
+        if self._stopping.is_set():
+            self.backend.send(event)
+            return
+        try:
+            self._queue.put_nowait(event)
+        except Full:
+            with self._lock:
+                self.dropped_events += 1
+                dropped_events = self.dropped_events
+            # Don't flood the logs when overloaded.
+            if dropped_events % 1000 == 1:
+                log.warning(
+                    'Buffered event tracker backend queue is full, %d events dropped so far', dropped_events
+                )
+
+    def send_many(self, events):
+        """Queue the events to be sent by the background thread"""
+        for event in events:
+            self.send(event)
+
+    def flush(self, timeout=None):
+        """
+        Send the queued events, waiting at most `timeout` seconds (or
+        `shutdown_timeout` if not given) for them to be sent.  Events sent
+        afterwards are sent directly, without being buffered.
+
+        """
+        if self._pid != os.getpid():
+            return
+        self._stopping.set()
+        try:
+            self._queue.put_nowait(_WAKE_UP)
+        except Full:
+            # The thread isn't waiting for events then.
+            pass
+        self._thread.join(self.shutdown_timeout if timeout is None else timeout)
+        if self._thread.is_alive():
+            log.warning(
+                'Buffered event tracker backend timed out flushing, %d events not sent', self._queue.qsize()
+            )
+
+    def _start_thread(self):
+        """
+        Start the background thread of this process, if not done yet.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = Queue(self.max_queue_size)
+            self._stopping = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, args=(self._queue, self._stopping), name='BufferedBackend'
+            )
+            self._thread.daemon = True
+            self._thread.start()
+            if self._pid is None:
+                atexit.register(self.flush)
+            self._pid = os.getpid()
+
+    def _run(self, queue, stopping):
+        """
+        Send the events of the queue in batches, until stopping is set and the queue is empty.
+        """
+        while True:
+            batch = self._next_batch(queue, stopping)
+            if batch:
+                self._send_batch(batch)
+            elif stopping.is_set():
+                return
+
+    def _next_batch(self, queue, stopping):
+        """
+        Return the next batch of events from the queue, waiting for it to
+        fill for up to max_batch_delay seconds.  Returns an empty batch if
+        no event was queued within that time.
+        """
+        batch = []
+        deadline = time.time() + self.max_batch_delay
+        while len(batch) < self.max_batch_size:
+            try:
+                if stopping.is_set():
+                    event = queue.get_nowait()
+                else:
+                    timeout = deadline - time.time()
+                    if timeout <= 0:
+                        break
+                    event = queue.get(timeout=timeout)
+            except Empty:
+                break
+            if event is _WAKE_UP:
+                # Stopping is set, so the rest of the queue is taken without waiting.
+                continue
+            batch.append(event)
+            if len(batch) == 1:
+                # The delay is counted from the first event of the batch.
+                deadline = time.time() + self.max_batch_delay
+        return batch
+
+    def _send_batch(self, batch):
+        """
+        Send the batch of events to the backend.
+        """
+        # The background thread has its own database connections, which
+        # aren't closed at the end of a request.
+        close_old_connections()
+        try:
+            self.backend.send_many(batch)
+        except Exception:  # pylint: disable=broad-except
+            # As with the other backends, the events are lost.
+            log.exception('Error sending a batch of %d events to the buffered event tracker backend', len(batch))
+            with self._lock:
+                self.failed_events += len(batch)
+        else:
+            with self._lock:
+                self.sent_events += len(batch)
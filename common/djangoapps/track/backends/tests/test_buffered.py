@@ -0,0 +1,78 @@
+from __future__ import absolute_import
+
+import threading
+
+from django.test import TestCase
+
+from track.backends import BaseBackend
+from track.backends.buffered import BufferedBackend
+
+
+class InMemoryBackend(BaseBackend):
+    """Backend which keeps the batches of events it is sent, waiting for the gate to be open."""
+    def __init__(self, gate=None, **kwargs):
+        super(InMemoryBackend, self).__init__(**kwargs)
+        self.gate = gate
+        self.sending = threading.Event()
+        self.batches = []
+
+    def send(self, event):
+        self.batches.append([event])
+
+    def send_many(self, events):
+        self.sending.set()
+        if self.gate is not None:
+            self.gate.wait()
+        self.batches.append(list(events))
+
+
+class TestBufferedBackend(TestCase):
+    def make_backend(self, gate=None, **kwargs):
+        backend = BufferedBackend(
+            backend={
+                'ENGINE': 'track.backends.tests.test_buffered.InMemoryBackend',
+                'OPTIONS': {'gate': gate},
+            },
+            **kwargs
+        )
+        self.addCleanup(backend.flush)
+        return backend
+
+    def test_batches(self):
+        backend = self.make_backend(max_batch_size=2, max_batch_delay=60)
+        events = [{'test': index} for index in range(5)]
+        for event in events:
+            backend.send(event)
+        backend.flush()
+
+        self.assertEqual(backend.backend.batches, [events[0:2], events[2:4], events[4:5]])
+        self.assertEqual(backend.sent_events, 5)
+        self.assertEqual(backend.dropped_events, 0)
+
+    def test_batch_delay(self):
+        backend = self.make_backend(max_batch_delay=0.01)
+        backend.send({'test': 1})
+        self.assertTrue(backend.backend.sending.wait(5))
+        backend.flush()
+        self.assertEqual(backend.backend.batches, [[{'test': 1}]])
+
+    def test_full_queue(self):
+        gate = threading.Event()
+        backend = self.make_backend(gate=gate, max_batch_size=1, max_queue_size=1)
+        backend.send({'test': 1})
+        # Wait for the first event to be taken off the queue.
+        self.assertTrue(backend.backend.sending.wait(5))
+        backend.send({'test': 2})
+        backend.send({'test': 3})
+        gate.set()
+        backend.flush()
+
+        self.assertEqual(backend.backend.batches, [[{'test': 1}], [{'test': 2}]])
+        self.assertEqual(backend.dropped_events, 1)
+
+    def test_send_after_flush(self):
+        backend = self.make_backend()
+        backend.send({'test': 1})
+        backend.flush()
+        backend.send({'test': 2})
+        self.assertEqual(backend.backend.batches, [[{'test': 1}], [{'test': 2}]])
@@ -6,10 +6,12 @@ from opaque_keys.edx.keys import CourseKey
 from six import text_type
 
 from openedx.core.lib.request_utils import COURSE_REGEX
+from track.instrumentation import timed_function
 
 log = logging.getLogger(__name__)
 
 
+@timed_function('context')
 def course_context_from_url(url):
     """
     Extracts the course_context from the given `url` and passes it on to
@@ -0,0 +1,150 @@
+"""
+Timing of the stages of the event tracking pipeline.
+
+When the TRACKING_INSTRUMENTATION_ENABLED setting is true, the time spent
+in each stage is accumulated in custom request metrics named
+`track.<stage>.<name>.time_ms`, for instance
+`track.processor.LegacyFieldMappingProcessor.time_ms`.  The timings can
+also be collected in process with a TimingCollector, as the
+benchmark_tracking management command does.
+
+The processors and backends of event-tracking are timed by using
+InstrumentedRoutingBackend in place of its RoutingBackend.
+
+"""
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from edx_django_utils import monitoring as monitoring_utils
+from eventtracking.backends.routing import RoutingBackend
+
+_collectors = []
+
+
+def is_enabled():
+    """
+    Returns whether the stages of the pipeline are being timed.
+    """
+    return bool(_collectors) or getattr(settings, 'TRACKING_INSTRUMENTATION_ENABLED', False)
+
+
+def record_time(stage, name, duration):
+    """
+    Records that the given stage took `duration` seconds.
+    """
+    if getattr(settings, 'TRACKING_INSTRUMENTATION_ENABLED', False):
+        monitoring_utils.accumulate('track.{}.{}.time_ms'.format(stage, name), duration * 1000)
+    for collector in _collectors:
+        collector.record(stage, name, duration)
+
+
+@contextmanager
+def timed(stage, name):
+    """
+    Times the code run in the context as the given stage, if instrumentation is enabled.
+    """
+    if not is_enabled():
+        yield
+        return
+    start_time = time.time()
+    try:
+        yield
+    finally:
+        record_time(stage, name, time.time() - start_time)
+
+
+def timed_function(stage, name=None):
+    """
+    Decorator which times calls to the function as the given stage.  The
+    name of the stage defaults to the name of the function.
+    """
+    def decorator(func):  # pylint: disable=missing-docstring
+        @wraps(func)
+        def wrapper(*args, **kwargs):  # pylint: disable=missing-docstring
+            with timed(stage, name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimingCollector(object):
+    """
+    Collects the durations of the stages timed while it is active,
+    whether or not instrumentation is enabled by the settings.
+
+    Usage::
+
+        with TimingCollector() as collector:
+            ...
+        collector.durations  # {(stage, name): [seconds, ...]}
+
+    """
+    def __init__(self):
+        self.durations = {}
+
+    def record(self, stage, name, duration):
+        """
+        Records that the given stage took `duration` seconds.
+        """
+        self.durations.setdefault((stage, name), []).append(duration)
+
+    def __enter__(self):
+        _collectors.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _collectors.remove(self)
+
+
+class TimedProcessor(object):
+    """
+    Wraps an event-tracking processor to time it.
+    """
+    def __init__(self, processor):
+        self.processor = processor
+        self.name = type(processor).__name__
+
+    def __call__(self, event):
+        with timed('processor', self.name):
+            return self.processor(event)
+
+    def __str__(self):
+        return str(self.processor)
+
+
+class TimedBackend(object):
+    """
+    Wraps an event-tracking backend to time it.
+    """
+    def __init__(self, name, backend):
+        self.backend = backend
+        self.name = name
+
+    def send(self, event):
+        """Send the event to the wrapped backend."""
+        with timed('backend', self.name):
+            self.backend.send(event)
+
+
+class InstrumentedRoutingBackend(RoutingBackend):
+    """
+    RoutingBackend which times each of its processors and backends.
+    """
+    def __init__(self, backends=None, processors=None, **kwargs):
+        super(InstrumentedRoutingBackend, self).__init__(backends=backends, processors=processors, **kwargs)
+        # Those which were registered by the constructor are wrapped already.
+        self.processors = [
+            processor if isinstance(processor, TimedProcessor) else TimedProcessor(processor)
+            for processor in self.processors
+        ]
+        for name, backend in self.backends.items():
+            if not isinstance(backend, TimedBackend):
+                self.backends[name] = TimedBackend(name, backend)
+
+    def register_backend(self, name, backend):
+        super(InstrumentedRoutingBackend, self).register_backend(name, TimedBackend(name, backend))
+
+    def register_processor(self, processor):
+        super(InstrumentedRoutingBackend, self).register_processor(TimedProcessor(processor))
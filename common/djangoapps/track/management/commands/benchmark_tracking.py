@@ -0,0 +1,224 @@
+"""
+Benchmark of the event tracking pipeline.
+
+Replays a representative mix of events through the whole pipeline: the
+tracking middleware and the contexts it builds, the legacy tracking views,
+the event-tracking processors and backends configured by the settings, and
+the Segment forwarder.  Reports the number of events tracked per second and
+the latency of each stage of the pipeline.
+
+Example::
+
+    ./manage.py lms benchmark_tracking --settings=devstack --events 20000 --null-backends
+
+"""
+import copy
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+from eventtracking import tracker as eventtracker
+from eventtracking.django import DjangoTracker
+
+from track import segment, views
+from track import tracker as legacy_tracker
+from track.instrumentation import InstrumentedRoutingBackend, TimedBackend, TimedProcessor, TimingCollector
+from track.middleware import TrackMiddleware
+
+ROUTING_BACKEND_ENGINE = 'eventtracking.backends.routing.RoutingBackend'
+INSTRUMENTED_ROUTING_BACKEND_ENGINE = 'track.instrumentation.InstrumentedRoutingBackend'
+NULL_BACKEND_ENGINE = 'track.management.commands.benchmark_tracking.NullBackend'
+
+COURSE_ID = 'course-v1:edX+DemoX+Demo_Course'
+COURSEWARE_URL = '/courses/{}/courseware/interactive_demonstrations/basic_questions/'.format(COURSE_ID)
+PROBLEM_HANDLER_URL = (
+    '/courses/{}/xblock/block-v1:edX+DemoX+Demo_Course+type@problem+block@multiple_choice/'
+    'handler/xmodule_handler/problem_check'
+).format(COURSE_ID)
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/70.0 Safari/537.36'
+
+
+class NullBackend(object):
+    """
+    Backend which discards the events, used to measure the pipeline without its storage.
+    """
+    def __init__(self, **kwargs):
+        pass
+
+    def send(self, event):
+        """Discard the event."""
+        pass
+
+
+def instrumented_backends_config(config, null_backends=False):
+    """
+    Return a copy of the EVENT_TRACKING_BACKENDS config in which the routing
+    backends time their processors and backends, and optionally in which
+    the other backends discard the events.
+    """
+    config = copy.deepcopy(config)
+    for backend_config in config.values():
+        if not backend_config:
+            continue
+        if backend_config['ENGINE'] in (ROUTING_BACKEND_ENGINE, INSTRUMENTED_ROUTING_BACKEND_ENGINE):
+            backend_config['ENGINE'] = INSTRUMENTED_ROUTING_BACKEND_ENGINE
+            options = backend_config.setdefault('OPTIONS', {})
+            options['backends'] = instrumented_backends_config(options.get('backends', {}), null_backends)
+        elif null_backends:
+            backend_config.clear()
+            backend_config['ENGINE'] = NULL_BACKEND_ENGINE
+    return config
+
+
+def percentile(sorted_values, fraction):
+    """
+    Return the value below which the given fraction of the sorted values are.
+    """
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    """
+    Replay a mix of events through the event tracking pipeline and report its throughput.
+    """
+    help = 'Benchmark the event tracking pipeline and report the events per second and the latency of each stage.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--events',
+            type=int,
+            default=10000,
+            help='Number of requests to replay; each one tracks one or two events.',
+        )
+        parser.add_argument(
+            '--null-backends',
+            action='store_true',
+            default=False,
+            help='Discard the events instead of sending them to the configured backends.',
+        )
+
+    def handle(self, *args, **options):
+        config = instrumented_backends_config(settings.EVENT_TRACKING_BACKENDS, options['null_backends'])
+        with override_settings(EVENT_TRACKING_BACKENDS=config):
+            benchmark_tracker = DjangoTracker()
+        # Those of the tracker itself aren't behind a routing backend.
+        benchmark_tracker.processors[:] = [TimedProcessor(processor) for processor in benchmark_tracker.processors]
+        for name, backend in benchmark_tracker.backends.items():
+            if not isinstance(backend, InstrumentedRoutingBackend):
+                benchmark_tracker.backends[name] = TimedBackend(name, backend)
+
+        legacy_backends = dict(legacy_tracker.backends)
+        if options['null_backends']:
+            legacy_tracker.backends.update((name, NullBackend()) for name in legacy_backends)
+
+        default_tracker = eventtracker.get_tracker()
+        eventtracker.register_tracker(benchmark_tracker)
+        try:
+            with TimingCollector() as collector:
+                start_time = time.time()
+                event_count = self.replay(options['events'])
+                elapsed = time.time() - start_time
+        finally:
+            eventtracker.register_tracker(default_tracker)
+            legacy_tracker.backends.update(legacy_backends)
+
+        self.report(event_count, elapsed, collector.durations)
+
+    def replay(self, request_count):
+        """
+        Replay the given number of requests, and return the number of events they tracked.
+        """
+        factory = RequestFactory(HTTP_USER_AGENT=USER_AGENT, HTTP_REFERER='http://testserver' + COURSEWARE_URL)
+        middleware = TrackMiddleware()
+        replays = (
+            self.replay_browser_event,
+            self.replay_server_event,
+            self.replay_browser_event,
+            self.replay_emitted_event,
+            self.replay_browser_event,
+            self.replay_segment_event,
+        )
+        event_count = 0
+        for request_number in range(request_count):
+            event_count += replays[request_number % len(replays)](factory, middleware, request_number)
+        return event_count
+
+    def track_request(self, middleware, request, tracked_event):
+        """
+        Process the request through the tracking middleware, tracking the
+        event while in its context, and return the number of events tracked.
+        """
+        request.user = AnonymousUser()
+        middleware.process_request(request)
+        try:
+            tracked_event(request)
+        finally:
+            middleware.process_response(request, HttpResponse())
+        return 2 if middleware.should_process_request(request) else 1
+
+    def replay_browser_event(self, factory, middleware, request_number):
+        """
+        An event sent by the video player, as most browser events are.
+        """
+        request = factory.post('/event', {
+            'event_type': 'play_video',
+            'event': json.dumps({'id': 'video_{}'.format(request_number % 10), 'currentTime': request_number % 600}),
+            'page': 'http://testserver' + COURSEWARE_URL,
+        })
+        return self.track_request(middleware, request, views.user_track)
+
+    def replay_server_event(self, factory, middleware, request_number):
+        """
+        A problem_check event, tracked by the legacy server_track view.
+        """
+        request = factory.post(PROBLEM_HANDLER_URL, {'input_1_2_1': 'choice_{}'.format(request_number % 4)})
+        return self.track_request(middleware, request, lambda request: views.server_track(
+            request,
+            'problem_check',
+            {'answers': {'1_2_1': 'choice_{}'.format(request_number % 4)}, 'success': 'correct', 'attempts': 1},
+            page='x_module',
+        ))
+
+    def replay_emitted_event(self, factory, middleware, request_number):
+        """
+        An event emitted directly through event-tracking.
+        """
+        request = factory.get(COURSEWARE_URL)
+        return self.track_request(middleware, request, lambda request: eventtracker.emit(
+            'edx.grades.problem.submitted',
+            {'problem_id': 'multiple_choice', 'weighted_earned': request_number % 2, 'weighted_possible': 1},
+        ))
+
+    def replay_segment_event(self, factory, middleware, request_number):
+        """
+        An event sent to Segment, which is only forwarded when LMS_SEGMENT_KEY is set.
+        """
+        request = factory.get(COURSEWARE_URL)
+        return self.track_request(middleware, request, lambda request: segment.track(
+            request_number, 'edx.bi.course.upgrade.sidebarupsell.displayed', {'course_id': COURSE_ID},
+        ))
+
+    def report(self, event_count, elapsed, durations):
+        """
+        Write the throughput and the latency of each stage.
+        """
+        self.stdout.write('{} events in {:.2f}s: {:.0f} events/sec'.format(
+            event_count, elapsed, event_count / elapsed if elapsed else 0
+        ))
+        self.stdout.write('{:<60} {:>8} {:>10} {:>10} {:>10}'.format('stage', 'count', 'mean ms', 'p95 ms', 'total s'))
+        for (stage, name), stage_durations in sorted(durations.items()):
+            stage_durations = sorted(stage_durations)
+            total = sum(stage_durations)
+            self.stdout.write('{:<60} {:>8} {:>10.3f} {:>10.3f} {:>10.2f}'.format(
+                '{}.{}'.format(stage, name),
+                len(stage_durations),
+                total / len(stage_durations) * 1000,
+                percentile(stage_durations, 0.95) * 1000,
+                total,
+            ))
@@ -0,0 +1,52 @@
+"""Tests for the benchmark_tracking management command."""
+
+from StringIO import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from eventtracking import tracker
+
+from track import tracker as legacy_tracker
+from track.management.commands.benchmark_tracking import NULL_BACKEND_ENGINE, instrumented_backends_config
+from track.tests import IN_MEMORY_BACKEND_CONFIG
+
+ROUTING_BACKEND_CONFIG = {
+    'routing': {
+        'ENGINE': 'eventtracking.backends.routing.RoutingBackend',
+        'OPTIONS': {
+            'backends': IN_MEMORY_BACKEND_CONFIG,
+            'processors': [
+                {'ENGINE': 'track.shim.LegacyFieldMappingProcessor'},
+            ]
+        }
+    }
+}
+
+
+@override_settings(EVENT_TRACKING_BACKENDS=ROUTING_BACKEND_CONFIG)
+class BenchmarkTrackingTestCase(TestCase):
+    """Ensure the benchmark replays events through the pipeline and reports its stages."""
+
+    def test_instrumented_backends_config(self):
+        config = instrumented_backends_config(ROUTING_BACKEND_CONFIG, null_backends=True)
+        self.assertEqual(config['routing']['ENGINE'], 'track.instrumentation.InstrumentedRoutingBackend')
+        self.assertEqual(config['routing']['OPTIONS']['backends'], {'mem': {'ENGINE': NULL_BACKEND_ENGINE}})
+        # The settings are left alone.
+        self.assertEqual(ROUTING_BACKEND_CONFIG['routing']['OPTIONS']['backends'], IN_MEMORY_BACKEND_CONFIG)
+
+    def test_benchmark(self):
+        default_tracker = tracker.get_tracker()
+        legacy_backends = dict(legacy_tracker.backends)
+        out = StringIO()
+
+        call_command('benchmark_tracking', events=12, null_backends=True, stdout=out)
+
+        report = out.getvalue()
+        self.assertIn('events/sec', report)
+        for stage in ('context.enter_request_context', 'context.course_context_from_url', 'view.user_track',
+                      'view.server_track', 'segment.track', 'processor.LegacyFieldMappingProcessor', 'backend.mem'):
+            self.assertIn(stage, report)
+        # The trackers are restored.
+        self.assertIs(tracker.get_tracker(), default_tracker)
+        self.assertEqual(legacy_tracker.backends, legacy_backends)
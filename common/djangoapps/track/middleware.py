@@ -18,6 +18,7 @@ from ipware.ip import get_ip
 
 from eventtracking import tracker
 from track import contexts, views
+from track.instrumentation import timed_function
 
 log = logging.getLogger(__name__)
 
@@ -115,6 +116,7 @@ class TrackMiddleware(object):
                 return False
         return True
 
+    @timed_function('context')
     def enter_request_context(self, request):
         """
         Extract information from the request and add it to the tracking
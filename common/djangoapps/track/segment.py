@@ -14,7 +14,10 @@ import analytics
 from django.conf import settings
 from eventtracking import tracker
 
+from track.instrumentation import timed_function
 
+
+@timed_function('segment')
 def track(user_id, event_name, properties=None, context=None):
     """Wrapper for emitting Segment track event, including augmenting context information from middleware."""
 
@@ -0,0 +1,89 @@
+"""Tests for the timing of the stages of the event tracking pipeline."""
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from eventtracking import tracker
+from eventtracking.django import DjangoTracker
+from mock import patch
+
+from track import contexts
+from track.instrumentation import InstrumentedRoutingBackend, TimedBackend, TimedProcessor, TimingCollector, timed
+from track.tests import InMemoryBackend
+
+INSTRUMENTED_BACKEND_CONFIG = {
+    'routing': {
+        'ENGINE': 'track.instrumentation.InstrumentedRoutingBackend',
+        'OPTIONS': {
+            'backends': {
+                'mem': {'ENGINE': 'track.tests.InMemoryBackend'},
+            },
+            'processors': [
+                {'ENGINE': 'track.shim.LegacyFieldMappingProcessor'},
+            ]
+        }
+    }
+}
+
+
+class TimingTestCase(TestCase):
+    """Ensure the timed stages are recorded."""
+
+    def test_disabled(self):
+        with patch('track.instrumentation.monitoring_utils.accumulate') as mock_accumulate:
+            with timed('stage', 'name'):
+                pass
+            contexts.course_context_from_url('')
+        self.assertFalse(mock_accumulate.called)
+
+    @override_settings(TRACKING_INSTRUMENTATION_ENABLED=True)
+    def test_metrics(self):
+        with patch('track.instrumentation.monitoring_utils.accumulate') as mock_accumulate:
+            contexts.course_context_from_url('')
+        self.assertEqual(mock_accumulate.call_count, 1)
+        metric_name, duration = mock_accumulate.call_args[0]
+        self.assertEqual(metric_name, 'track.context.course_context_from_url.time_ms')
+        self.assertGreaterEqual(duration, 0)
+
+    def test_collector(self):
+        with TimingCollector() as collector:
+            with timed('stage', 'name'):
+                pass
+            contexts.course_context_from_url('')
+            contexts.course_context_from_url('')
+        with timed('stage', 'name'):
+            pass
+        self.assertEqual(
+            {key: len(durations) for key, durations in collector.durations.items()},
+            {('stage', 'name'): 1, ('context', 'course_context_from_url'): 2},
+        )
+
+
+@override_settings(EVENT_TRACKING_BACKENDS=INSTRUMENTED_BACKEND_CONFIG)
+class InstrumentedRoutingBackendTestCase(TestCase):
+    """Ensure the processors and backends of the routing backend are timed."""
+
+    def setUp(self):
+        super(InstrumentedRoutingBackendTestCase, self).setUp()
+        self.tracker = DjangoTracker()
+        tracker.register_tracker(self.tracker)
+        self.routing_backend = self.tracker.backends['routing']
+
+    def test_wrapped(self):
+        self.assertIsInstance(self.routing_backend, InstrumentedRoutingBackend)
+        self.assertIsInstance(self.routing_backend.backends['mem'], TimedBackend)
+        self.assertEqual([type(processor) for processor in self.routing_backend.processors], [TimedProcessor])
+
+        self.routing_backend.register_backend('other', InMemoryBackend())
+        self.assertIsInstance(self.routing_backend.backends['other'], TimedBackend)
+
+    def test_emit(self):
+        with TimingCollector() as collector:
+            tracker.emit('edx.test.event', {'foo': 'bar'})
+
+        events = self.routing_backend.backends['mem'].backend.events
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['event'], {'foo': 'bar'})
+        self.assertEqual(
+            sorted(collector.durations),
+            [('backend', 'mem'), ('processor', 'LegacyFieldMappingProcessor')],
+        )
@@ -24,6 +24,7 @@ from importlib import import_module
 from django.conf import settings
 
 from track.backends import BaseBackend
+from track.instrumentation import timed
 
 __all__ = ['send']
 
@@ -87,7 +88,8 @@ def send(event):
     """
 
     for name, backend in backends.iteritems():
-        backend.send(event)
+        with timed('legacy_backend', name):
+            backend.send(event)
 
 
 _initialize_backends_from_django_settings()
@@ -15,6 +15,7 @@ from ipware.ip import get_ip
 from track import tracker
 from track import contexts
 from track import shim
+from track.instrumentation import timed_function
 from track.models import TrackingLog
 from eventtracking import tracker as eventtracker
 
@@ -50,6 +51,7 @@ def _get_request_value(request, value_name, default=''):
     return default
 
 
+@timed_function('view')
 def user_track(request):
     """
     Log when POST call to "event" URL is made by a user.
@@ -82,6 +84,7 @@ def user_track(request):
     return HttpResponse('success')
 
 
+@timed_function('view')
 def server_track(request, event_type, event, page=None):
     """
     Log events related to server requests.
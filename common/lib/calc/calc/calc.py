@@ -7,6 +7,8 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import numbers
 import operator
+from collections import OrderedDict
+from threading import Lock
 
 import numpy
 from pyparsing import (
@@ -80,6 +82,12 @@ SUFFIXES = {
     '%': 0.01,
 }
 
+# Maximum number of compiled expressions kept by `compile_expression`.
+COMPILED_EXPRESSION_CACHE_SIZE = 1024
+
+# Maximum number of parse trees kept by `ParseAugmenter.parse_algebra`.
+PARSE_CACHE_SIZE = 1024
+
 
 class UndefinedVariable(Exception):
     """
@@ -215,6 +223,119 @@ def eval_product(parse_result):
     return prod
 
 
+# Array-aware versions of the evaluation actions above, used when evaluating
+# many samples at once. Variables are then numpy arrays with one entry per
+# sample, so operators are told apart from operands by type rather than by
+# comparing them against the operator strings.
+
+def _is_operand(token):
+    """
+    Return whether the token is a (scalar or array) value, not an operator.
+    """
+    return not isinstance(token, basestring)
+
+
+def eval_atom_samples(parse_result):
+    """
+    Return the value wrapped by the atom, ignoring parenthesis.
+    """
+    return next(k for k in parse_result if _is_operand(k))
+
+
+def eval_power_samples(parse_result):
+    """
+    Exponentiate the values right to left, as `eval_power` does.
+    """
+    parse_result = reversed([k for k in parse_result if _is_operand(k)])
+    return reduce(lambda a, b: b ** a, parse_result)
+
+
+def eval_parallel_samples(parse_result):
+    """
+    Compute the parallel resistors operator, as `eval_parallel` does.
+
+    Zero inputs can't be handled for part of the samples only, so raise
+    `SampleEvaluationError` to have them evaluated one by one.
+    """
+    if len(parse_result) == 1:
+        return parse_result[0]
+    operands = [e for e in parse_result if _is_operand(e)]
+    if any(numpy.any(numpy.asarray(e) == 0) for e in operands):
+        raise SampleEvaluationError()
+    return 1. / sum(1. / e for e in operands)
+
+
+def eval_sum_samples(parse_result):
+    """
+    Add the inputs, keeping in mind their sign, as `eval_sum` does.
+    """
+    total = 0.0
+    current_op = operator.add
+    for token in parse_result:
+        if not _is_operand(token):
+            current_op = operator.sub if token == '-' else operator.add
+        else:
+            total = current_op(total, token)
+    return total
+
+
+def eval_product_samples(parse_result):
+    """
+    Multiply the inputs, as `eval_product` does.
+    """
+    prod = 1.0
+    current_op = operator.mul
+    for token in parse_result:
+        if not _is_operand(token):
+            current_op = operator.truediv if token == '/' else operator.mul
+        else:
+            prod = current_op(prod, token)
+    return prod
+
+
+class SampleEvaluationError(Exception):
+    """
+    Indicate that a set of samples can't be evaluated in a single pass.
+    """
+    pass
+
+
+class _LRUCache(object):
+    """
+    A bounded, thread-safe cache that drops its least recently used values.
+    """
+    def __init__(self, size):
+        self.size = size
+        self._values = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, create):
+        """
+        Return the value cached for the key, calling `create()` to make it if
+        it isn't cached. Exceptions raised by `create` are not cached.
+        """
+        with self._lock:
+            value = self._values.pop(key, None)
+            if value is not None:
+                self._values[key] = value
+                return value
+
+        # Create the value outside of the lock, it may be slow.
+        value = create()
+        with self._lock:
+            self._values[key] = value
+            while len(self._values) > self.size:
+                self._values.popitem(last=False)
+        return value
+
+    def clear(self):
+        """
+        Remove all cached values.
+        """
+        with self._lock:
+            self._values.clear()
+
+
 def add_defaults(variables, functions, case_sensitive):
     """
     Create dictionaries with both the default and user-defined variables.
@@ -239,39 +360,128 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
      python numbers.
     -Unary functions are passed as a dictionary from string to function.
     """
-    # No need to go further.
-    if math_expr.strip() == "":
-        return float('nan')
+    return compile_expression(math_expr, case_sensitive).evaluate(variables, functions)
 
-    # Parse the tree.
-    check_parens(math_expr)
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
 
-    # Get our variables together.
-    all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
+class CompiledExpression(object):
+    """
+    A math expression that is parsed once and can then be evaluated any
+    number of times, for a single set of variables or for many samples at
+    once.
 
-    # ...and check them
-    math_interpreter.check_variables(all_variables, all_functions)
+    Use `compile_expression` to get a cached instance.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
 
-    # Create a recursion to evaluate the tree.
-    if case_sensitive:
-        casify = lambda x: x
-    else:
-        casify = lambda x: x.lower()  # Lowercase for case insens.
-
-    evaluate_actions = {
-        'number': eval_number,
-        'variable': lambda x: all_variables[casify(x[0])],
-        'function': lambda x: all_functions[casify(x[0])](x[1]),
-        'atom': eval_atom,
-        'power': eval_power,
-        'parallel': eval_parallel,
-        'product': eval_product,
-        'sum': eval_sum
-    }
+        # No need to parse a blank expression; it evaluates to NaN.
+        self.math_interpreter = None
+        if math_expr.strip() != "":
+            check_parens(math_expr)
+            self.math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+            self.math_interpreter.parse_algebra()
 
-    return math_interpreter.reduce_tree(evaluate_actions)
+    def evaluate(self, variables, functions):
+        """
+        Evaluate the expression for the given variables and functions, like
+        `evaluator` does.
+        """
+        if self.math_interpreter is None:
+            return float('nan')
+
+        all_variables, all_functions = self._get_checked_defaults(variables, functions)
+        return self.math_interpreter.reduce_tree(self._evaluate_actions(all_variables, all_functions, {
+            'number': eval_number,
+            'atom': eval_atom,
+            'power': eval_power,
+            'parallel': eval_parallel,
+            'product': eval_product,
+            'sum': eval_sum,
+        }))
+
+    def evaluate_samples(self, samples, functions):
+        """
+        Evaluate the expression for each of the given samples and return the
+        list of results, in order.
+
+        `samples` is a list of variable dictionaries, all with the same keys.
+        The samples are evaluated together in a single vectorized pass over
+        the parse tree. If that isn't possible (e.g. a function doesn't accept
+        arrays, or a floating point error occurs for some sample), they are
+        evaluated one by one instead, so the results and errors are the same
+        as those of `evaluate`.
+        """
+        if not samples:
+            return []
+        if self.math_interpreter is None:
+            return [float('nan')] * len(samples)
+
+        variables = {
+            name: numpy.array([sample[name] for sample in samples])
+            for name in samples[0]
+        }
+        all_variables, all_functions = self._get_checked_defaults(variables, functions)
+        actions = self._evaluate_actions(all_variables, all_functions, {
+            'number': eval_number,
+            'atom': eval_atom_samples,
+            'power': eval_power_samples,
+            'parallel': eval_parallel_samples,
+            'product': eval_product_samples,
+            'sum': eval_sum_samples,
+        })
+
+        try:
+            with numpy.errstate(all='raise'):
+                result = self.math_interpreter.reduce_tree(actions)
+            if numpy.ndim(result) == 0:
+                return [result] * len(samples)
+            if numpy.shape(result) != (len(samples),):
+                raise SampleEvaluationError()
+            return list(result)
+        except Exception:  # pylint: disable=broad-except
+            return [self.evaluate(sample, functions) for sample in samples]
+
+    def _get_checked_defaults(self, variables, functions):
+        """
+        Return the variables and functions including the defaults, after
+        checking that they define everything used in the expression.
+        """
+        all_variables, all_functions = add_defaults(variables, functions, self.case_sensitive)
+        self.math_interpreter.check_variables(all_variables, all_functions)
+        return all_variables, all_functions
+
+    def _evaluate_actions(self, all_variables, all_functions, actions):
+        """
+        Return the given evaluation actions along with the ones that look up
+        variables and functions.
+        """
+        # Create a recursion to evaluate the tree.
+        if self.case_sensitive:
+            casify = lambda x: x
+        else:
+            casify = lambda x: x.lower()  # Lowercase for case insens.
+
+        actions = dict(actions)
+        actions['variable'] = lambda x: all_variables[casify(x[0])]
+        actions['function'] = lambda x: all_functions[casify(x[0])](x[1])
+        return actions
+
+
+_COMPILED_EXPRESSIONS = _LRUCache(COMPILED_EXPRESSION_CACHE_SIZE)
+
+
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return a `CompiledExpression` for the given math expression string.
+
+    Compiled expressions are cached, so repeated calls with the same
+    expression only parse it once.
+    """
+    return _COMPILED_EXPRESSIONS.get(
+        (math_expr, case_sensitive),
+        lambda: CompiledExpression(math_expr, case_sensitive),
+    )
 
 
 def check_parens(formula):
@@ -298,6 +508,103 @@ def check_parens(formula):
         raise UnmatchedParenthesis(msg.format(count))
 
 
+def _build_grammar():
+    """
+    Return the pyparsing grammar for algebraic expressions.
+
+    The grammar holds no state of its own, so it is built once and shared by
+    all parses.
+    """
+    # 0.33 or 7 or .34 or 16.
+    number_part = Word(nums)
+    inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
+    # pyparsing allows spaces between tokens--`Combine` prevents that.
+    inner_number = Combine(inner_number)
+
+    # SI suffixes and percent.
+    number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
+
+    # 0.33k or 17
+    plus_minus = Literal('+') | Literal('-')
+    number = Group(
+        Optional(plus_minus) +
+        inner_number +
+        Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
+        Optional(number_suffix)
+    )
+    number = number("number")
+
+    # Predefine recursive variables.
+    expr = Forward()
+
+    # Handle variables passed in. They must start with a letter
+    # and may contain numbers and underscores afterward.
+    inner_varname = Combine(Word(alphas, alphanums + "_") + ZeroOrMore("'"))
+    # Alternative variable name in tensor format
+    # Tensor name must start with a letter, continue with alphanums
+    # Indices may be alphanumeric
+    # e.g., U_{ijk}^{123}
+    upper_indices = Literal("^{") + Word(alphanums) + Literal("}")
+    lower_indices = Literal("_{") + Word(alphanums) + Literal("}")
+    tensor_lower = Combine(Word(alphas, alphanums) + lower_indices + ZeroOrMore("'"))
+    tensor_mixed = Combine(Word(alphas, alphanums) + Optional(lower_indices) + upper_indices + ZeroOrMore("'"))
+    # Test for mixed tensor first, then lower tensor alone, then generic variable name
+    varname = Group(tensor_mixed | tensor_lower | inner_varname)("variable")
+
+    # Same thing for functions.
+    function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
+
+    atom = number | function | varname | "(" + expr + ")"
+    atom = Group(atom)("atom")
+
+    # Do the following in the correct order to preserve order of operation.
+    pow_term = atom + ZeroOrMore("^" + atom)
+    pow_term = Group(pow_term)("power")
+
+    par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
+    par_term = Group(par_term)("parallel")
+
+    prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
+    prod_term = Group(prod_term)("product")
+
+    sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
+    sum_term = Group(sum_term)("sum")
+
+    # Finish the recursion.
+    expr << sum_term  # pylint: disable=pointless-statement
+    return expr + stringEnd
+
+
+_GRAMMAR = _build_grammar()
+
+_PARSED_EXPRESSIONS = _LRUCache(PARSE_CACHE_SIZE)
+
+
+def _parse(math_expr):
+    """
+    Parse the math expression with the shared grammar.
+
+    Return the parse tree along with the frozensets of the names of the
+    variables and of the functions it uses.
+    """
+    tree = _GRAMMAR.parseString(math_expr)[0]
+
+    variables_used = set()
+    functions_used = set()
+    nodes = [tree]
+    while nodes:
+        node = nodes.pop()
+        if not isinstance(node, ParseResults):
+            continue
+        node_name = node.getName()
+        if node_name == "variable":
+            variables_used.add(node[0])
+        elif node_name == "function":
+            functions_used.add(node[0])
+        nodes.extend(node)
+    return tree, frozenset(variables_used), frozenset(functions_used)
+
+
 class ParseAugmenter(object):
     """
     Holds the data for a particular parse.
@@ -318,23 +625,6 @@ class ParseAugmenter(object):
         self.variables_used = set()
         self.functions_used = set()
 
-        def vpa(tokens):
-            """
-            When a variable is recognized, store it in `variables_used`.
-            """
-            varname = tokens[0][0]
-            self.variables_used.add(varname)
-
-        def fpa(tokens):
-            """
-            When a function is recognized, store it in `functions_used`.
-            """
-            varname = tokens[0][0]
-            self.functions_used.add(varname)
-
-        self.variable_parse_action = vpa
-        self.function_parse_action = fpa
-
     def parse_algebra(self):
         """
         Parse an algebraic expression into a tree.
@@ -343,70 +633,19 @@ class ParseAugmenter(object):
         reflect parenthesis and order of operations. Leave all operators in the
         tree and do not parse any strings of numbers into their float versions.
 
+        Parse trees are cached by expression, so they must not be modified.
+
         Adding the groups and result names makes the `repr()` of the result
         really gross. For debugging, use something like
           print OBJ.tree.asXML()
         """
-        # 0.33 or 7 or .34 or 16.
-        number_part = Word(nums)
-        inner_number = (number_part + Optional("." + Optional(number_part))) | ("." + number_part)
-        # pyparsing allows spaces between tokens--`Combine` prevents that.
-        inner_number = Combine(inner_number)
-
-        # SI suffixes and percent.
-        number_suffix = MatchFirst(Literal(k) for k in SUFFIXES.keys())
-
-        # 0.33k or 17
-        plus_minus = Literal('+') | Literal('-')
-        number = Group(
-            Optional(plus_minus) +
-            inner_number +
-            Optional(CaselessLiteral("E") + Optional(plus_minus) + number_part) +
-            Optional(number_suffix)
+        tree, variables_used, functions_used = _PARSED_EXPRESSIONS.get(
+            self.math_expr,
+            lambda: _parse(self.math_expr),
         )
-        number = number("number")
-
-        # Predefine recursive variables.
-        expr = Forward()
-
-        # Handle variables passed in. They must start with a letter
-        # and may contain numbers and underscores afterward.
-        inner_varname = Combine(Word(alphas, alphanums + "_") + ZeroOrMore("'"))
-        # Alternative variable name in tensor format
-        # Tensor name must start with a letter, continue with alphanums
-        # Indices may be alphanumeric
-        # e.g., U_{ijk}^{123}
-        upper_indices = Literal("^{") + Word(alphanums) + Literal("}")
-        lower_indices = Literal("_{") + Word(alphanums) + Literal("}")
-        tensor_lower = Combine(Word(alphas, alphanums) + lower_indices + ZeroOrMore("'"))
-        tensor_mixed = Combine(Word(alphas, alphanums) + Optional(lower_indices) + upper_indices + ZeroOrMore("'"))
-        # Test for mixed tensor first, then lower tensor alone, then generic variable name
-        varname = Group(tensor_mixed | tensor_lower | inner_varname)("variable")
-        varname.setParseAction(self.variable_parse_action)
-
-        # Same thing for functions.
-        function = Group(inner_varname + Suppress("(") + expr + Suppress(")"))("function")
-        function.setParseAction(self.function_parse_action)
-
-        atom = number | function | varname | "(" + expr + ")"
-        atom = Group(atom)("atom")
-
-        # Do the following in the correct order to preserve order of operation.
-        pow_term = atom + ZeroOrMore("^" + atom)
-        pow_term = Group(pow_term)("power")
-
-        par_term = pow_term + ZeroOrMore('||' + pow_term)  # 5k || 4k
-        par_term = Group(par_term)("parallel")
-
-        prod_term = par_term + ZeroOrMore((Literal('*') | Literal('/')) + par_term)  # 7 * 5 / 4
-        prod_term = Group(prod_term)("product")
-
-        sum_term = Optional(plus_minus) + prod_term + ZeroOrMore(plus_minus + prod_term)  # -5 + 4 - 3
-        sum_term = Group(sum_term)("sum")
-
-        # Finish the recursion.
-        expr << sum_term  # pylint: disable=pointless-statement
-        self.tree = (expr + stringEnd).parseString(self.math_expr)[0]
+        self.tree = tree
+        self.variables_used = set(variables_used)
+        self.functions_used = set(functions_used)
 
     def reduce_tree(self, handle_actions, terminal_converter=None):
         """
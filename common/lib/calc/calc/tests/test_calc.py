@@ -554,3 +554,103 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({}, {}, "(1+2")
         with self.assertRaisesRegexp(calc.UnmatchedParenthesis, 'no matching opening parenthesis'):
             calc.evaluator({}, {}, "(1+2))")
+
+
+class CompiledExpressionTest(unittest.TestCase):
+    """
+    Tests for compiling an expression once and evaluating it many times.
+    """
+    def setUp(self):
+        super(CompiledExpressionTest, self).setUp()
+        calc.calc._COMPILED_EXPRESSIONS.clear()
+        calc.calc._PARSED_EXPRESSIONS.clear()
+
+    def test_parse_is_cached(self):
+        """
+        An expression is only parsed once, whatever its case sensitivity.
+        """
+        first = calc.ParseAugmenter('f(x_{0}) + y^2')
+        first.parse_algebra()
+        second = calc.ParseAugmenter('f(x_{0}) + y^2', case_sensitive=True)
+        second.parse_algebra()
+
+        self.assertIs(first.tree, second.tree)
+        self.assertEqual(first.variables_used, set(['x_{0}', 'y']))
+        self.assertEqual(first.functions_used, set(['f']))
+
+        # The sets of names belong to each parse.
+        second.variables_used.add('z')
+        self.assertEqual(first.variables_used, set(['x_{0}', 'y']))
+
+    def test_parse_errors(self):
+        """
+        Parse errors are raised every time, and are not cached.
+        """
+        for _ in range(2):
+            with self.assertRaises(ParseException):
+                calc.ParseAugmenter('1 + * 2').parse_algebra()
+
+    def test_compile_is_cached(self):
+        """
+        The same expression is only compiled once per case sensitivity.
+        """
+        compiled = calc.compile_expression('x^2 + 1')
+        self.assertIs(compiled, calc.compile_expression('x^2 + 1'))
+        self.assertIsNot(compiled, calc.compile_expression('x^2 + 1', case_sensitive=True))
+        self.assertEqual(compiled.evaluate({'x': 3}, {}), 10)
+
+    def test_cache_is_bounded(self):
+        """
+        The least recently used expressions are dropped from the cache.
+        """
+        cache = calc.calc._LRUCache(2)
+        first = cache.get('a', object)
+        self.assertIs(first, cache.get('a', object))
+        cache.get('b', object)
+        cache.get('c', object)
+        self.assertIsNot(first, cache.get('a', object))
+
+    def test_evaluate_samples(self):
+        """
+        Evaluating samples together matches evaluating them one by one.
+        """
+        samples = [{'x': 0.5 * i, 'y': 1.0 + i, 'r': 2.0} for i in range(1, 10)]
+        for expr in ['x^2 + y/x - 3*r', 'sin(x) * e^y', '-x^(-y)', 'x || y || r', 'sqrt(y)', '5%', 'x*(y-r)']:
+            compiled = calc.compile_expression(expr)
+            expected = [compiled.evaluate(sample, {}) for sample in samples]
+            results = compiled.evaluate_samples(samples, {})
+            self.assertEqual(len(results), len(samples))
+            for result, expected_result in zip(results, expected):
+                self.assertAlmostEqual(result, expected_result, msg=expr)
+
+        # The function is applied to all the samples in a single call.
+        calls = []
+        functions = {'f': lambda x: calls.append(x) or numpy.cos(x)}
+        calc.compile_expression('f(x) + y').evaluate_samples(samples, functions)
+        self.assertEqual(len(calls), 1)
+
+    def test_evaluate_samples_fallback(self):
+        """
+        Samples that can't be evaluated together are evaluated one by one.
+        """
+        # Parallel resistors with a zero input, and a function that only
+        # accepts scalars.
+        samples = [{'x': 0.0}, {'x': 2.0}]
+        results = calc.compile_expression('x || 2').evaluate_samples(samples, {})
+        self.assertTrue(numpy.isnan(results[0]))
+        self.assertEqual(results[1], 1.0)
+        self.assertEqual(calc.compile_expression('fact(x)').evaluate_samples(samples, {}), [1, 2])
+
+        # Errors are the same as when evaluating a single sample.
+        with self.assertRaises(ValueError):
+            calc.compile_expression('fact(x)').evaluate_samples([{'x': 2.0}, {'x': -1.0}], {})
+        with self.assertRaises(calc.UndefinedVariable):
+            calc.compile_expression('x + z').evaluate_samples(samples, {})
+
+    def test_evaluate_samples_edge_cases(self):
+        """
+        Blank expressions, constants and empty samples are supported.
+        """
+        self.assertTrue(all(numpy.isnan(calc.compile_expression('').evaluate_samples([{}, {}], {}))))
+        self.assertEqual(calc.compile_expression('2*3').evaluate_samples([{'x': 1}, {'x': 2}], {}), [6, 6])
+        self.assertEqual(calc.compile_expression('x').evaluate_samples([], {}), [])
@@ -0,0 +1,86 @@
+"""
+Compare running capa code with the sandbox worker pool against starting a
+new sandboxed Python for every execution.
+
+Run it from the platform's virtualenv, with the sandboxed Python and user
+if codejail is set up locally (otherwise the current Python is used,
+without a sandbox)::
+
+    python -m capa.safe_exec.benchmark --runs 50 --pool-size 2 \\
+        --python /edx/app/edxapp/venvs/edxapp-sandbox/bin/python --user sandbox
+
+"""
+import argparse
+import sys
+import time
+
+from codejail import jail_code
+
+from . import worker_pool
+from .safe_exec import safe_exec
+
+# A typical CustomResponse check function.
+CODE = """\
+def check(expect, ans):
+    values = numpy.array([float(v) for v in ans.split(",")])
+    return bool(abs(numpy.mean(values) - expect) < 0.01)
+
+result = check(2, answer)
+"""
+
+
+def time_executions(runs):
+    """
+    Return the sorted durations, in seconds, of `runs` executions of CODE.
+    """
+    durations = []
+    for run in range(runs):
+        globals_dict = {"answer": "1, 2, 3"}
+        start_time = time.time()
+        safe_exec(CODE, globals_dict, random_seed=run)
+        durations.append(time.time() - start_time)
+        assert globals_dict["result"] is True
+    return sorted(durations)
+
+
+def report(name, durations):
+    """
+    Print a summary of the durations.
+    """
+    mean = sum(durations) / len(durations)
+    print "{:<16} mean {:8.1f}ms  median {:8.1f}ms  p95 {:8.1f}ms".format(
+        name,
+        mean * 1000,
+        durations[len(durations) // 2] * 1000,
+        durations[int(len(durations) * 0.95)] * 1000,
+    )
+    return mean
+
+
+def main(argv=None):
+    """
+    Run the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=50, help="executions per configuration")
+    parser.add_argument("--pool-size", type=int, default=2, help="number of pool workers")
+    parser.add_argument("--max-runs", type=int, default=worker_pool.MAX_RUNS, help="executions per worker")
+    parser.add_argument("--python", default=sys.executable, help="the sandboxed Python")
+    parser.add_argument("--user", default=None, help="the user to run the sandboxed Python as")
+    args = parser.parse_args(argv)
+
+    jail_code.configure("python", args.python, user=args.user)
+
+    worker_pool.configure(0)
+    fork_mean = report("fork per call", time_executions(args.runs))
+
+    worker_pool.configure(args.pool_size, args.max_runs)
+    worker_pool.get_worker_pool()  # Start the workers outside of the timings.
+    pool_mean = report("worker pool", time_executions(args.runs))
+    worker_pool.get_worker_pool().shutdown()
+
+    print "speedup: {:.1f}x".format(fork_mean / pool_mean)
+
+
+if __name__ == "__main__":
+    main()
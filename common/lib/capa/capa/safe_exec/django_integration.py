@@ -0,0 +1,34 @@
+"""
+Django integration for capa's sandbox worker pool.
+
+Add `capa.safe_exec.django_integration.ConfigureWorkerPoolMiddleware` to
+MIDDLEWARE_CLASSES, and configure the pool in the CODE_JAIL setting::
+
+    CODE_JAIL = {
+        ...
+        'worker_pool': {
+            # How many pre-started sandbox workers each process keeps.
+            'size': 2,
+            # How many executions a worker runs before it is replaced.
+            'max_runs': 100,
+        },
+    }
+
+"""
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import worker_pool
+
+
+class ConfigureWorkerPoolMiddleware(object):
+    """
+    Configure the sandbox worker pool on startup.
+    """
+    def __init__(self):
+        pool_settings = getattr(settings, 'CODE_JAIL', {}).get('worker_pool', {})
+        worker_pool.configure(
+            pool_settings.get('size', 0),
+            pool_settings.get('max_runs', worker_pool.MAX_RUNS),
+        )
+        raise MiddlewareNotUsed
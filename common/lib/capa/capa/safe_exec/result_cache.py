@@ -0,0 +1,219 @@
+"""
+Caching and metrics for capa's safe_exec results.
+
+Results are cached in two levels: a small process-local LRU in front of the
+cache object given by the caller (the runtime's Django cache).  Cache keys are
+content-addressed: they are a hash of everything that determines the result of
+an execution, canonicalized so that they don't depend on dict ordering.
+
+Execution statistics are kept per problem, to tell how often problem scripts
+are re-executed rather than served from the cache, and how long they take.
+"""
+import copy
+import hashlib
+import json
+from collections import OrderedDict
+from threading import Lock
+
+# How many results to keep in the process-local cache.
+LOCAL_CACHE_SIZE = 1000
+
+# How many bytes of serialized results the process-local cache may hold; this
+# is roughly the memory it may take in each worker process.  Larger results
+# are only cached in the shared cache.
+LOCAL_CACHE_MAX_BYTES = 32 * 1024 * 1024
+LOCAL_CACHE_MAX_RESULT_BYTES = 1024 * 1024
+
+# How many problems to keep execution statistics for.
+STATS_SIZE = 1000
+
+
+def update_hash(hasher, obj):
+    """
+    Update a `hashlib` hasher with a nested object.
+
+    To properly cache nested structures, we need to compute a hash from the
+    entire structure, canonicalizing at every level.
+
+    `hasher`'s `.update()` method is called a number of times, touching all of
+    `obj` in the process.  Only primitive JSON-safe types are supported.
+
+    """
+    hasher.update(str(type(obj)))
+    if isinstance(obj, (tuple, list)):
+        for e in obj:
+            update_hash(hasher, e)
+    elif isinstance(obj, dict):
+        for k in sorted(obj):
+            update_hash(hasher, k)
+            update_hash(hasher, obj[k])
+    else:
+        hasher.update(repr(obj))
+
+
+def make_cache_key(code, safe_globals, random_seed, python_path=None, extra_files=None):
+    """
+    Return the cache key for executing `code` with the JSON-safe globals
+    `safe_globals` and the other arguments of `safe_exec`.
+
+    The files available to the code are part of the key, since changing them
+    (e.g. uploading a new python_lib.zip) can change the result.
+    """
+    if isinstance(code, unicode):
+        code = code.encode('utf-8')
+
+    hasher = hashlib.sha256()
+    update_hash(hasher, code)
+    update_hash(hasher, safe_globals)
+    update_hash(hasher, random_seed)
+    update_hash(hasher, list(python_path or []))
+    for filename, contents in extra_files or []:
+        update_hash(hasher, filename)
+        hasher.update(hashlib.sha256(contents).hexdigest())
+    return "safe_exec.%s" % hasher.hexdigest()
+
+
+class ResultCache(object):
+    """
+    A process-local LRU cache of safe_exec results, in front of a shared
+    cache object with .get(key) and .set(key, value) methods.
+
+    Results are pairs: the exception message, if any, else None; and the
+    resulting JSON-safe globals dictionary.  The process-local cache holds at
+    most `max_entries` results and `max_bytes` bytes of serialized results;
+    results over `max_result_bytes` aren't kept in it.
+    """
+    def __init__(self, max_entries, max_bytes, max_result_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_result_bytes = max_result_bytes
+
+        # dict {key: (result, serialized size)}, least recently used first.
+        self._results = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    def get(self, key, shared_cache):
+        """
+        Return the result cached for `key`, or None if it isn't cached.
+        """
+        with self._lock:
+            entry = self._results.pop(key, None)
+            if entry is not None:
+                self._results[key] = entry
+        if entry is not None:
+            result = entry[0]
+        else:
+            result = shared_cache.get(key)
+            if result is None:
+                return None
+            self._set_local(key, result)
+
+        # Callers update their globals with the result, so it can't be shared.
+        return copy.deepcopy(result)
+
+    def set(self, key, result, shared_cache):
+        """
+        Cache the result for `key` in both levels.
+        """
+        shared_cache.set(key, result)
+        self._set_local(key, copy.deepcopy(result))
+
+    def clear(self):
+        """
+        Remove all the results from the process-local cache.
+        """
+        with self._lock:
+            self._results.clear()
+            self._size = 0
+
+    def _set_local(self, key, result):
+        """
+        Cache the result for `key` in the process-local cache only.
+        """
+        size = len(json.dumps(result))
+        if size > self.max_result_bytes:
+            return
+        with self._lock:
+            previous = self._results.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._results[key] = (result, size)
+            self._size += size
+            while len(self._results) > self.max_entries or self._size > self.max_bytes:
+                __, (__, evicted_size) = self._results.popitem(last=False)
+                self._size -= evicted_size
+
+
+class ExecutionStats(object):
+    """
+    Per-problem counters of cache hits, misses and execution time.
+    """
+    def __init__(self, max_slugs):
+        self.max_slugs = max_slugs
+
+        # dict {slug: [hits, misses, execution seconds]}, least recently
+        # updated first.
+        self._counters = OrderedDict()
+        self._lock = Lock()
+
+    def record_hit(self, slug):
+        """
+        Count a result for `slug` that was served from the cache.
+        """
+        with self._lock:
+            self._get_counters(slug)[0] += 1
+
+    def record_execution(self, slug, seconds):
+        """
+        Count an execution for `slug` that took `seconds`.
+        """
+        with self._lock:
+            counters = self._get_counters(slug)
+            counters[1] += 1
+            counters[2] += seconds
+
+    def get(self, slug):
+        """
+        Return a dict of the statistics for `slug`.
+        """
+        with self._lock:
+            hits, misses, seconds = self._counters.get(slug, (0, 0, 0.0))
+        requests = hits + misses
+        return dict(
+            hits=hits,
+            misses=misses,
+            hit_rate=float(hits) / requests if requests else 0.0,
+            execution_time=seconds,
+            mean_execution_time=seconds / misses if misses else 0.0,
+        )
+
+    def get_all(self):
+        """
+        Return a dict of slug to statistics, for all the problems tracked.
+        """
+        with self._lock:
+            slugs = list(self._counters)
+        return {slug: self.get(slug) for slug in slugs}
+
+    def clear(self):
+        """
+        Forget all the statistics.
+        """
+        with self._lock:
+            self._counters.clear()
+
+    def _get_counters(self, slug):
+        """
+        Return the counters for `slug`, marking them as recently updated.
+        Must be called with the lock held.
+        """
+        counters = self._counters.pop(slug, None) or [0, 0, 0.0]
+        self._counters[slug] = counters
+        while len(self._counters) > self.max_slugs:
+            self._counters.popitem(last=False)
+        return counters
+
+
+RESULT_CACHE = ResultCache(LOCAL_CACHE_SIZE, LOCAL_CACHE_MAX_BYTES, LOCAL_CACHE_MAX_RESULT_BYTES)
+EXECUTION_STATS = ExecutionStats(STATS_SIZE)
@@ -4,9 +4,19 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from .result_cache import EXECUTION_STATS, RESULT_CACHE, make_cache_key, update_hash  # pylint: disable=unused-import
+from .worker_pool import WorkerUnavailable, get_worker_pool
 from six import text_type
 
-import hashlib
+import logging
+import time
+
+try:
+    from edx_django_utils.monitoring import accumulate, set_custom_metric
+except ImportError:
+    set_custom_metric = None  # pylint: disable=invalid-name
+
+log = logging.getLogger(__name__)
 
 # Establish the Python environment for Capa.
 # Capa assumes float-friendly division always.
@@ -50,29 +60,6 @@ for name, modname in ASSUMED_IMPORTS:
 LAZY_IMPORTS = "".join(LAZY_IMPORTS)
 
 
-def update_hash(hasher, obj):
-    """
-    Update a `hashlib` hasher with a nested object.
-
-    To properly cache nested structures, we need to compute a hash from the
-    entire structure, canonicalizing at every level.
-
-    `hasher`'s `.update()` method is called a number of times, touching all of
-    `obj` in the process.  Only primitive JSON-safe types are supported.
-
-    """
-    hasher.update(str(type(obj)))
-    if isinstance(obj, (tuple, list)):
-        for e in obj:
-            update_hash(hasher, e)
-    elif isinstance(obj, dict):
-        for k in sorted(obj):
-            update_hash(hasher, k)
-            update_hash(hasher, obj[k])
-    else:
-        hasher.update(repr(obj))
-
-
 def safe_exec(
     code,
     globals_dict,
@@ -101,7 +88,8 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    the random seed and the files available to the code.  Results are also kept in
+    a process-local cache in front of it.
 
     `slug` is an arbitrary string, a description that's meaningful to the
     caller, that will be used in log messages.
@@ -112,12 +100,11 @@ def safe_exec(
     # Check the cache for a previous result.
     if cache:
         safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
-        cached = cache.get(key)
+        key = make_cache_key(code, safe_globals, random_seed, python_path, extra_files)
+        cached = RESULT_CACHE.get(key, cache)
         if cached is not None:
+            EXECUTION_STATS.record_hit(slug)
+            _set_execution_metrics(cache_hit=True)
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
             emsg, cleaned_results = cached
@@ -134,24 +121,54 @@ def safe_exec(
         exec_fn = codejail_not_safe_exec
     else:
         exec_fn = codejail_safe_exec
+        pool = get_worker_pool()
+        if pool is not None and pool.can_run(python_path, extra_files):
+            exec_fn = pool.safe_exec
 
     # Run the code!  Results are side effects in globals_dict.
+    start_time = time.time()
     try:
         exec_fn(
             code_prolog + LAZY_IMPORTS + code, globals_dict,
             python_path=python_path, extra_files=extra_files, slug=slug,
         )
+    except WorkerUnavailable:
+        # The sandbox failed rather than the code, so the error isn't cached.
+        raise
     except SafeExecException as e:
         emsg = text_type(e)
     else:
         emsg = None
+    execution_time = time.time() - start_time
+    EXECUTION_STATS.record_execution(slug, execution_time)
+    _set_execution_metrics(cache_hit=False if cache else None, execution_time=execution_time)
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("safe_exec of %s took %.3fs: %r", slug, execution_time, EXECUTION_STATS.get(slug))
 
     # Put the result back in the cache.  This is complicated by the fact that
     # the globals dict might not be entirely serializable.
     if cache:
         cleaned_results = json_safe(globals_dict)
-        cache.set(key, (emsg, cleaned_results))
+        RESULT_CACHE.set(key, (emsg, cleaned_results), cache)
 
     # If an exception happened, raise it now.
     if emsg:
         raise e
+
+
+def _set_execution_metrics(cache_hit, execution_time=None):
+    """
+    Report whether the result came from the cache, and how long the execution
+    took, to the monitoring of the current request.
+
+    The hit rate over requests is the share of the safe_exec.cache_hits
+    metric in safe_exec.cache_hits plus safe_exec.cache_misses.
+    """
+    if not set_custom_metric:
+        return
+    if cache_hit is not None:
+        set_custom_metric('safe_exec.cache_hit', cache_hit)
+        accumulate('safe_exec.cache_hits' if cache_hit else 'safe_exec.cache_misses', 1)
+    if execution_time is not None:
+        accumulate('safe_exec.executions', 1)
+        accumulate('safe_exec.execution_time_ms', execution_time * 1000)
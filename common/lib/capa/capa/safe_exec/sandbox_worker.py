@@ -0,0 +1,227 @@
+"""
+The main loop of a pre-started sandbox worker, see worker_pool.py.
+
+This file is read and run by the sandboxed Python (as `python -c`), so it
+must only use the standard library.
+
+The worker imports the commonly used modules once, then reads execution
+requests from stdin.  Each request is run in a child process forked for it,
+so that executions can't see or change each other's state, and the child's
+CPU time, memory and file sizes are limited.  The worker itself never runs
+the requested code.
+
+Children run as the same user as the worker, so they are kept away from it
+as far as that allows: the worker is made non-dumpable, so that children
+can't trace it or open its memory through /proc, and each child runs in a
+session of its own.  A child can still signal the worker, so any abnormal
+exit of a child (killed, or exiting without a response) is reported, and
+the pool then replaces the worker rather than trusting it with later
+executions.
+
+Requests and responses are JSON objects, each preceded by its length as a
+4-byte big-endian integer.
+
+"""
+
+import base64
+import ctypes
+import ctypes.util
+import json
+import os
+import resource
+import select
+import shutil
+import signal
+import struct
+import sys
+import tempfile
+import time
+import traceback
+
+# Modules to import before forking, so that executions don't pay for them.
+PRELOAD_MODULES = ["numpy", "math", "random", "json"]
+
+LENGTH = struct.Struct("!I")
+
+# Map of codejail limit name to the resource limit it sets in the child.
+RLIMITS = {
+    "CPU": resource.RLIMIT_CPU,
+    "VMEM": resource.RLIMIT_AS,
+    "FSIZE": resource.RLIMIT_FSIZE,
+}
+
+PR_SET_DUMPABLE = 4
+
+# Exit statuses of a child which ran the code to the end, or to an exception.
+NORMAL_EXIT_STATUSES = (0, 1)
+
+JSONABLE_TYPES = (type(None), int, long, float, str, unicode, list, tuple, dict)  # pylint: disable=undefined-variable
+
+
+def read_message(stream):
+    """
+    Read a length-prefixed JSON message; return None at end of stream.
+    """
+    header = stream.read(LENGTH.size)
+    if len(header) < LENGTH.size:
+        return None
+    length, = LENGTH.unpack(header)
+    return json.loads(stream.read(length))
+
+
+def write_message(stream, message):
+    """
+    Write a length-prefixed JSON message.
+    """
+    data = json.dumps(message)
+    stream.write(LENGTH.pack(len(data)) + data)
+    stream.flush()
+
+
+def jsonable_globals(globals_dict):
+    """
+    Return the globals that can be sent back as JSON, like codejail does.
+    """
+    def jsonable(value):
+        if not isinstance(value, JSONABLE_TYPES):
+            return False
+        try:
+            json.dumps(value)
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return True
+
+    return {
+        key: value
+        for key, value in globals_dict.items()
+        if key != "__builtins__" and jsonable(value)
+    }
+
+
+def make_undumpable():
+    """
+    Keep processes of the same user from tracing this one or reading its
+    memory, where the platform supports it.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.prctl(PR_SET_DUMPABLE, 0, 0, 0, 0)
+    except (OSError, AttributeError):
+        pass
+
+
+def run_child(request, tmpdir, output_fd):
+    """
+    Run the request in the forked child, and write its output to output_fd.
+    Never returns.
+    """
+    status = 0
+    try:
+        # Signals sent to the worker's process group or session don't reach it.
+        os.setsid()
+
+        # The code can't read other requests or write responses.
+        devnull = os.open(os.devnull, os.O_RDWR)
+        os.dup2(devnull, 0)
+        os.dup2(devnull, 1)
+
+        for name, value in request["limits"].items():
+            if value and name in RLIMITS:
+                resource.setrlimit(RLIMITS[name], (value, value))
+        # Executions can't start processes of their own.
+        resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+
+        for filename, contents in request["extra_files"]:
+            with open(os.path.join(tmpdir, filename), "wb") as extra_file:
+                extra_file.write(base64.b64decode(contents))
+        os.chdir(tmpdir)
+        sys.path.extend(os.path.join(tmpdir, path) for path in request["python_path"])
+        sys.stdout = sys.__stdout__ = os.fdopen(1, "w")
+
+        # Run the code as UTF-8 bytes, like codejail runs the file it writes.
+        code = request["code"]
+        if isinstance(code, unicode):  # pylint: disable=undefined-variable
+            code = code.encode("utf-8")
+        globals_dict = request["globals"]
+        exec code in globals_dict  # pylint: disable=exec-used
+        output = json.dumps({"globals": jsonable_globals(globals_dict)})
+    except BaseException:  # pylint: disable=broad-except
+        status = 1
+        output = json.dumps({"stderr": traceback.format_exc()})
+
+    try:
+        while output:
+            output = output[os.write(output_fd, output):]
+    finally:
+        os._exit(status)  # pylint: disable=protected-access
+
+
+def run(request):
+    """
+    Run the request in a forked child and return the response.
+    """
+    tmpdir = tempfile.mkdtemp(prefix="codejail-")
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        run_child(request, tmpdir, write_fd)
+    os.close(write_fd)
+
+    # Collect the child's output, killing it if it runs too long.
+    realtime = request["limits"].get("REALTIME") or None
+    deadline = time.time() + realtime if realtime else None
+    chunks = []
+    killed = False
+    while True:
+        timeout = max(deadline - time.time(), 0) if deadline else None
+        ready, _, _ = select.select([read_fd], [], [], timeout)
+        if not ready:
+            os.kill(pid, signal.SIGKILL)
+            killed = True
+            break
+        chunk = os.read(read_fd, 65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    os.close(read_fd)
+    _, status = os.waitpid(pid, 0)
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+    if killed:
+        return {"status": -signal.SIGKILL, "stderr": "Killed after exceeding the real time limit.", "abnormal": True}
+    status = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    abnormal = status not in NORMAL_EXIT_STATUSES
+    try:
+        response = json.loads("".join(chunks))
+    except ValueError:
+        response = {"stderr": ""}
+        abnormal = True
+    response["status"] = status
+    response["abnormal"] = abnormal
+    return response
+
+
+def main():
+    """
+    Preload the common modules, then serve requests until stdin is closed.
+    """
+    make_undumpable()
+    for modname in PRELOAD_MODULES:
+        try:
+            __import__(modname)
+        except ImportError:
+            pass
+
+    stdin, stdout = sys.stdin, sys.stdout
+    # Keep prints from the modules out of the responses.
+    sys.stdout = sys.stderr
+    while True:
+        request = read_message(stdin)
+        if request is None:
+            break
+        write_message(stdout, run(request))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,9 +8,12 @@ import textwrap
 import unittest
 
 import pytest
+from mock import patch
 from six import text_type
 
-from capa.safe_exec import safe_exec, update_hash
+from capa.safe_exec import EXECUTION_STATS, RESULT_CACHE, safe_exec, update_hash
+from capa.safe_exec.result_cache import ResultCache, make_cache_key
+from capa.safe_exec.worker_pool import WorkerUnavailable
 from codejail.safe_exec import SafeExecException
 from codejail.jail_code import is_configured
 
@@ -111,6 +114,11 @@ class DictCache(object):
 class TestSafeExecCaching(unittest.TestCase):
     """Test that caching works on safe_exec."""
 
+    def setUp(self):
+        super(TestSafeExecCaching, self).setUp()
+        RESULT_CACHE.clear()
+        EXECUTION_STATS.clear()
+
     def test_cache_miss_then_hit(self):
         g = {}
         cache = {}
@@ -123,6 +131,7 @@ class TestSafeExecCaching(unittest.TestCase):
 
         # Fiddle with the cache, then try it again.
         cache[cache.keys()[0]] = (None, {'a': 17})
+        RESULT_CACHE.clear()
 
         g = {}
         safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
@@ -154,6 +163,7 @@ class TestSafeExecCaching(unittest.TestCase):
 
         # Change the value stored in the cache, the result should change.
         cache[cache.keys()[0]] = ("Hey there!", {})
+        RESULT_CACHE.clear()
 
         with self.assertRaises(SafeExecException):
             safe_exec(code, g, cache=DictCache(cache))
@@ -164,9 +174,21 @@ class TestSafeExecCaching(unittest.TestCase):
 
         # Change it again, now no exception!
         cache[cache.keys()[0]] = (None, {'a': 17})
+        RESULT_CACHE.clear()
         safe_exec(code, g, cache=DictCache(cache))
         self.assertEqual(g['a'], 17)
 
+    def test_sandbox_failures_arent_cached(self):
+        cache = {}
+        with patch('capa.safe_exec.safe_exec.codejail_safe_exec', side_effect=WorkerUnavailable("Broken pipe")):
+            with self.assertRaises(WorkerUnavailable):
+                safe_exec("a = 1", {}, cache=DictCache(cache))
+        self.assertEqual(cache, {})
+
+        g = {}
+        safe_exec("a = 1", g, cache=DictCache(cache))
+        self.assertEqual(g['a'], 1)
+
     def test_unicode_submission(self):
         # Check that using non-ASCII unicode does not raise an encoding error.
         # Try several non-ASCII unicode characters.
@@ -178,6 +200,69 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+    def test_local_cache(self):
+        # Results are served from the process-local cache first.
+        cache = {}
+        safe_exec("a = [int(math.pi)]", {}, cache=DictCache(cache), slug="problem")
+        cache.clear()
+
+        g = {}
+        safe_exec("a = [int(math.pi)]", g, cache=DictCache(cache), slug="problem")
+        self.assertEqual(g['a'], [3])
+        self.assertEqual(cache, {})
+
+        # Changing the results doesn't change what's cached.
+        g['a'].append(4)
+        g = {}
+        safe_exec("a = [int(math.pi)]", g, cache=DictCache(cache), slug="problem")
+        self.assertEqual(g['a'], [3])
+
+        stats = EXECUTION_STATS.get("problem")
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 1)
+        self.assertAlmostEqual(stats['hit_rate'], 2 / 3.0)
+
+    def test_local_cache_size_limit(self):
+        # The process-local cache is bounded by the serialized size of the results.
+        local_cache = ResultCache(max_entries=10, max_bytes=100, max_result_bytes=60)
+        local_cache.set("large", (None, {'a': "x" * 100}), DictCache({}))
+        local_cache.set("first", (None, {'a': "x" * 30}), DictCache({}))
+        local_cache.set("second", (None, {'a': "x" * 30}), DictCache({}))
+        local_cache.set("third", (None, {'a': "x" * 30}), DictCache({}))
+
+        empty_cache = DictCache({})
+        self.assertIsNone(local_cache.get("large", empty_cache))
+        self.assertIsNone(local_cache.get("first", empty_cache))
+        self.assertEqual(local_cache.get("third", empty_cache), (None, {'a': "x" * 30}))
+
+    @patch('capa.safe_exec.safe_exec.accumulate', create=True)
+    @patch('capa.safe_exec.safe_exec.set_custom_metric')
+    def test_execution_metrics(self, mock_set_custom_metric, mock_accumulate):
+        cache = DictCache({})
+        safe_exec("a = int(math.pi)", {}, cache=cache)
+        mock_set_custom_metric.assert_called_with('safe_exec.cache_hit', False)
+        mock_accumulate.assert_any_call('safe_exec.cache_misses', 1)
+
+        safe_exec("a = int(math.pi)", {}, cache=cache)
+        mock_set_custom_metric.assert_called_with('safe_exec.cache_hit', True)
+        mock_accumulate.assert_any_call('safe_exec.cache_hits', 1)
+        execution_times = [
+            call_args[0][1] for call_args in mock_accumulate.call_args_list
+            if call_args[0][0] == 'safe_exec.execution_time_ms'
+        ]
+        self.assertEqual(len(execution_times), 1)
+
+    def test_cache_key(self):
+        key = make_cache_key("a = b", {'b': 1, 'c': [1, 2]}, 17)
+        self.assertEqual(key, make_cache_key(u"a = b", {'c': [1, 2], 'b': 1}, 17))
+        self.assertNotEqual(key, make_cache_key("a = b", {'b': 1, 'c': [1, 2]}, 18))
+        self.assertNotEqual(key, make_cache_key("a = b", {'b': 1, 'c': [2, 1]}, 17))
+        self.assertNotEqual(
+            make_cache_key("a = b", {}, 17, ["python_lib.zip"], [("python_lib.zip", "one")]),
+            make_cache_key("a = b", {}, 17, ["python_lib.zip"], [("python_lib.zip", "two")]),
+        )
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
@@ -0,0 +1,134 @@
+"""Test worker_pool.py"""
+
+import os
+import signal
+import sys
+import unittest
+
+from codejail.jail_code import LIMITS
+from codejail.safe_exec import SafeExecException
+from mock import patch
+from six import text_type
+
+from capa.safe_exec.worker_pool import Worker, WorkerError, WorkerPool, WorkerUnavailable
+
+
+class TestWorkerPool(unittest.TestCase):
+    """
+    Test the sandbox worker pool, with the current Python as the sandbox.
+    """
+    def setUp(self):
+        super(TestWorkerPool, self).setUp()
+        self.pool = WorkerPool([sys.executable, "-E", "-B"], size=1, max_runs=3)
+        self.addCleanup(self.pool.shutdown)
+
+    def test_set_values(self):
+        g = {'b': 3}
+        self.pool.safe_exec("a = b * 2\nprint 'ignored'", g)
+        self.assertEqual(g, {'a': 6, 'b': 3})
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            self.pool.safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", text_type(cm.exception))
+
+        # The worker is still usable.
+        g = {}
+        self.pool.safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
+
+    def test_executions_are_isolated(self):
+        g = {}
+        self.pool.safe_exec("import math; math.leak = True", {})
+        self.pool.safe_exec("import math; a = hasattr(math, 'leak')", g)
+        self.assertFalse(g['a'])
+
+    def worker_pid(self):
+        """
+        Return the process id of the pool's only worker.
+        """
+        return self.pool._idle_workers.queue[0].process.pid  # pylint: disable=protected-access
+
+    def test_workers_are_replaced(self):
+        pids = []
+        for _ in range(4):
+            pids.append(self.worker_pid())
+            self.pool.safe_exec("a = 1", {})
+        self.assertEqual(len(set(pids[:3])), 1)
+        self.assertNotEqual(pids[2], pids[3])
+
+    def test_workers_are_replaced_after_abnormal_exits(self):
+        pid = self.worker_pid()
+        with self.assertRaises(SafeExecException):
+            self.pool.safe_exec("import os, signal; os.kill(os.getpid(), signal.SIGKILL)", {})
+        self.assertNotEqual(pid, self.worker_pid())
+
+        # Exceptions raised by the code are normal exits.
+        pid = self.worker_pid()
+        with self.assertRaises(SafeExecException):
+            self.pool.safe_exec("1/0", {})
+        self.assertEqual(pid, self.worker_pid())
+
+    def test_executions_run_in_their_own_session(self):
+        g = {}
+        self.pool.safe_exec("import os; a = os.getsid(0) == os.getsid(os.getppid())", g)
+        self.assertFalse(g['a'])
+
+    def test_non_ascii_code(self):
+        g = {}
+        self.pool.safe_exec(u"# \u00e9\na = len('\u00e9')", g)
+        self.assertEqual(g['a'], 2)
+
+    def test_realtime_limit(self):
+        with patch.dict(LIMITS, {'REALTIME': 1, 'CPU': 0}):
+            with self.assertRaises(SafeExecException) as cm:
+                self.pool.safe_exec("import time; time.sleep(10)", {})
+        self.assertIn("real time limit", text_type(cm.exception))
+
+    def test_extra_files(self):
+        self.assertTrue(self.pool.can_run(["lib.zip"], [("lib.zip", "")]))
+        self.assertFalse(self.pool.can_run(["lib"], []))
+
+        g = {}
+        self.pool.safe_exec(
+            "import constant; a = constant.THE_CONST",
+            g, python_path=["lib"], extra_files=[("constant.py", "THE_CONST = 23\n")],
+        )
+        self.assertEqual(g['a'], 23)
+
+    def test_idle_workers_which_exited_are_replaced(self):
+        pid = self.worker_pid()
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+
+        g = {}
+        self.pool.safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
+        self.assertNotEqual(pid, self.worker_pid())
+
+    def test_failed_executions_are_retried_on_a_new_worker(self):
+        pid = self.worker_pid()
+        with patch.object(Worker, "run", side_effect=[WorkerError("Broken pipe"), {"status": 0, "globals": {"a": 1}}]):
+            g = {}
+            self.pool.safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
+        self.assertNotEqual(pid, self.worker_pid())
+
+        with patch.object(Worker, "run", side_effect=WorkerError("Broken pipe")) as mock_run:
+            with self.assertRaises(WorkerUnavailable):
+                self.pool.safe_exec("a = 1", {})
+        self.assertEqual(mock_run.call_count, 2)
+
+    def test_slots_are_kept_when_workers_cant_start(self):
+        command = self.pool.command
+        self.pool.command = ["/nonexistent/python"]
+        with patch.object(Worker, "run", side_effect=WorkerError("Broken pipe")):
+            with self.assertRaises(WorkerUnavailable):
+                self.pool.safe_exec("a = 1", {})
+        self.assertEqual(self.pool._idle_workers.queue[0], None)  # pylint: disable=protected-access
+
+        # The worker is started once it can be.
+        self.pool.command = command
+        g = {}
+        self.pool.safe_exec("a = 1", g)
+        self.assertEqual(g['a'], 1)
@@ -0,0 +1,298 @@
+"""
+A pool of pre-started codejail sandbox workers.
+
+Running code with codejail starts a new sandboxed Python for every
+execution, which then has to import numpy and the other modules problems
+use.  The workers of this pool are sandboxed Pythons started once, with
+those modules already imported.  Each execution is run in a process forked
+by a worker for it (see sandbox_worker.py), so executions are still isolated
+from each other and limited by the codejail limits.
+
+Workers are replaced after a number of executions, when anything goes
+wrong with them, and after any abnormal exit of an execution's process,
+since the code it ran may have tampered with the worker.  A worker which
+died while idle is replaced before it is used, and an execution whose
+worker fails is retried once on a new one.  When no worker can run it,
+WorkerUnavailable is raised: the sandbox failed rather than the code, so
+safe_exec doesn't cache that error.
+
+"""
+import base64
+import json
+import logging
+import os
+import select
+import struct
+import subprocess
+import threading
+import time
+from Queue import Empty, Queue
+
+from codejail import jail_code
+from codejail.safe_exec import json_safe, SafeExecException
+
+from . import sandbox_worker
+
+log = logging.getLogger(__name__)
+
+# How many seconds, beyond the real time limit, to wait for a worker to
+# answer before giving up on it.
+RESPONSE_GRACE_PERIOD = 5
+
+# How many seconds to wait for an idle worker.
+WORKER_WAIT_TIMEOUT = 30
+
+# How many workers to try an execution on.
+WORKER_ATTEMPTS = 2
+
+# The source run by the workers.
+sandbox_worker_py_file = sandbox_worker.__file__
+if sandbox_worker_py_file.endswith("c"):
+    sandbox_worker_py_file = sandbox_worker_py_file[:-1]
+
+SANDBOX_WORKER_PY = open(sandbox_worker_py_file).read()
+
+
+class WorkerError(Exception):
+    """
+    A worker failed, rather than the code it was running.
+    """
+    pass
+
+
+class WorkerUnavailable(SafeExecException):
+    """
+    No worker of the pool could run the code.
+    """
+    pass
+
+
+class Worker(object):
+    """
+    A pre-started sandboxed Python, running sandbox_worker.py.
+    """
+    def __init__(self, command):
+        self.runs = 0
+        self.process = subprocess.Popen(
+            command + ["-c", SANDBOX_WORKER_PY],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=open(os.devnull, "w"),
+            close_fds=True,
+        )
+
+    def run(self, request, timeout):
+        """
+        Send the request to the worker and return its response.
+
+        Raise WorkerError if the worker doesn't answer within `timeout`
+        seconds, or at all.
+        """
+        self.runs += 1
+        data = json.dumps(request)
+        try:
+            self.process.stdin.write(sandbox_worker.LENGTH.pack(len(data)) + data)
+            self.process.stdin.flush()
+            header = self._read(sandbox_worker.LENGTH.size, timeout)
+            length, = sandbox_worker.LENGTH.unpack(header)
+            return json.loads(self._read(length, timeout))
+        except (IOError, OSError, ValueError, struct.error) as error:
+            raise WorkerError(error)
+
+    def stop(self):
+        """
+        Stop the worker.
+        """
+        try:
+            self.process.kill()
+            self.process.wait()
+        except OSError:
+            pass
+
+    def _read(self, size, timeout):
+        """
+        Read `size` bytes of the worker's output.
+        """
+        deadline = time.time() + timeout
+        chunks = []
+        while size:
+            ready, _, _ = select.select([self.process.stdout], [], [], max(deadline - time.time(), 0))
+            if not ready:
+                raise WorkerError("Timed out waiting for the sandbox worker.")
+            chunk = os.read(self.process.stdout.fileno(), size)
+            if not chunk:
+                raise WorkerError("The sandbox worker exited.")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return "".join(chunks)
+
+
+class WorkerPool(object):
+    """
+    A fixed-size pool of Workers, usable in place of codejail's safe_exec.
+    """
+    def __init__(self, command, size, max_runs):
+        """
+        `command` is the command line starting the sandboxed Python.
+
+        `size` is the number of workers, and `max_runs` the number of
+        executions after which a worker is replaced.
+        """
+        self.command = command
+        self.size = size
+        self.max_runs = max_runs
+        self._idle_workers = Queue()
+        for _ in range(size):
+            self._idle_workers.put(Worker(command))
+
+    def can_run(self, python_path=None, extra_files=None):
+        """
+        Return whether the pool can run code with the given python path and
+        extra files.  Only python path entries that are extra files are
+        supported; other ones have to be copied in by codejail.
+        """
+        filenames = set(filename for filename, _ in extra_files or [])
+        return all(path in filenames for path in python_path or [])
+
+    def safe_exec(self, code, globals_dict, python_path=None, extra_files=None, slug=None):
+        """
+        Execute code like `codejail.safe_exec.safe_exec` does, in one of the
+        pool's workers.
+        """
+        request = {
+            "code": code,
+            "globals": json_safe(globals_dict),
+            "python_path": list(python_path or []),
+            "extra_files": [
+                (filename, base64.b64encode(contents))
+                for filename, contents in extra_files or []
+            ],
+            "limits": dict(jail_code.LIMITS),
+        }
+        timeout = (request["limits"].get("REALTIME") or 0) + RESPONSE_GRACE_PERIOD
+
+        for _ in range(WORKER_ATTEMPTS):
+            worker = self._take_worker()
+            try:
+                response = worker.run(request, timeout)
+            except WorkerError as error:
+                log.warning("Sandbox worker failed running %s: %s", slug, error)
+                self._replace(worker)
+                worker_error = error
+            except Exception:
+                self._replace(worker)
+                raise
+            else:
+                break
+        else:
+            raise WorkerUnavailable("Couldn't execute jailed code: {}".format(worker_error))
+
+        if response.get("abnormal"):
+            log.warning("Replacing the sandbox worker after an abnormal exit running %s", slug)
+            self._replace(worker)
+        elif worker.runs >= self.max_runs:
+            self._replace(worker)
+        else:
+            self._idle_workers.put(worker)
+
+        if response["status"] != 0:
+            raise SafeExecException((
+                "Couldn't execute jailed code: stderr: {stderr!r} with status code: {status}"
+            ).format(**response))
+        globals_dict.update(response["globals"])
+
+    def shutdown(self):
+        """
+        Stop all the idle workers.
+        """
+        while not self._idle_workers.empty():
+            worker = self._idle_workers.get()
+            if worker is not None:
+                worker.stop()
+
+    def _take_worker(self):
+        """
+        Take an idle worker out of the pool, starting a new one in place of
+        one which exited or couldn't be started.
+
+        Raise WorkerUnavailable if no worker is idle within
+        WORKER_WAIT_TIMEOUT seconds, or none can be started.
+        """
+        try:
+            worker = self._idle_workers.get(timeout=WORKER_WAIT_TIMEOUT)
+        except Empty:
+            raise WorkerUnavailable("Couldn't execute jailed code: no sandbox worker is available.")
+
+        if worker is not None and worker.process.poll() is None:
+            return worker
+        if worker is not None:
+            log.warning("Replacing a sandbox worker which exited while idle")
+            worker.stop()
+
+        try:
+            return Worker(self.command)
+        except OSError as error:
+            self._idle_workers.put(None)
+            raise WorkerUnavailable("Couldn't start a sandbox worker: {}".format(error))
+
+    def _replace(self, worker):
+        """
+        Stop the worker and add a new one to the pool in its place.  The
+        slot is given back even if the new worker can't be started, leaving
+        it to be started when the slot is next taken.
+        """
+        worker.stop()
+        new_worker = None
+        try:
+            new_worker = Worker(self.command)
+        except OSError as error:
+            log.error("Couldn't start a sandbox worker: %s", error)
+        finally:
+            self._idle_workers.put(new_worker)
+
+
+# The pool configuration set by `configure`, and the pool for this process.
+POOL_SIZE = 0
+MAX_RUNS = 100
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def configure(size, max_runs=MAX_RUNS):
+    """
+    Configure the worker pool.  A size of 0 disables it.
+    """
+    global POOL_SIZE, MAX_RUNS  # pylint: disable=global-statement
+    POOL_SIZE, MAX_RUNS = size, max_runs
+
+
+def get_worker_pool():
+    """
+    Return the worker pool of this process, or None if there is none.
+
+    There is no pool unless one is configured and codejail is configured to
+    run Python.  Pools aren't shared with forked processes.
+    """
+    global _pool, _pool_pid  # pylint: disable=global-statement
+    if not POOL_SIZE or not jail_code.is_configured("python"):
+        return None
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = WorkerPool(get_sandbox_command(), POOL_SIZE, MAX_RUNS)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def get_sandbox_command():
+    """
+    Return the command line codejail uses to start the sandboxed Python.
+    """
+    command_info = jail_code.COMMANDS["python"]
+    command = []
+    if command_info.get("user"):
+        command.extend(["sudo", "-u", command_info["user"]])
+    command.extend(command_info["cmdline_start"])
+    return command
@@ -6,6 +6,7 @@ In this way, courses can be served up via either SplitMongoModuleStore or MongoM
 """
 
 import logging
+from collections import OrderedDict
 from contextlib import contextmanager
 import itertools
 import functools
@@ -395,6 +396,63 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         except ItemNotFoundError:
             return None
 
+    @strip_key
+    def get_courses_by_keys(self, course_keys, depth=0, **kwargs):
+        """
+        Returns a dict of course_key to the course module associated with it, or
+        None if no such course exists.
+
+        The courses of each modulestore are fetched together where the modulestore
+        supports it (see SplitMongoModuleStore.get_courses_by_keys), rather than
+        one by one.
+
+        :param course_keys: must be CourseKeys
+        """
+        courses = {}
+        keys_by_store = OrderedDict()
+        unmapped_keys = []
+        for course_key in course_keys:
+            assert isinstance(course_key, CourseKey)
+            store = self.mappings.get(self._clean_locator_for_mapping(course_key))
+            if store is None:
+                unmapped_keys.append(course_key)
+            else:
+                keys_by_store.setdefault(store, []).append(course_key)
+
+        for store, store_keys in keys_by_store.iteritems():
+            courses.update(self._get_courses_from_store(store, store_keys, depth, **kwargs))
+
+        # Look for the other courses in each store in turn, like _get_modulestore_for_courselike
+        for store in self.modulestores:
+            if not unmapped_keys:
+                break
+            found = self._get_courses_from_store(store, unmapped_keys, depth, **kwargs)
+            for course_key in found:
+                self.mappings[self._clean_locator_for_mapping(course_key)] = store
+            courses.update(found)
+            unmapped_keys = [course_key for course_key in unmapped_keys if course_key not in found]
+
+        for course_key in course_keys:
+            courses.setdefault(course_key, None)
+        return courses
+
+    def _get_courses_from_store(self, store, course_keys, depth, **kwargs):
+        """
+        Returns a dict of course_key to course module for the given courses which exist in store.
+        """
+        if hasattr(store, 'get_courses_by_keys'):
+            return store.get_courses_by_keys(course_keys, depth=depth, **kwargs)
+
+        courses = {}
+        for course_key in course_keys:
+            try:
+                course = store.get_course(course_key, depth=depth, **kwargs)
+            except ItemNotFoundError:
+                continue
+            if course is not None:
+                courses[course_key] = course
+        return courses
+
     @strip_key
     @contract(library_key='LibraryLocator')
     def get_library(self, library_key, depth=0, **kwargs):
@@ -626,6 +684,17 @@ class MixedModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase):
         store = self._get_modulestore_for_courselike(course_key)
         return store.get_orphans(course_key, **kwargs)
 
+    @strip_key
+    def get_block_keys_changed_since(self, course_key, version_guid, **kwargs):
+        """
+        Get the usage keys of the blocks in the given course that were added or changed since the
+        given version of the course, or None if that version is not found.
+
+        Raises NotImplementedError if the course's modulestore does not keep version history.
+        """
+        store = self._verify_modulestore_support(course_key, 'get_block_keys_changed_since')
+        return store.get_block_keys_changed_since(course_key, version_guid, **kwargs)
+
     def get_errored_courses(self):
         """
         Return a dictionary of course_dir -> [(msg, exception_str)], for each
@@ -12,7 +12,7 @@ structure:
 }
 """
 
-import copy
+from collections import Mapping
 from datetime import datetime
 from importlib import import_module
 import logging
@@ -528,6 +528,76 @@ class ParentLocationCache(dict):
             del self[key]
 
 
+class InheritedMetadata(Mapping):
+    """
+    The metadata a block inherits, as stored in the metadata inheritance tree.
+
+    Rather than copying its parent's metadata, it refers to it: it holds the
+    settings a container sets itself, and falls back to what the container
+    inherits (another InheritedMetadata, or None for the course).  All the
+    blocks under a container share the chain above it, so each level of the
+    course is only stored once.  The chain is never changed in place; updates
+    replace the InheritedMetadata of the changed containers.
+
+    It also holds the block's 'parent' entry ({branch: parent url}), which
+    isn't inherited.
+    """
+    def __init__(self, settings, inherited=None, parent=None):
+        self._settings = settings
+        self._inherited = inherited
+        self._parent = parent
+
+    def with_parent(self, parent):
+        """
+        Return the same inherited metadata, with the given 'parent' entry.
+        """
+        return InheritedMetadata(self._settings, self._inherited, parent)
+
+    def with_settings(self, settings):
+        """
+        Return the inherited metadata with the container's own settings replaced.
+        """
+        return InheritedMetadata(settings, self._inherited, self._parent)
+
+    def __getitem__(self, key):
+        if key == 'parent':
+            if self._parent is None:
+                raise KeyError(key)
+            return self._parent
+        node = self
+        while node is not None:
+            if key in node._settings:
+                return node._settings[key]
+            node = node._inherited
+        raise KeyError(key)
+
+    def __reduce__(self):
+        # Keep pickles (as cached by the metadata_inheritance_cache_subsystem) small.
+        return (InheritedMetadata, (self._settings, self._inherited, self._parent))
+
+    def __iter__(self):
+        return iter(self.copy())
+
+    def __len__(self):
+        return len(self.copy())
+
+    def copy(self):
+        """
+        Return the metadata as a dict.
+        """
+        chain = []
+        node = self
+        while node is not None:
+            chain.append(node._settings)
+            node = node._inherited
+        metadata = {}
+        for settings in reversed(chain):
+            metadata.update(settings)
+        if self._parent is not None:
+            metadata['parent'] = self._parent
+        return metadata
+
+
 class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, MongoBulkOpsMixin):
     """
     A Mongodb backed ModuleStore
@@ -686,6 +756,29 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         Find all inheritable fields from all xblocks in the course which may define inheritable data
         '''
         # get all collections in the course, this query should not return any leaf nodes
+        results_by_url = self._get_inheritable_metadata(course_id)
+
+        # it's ok to keep these as deprecated strings b/c the overall cache is indexed by course_key and this
+        # is a dictionary relative to that course
+        root = None
+        for location_url, result in results_by_url.iteritems():
+            if result['_id']['category'] == 'course':
+                root = location_url
+
+        # now traverse the tree and compute down the inherited metadata
+        metadata_to_inherit = {}
+        if root is not None:
+            self._compute_inherited_metadata(
+                results_by_url, root, InheritedMetadata(results_by_url[root].get('metadata', {})), metadata_to_inherit
+            )
+
+        return metadata_to_inherit
+
+    def _get_inheritable_metadata(self, course_id, block_ids=None):
+        """
+        Return the location, children, and inheritable metadata of the containers
+        in the course (or only of those with the given block ids), by location url.
+        """
         course_id = self.fill_in_run(course_id)
         query = SON([
             ('_id.tag', 'i4x'),
@@ -693,6 +786,8 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             ('_id.course', course_id.course),
             ('_id.category', {'$in': BLOCK_TYPES_WITH_CHILDREN})
         ])
+        if block_ids is not None:
+            query['_id.name'] = {'$in': list(block_ids)}
         # if we're only dealing in the published branch, then only get published containers
         if self.get_branch_setting() == ModuleStoreEnum.Branch.published_only:
             query['_id.revision'] = None
@@ -707,10 +802,7 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
         # call out to the DB
         resultset = self.collection.find(query, record_filter)
 
-        # it's ok to keep these as deprecated strings b/c the overall cache is indexed by course_key and this
-        # is a dictionary relative to that course
         results_by_url = {}
-        root = None
 
         # now go through the results and order them by the location url
         for result in resultset:
@@ -729,41 +821,88 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 results_by_url[location_url].setdefault('definition', {})['children'] = set(total_children)
             else:
                 results_by_url[location_url] = result
-            if location.block_type == 'course':
-                root = location_url
 
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
+        return results_by_url
 
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
-
-            # go through all the children and recurse, but only if we have
-            # in the result set. Remember results will not contain leaf nodes
-            for child in results_by_url[url].get('definition', {}).get('children', []):
-                if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
-                else:
-                    # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata.copy()
-                # WARNING: 'parent' is not part of inherited metadata, but
-                # we're piggybacking on this recursive traversal to grab
-                # and cache the child's parent, as a performance optimization.
-                # The 'parent' key will be popped out of the dictionary during
-                # CachingDescriptorSystem.load_item
-                metadata_to_inherit[child].setdefault('parent', {})[self.get_branch_setting()] = url
+    def _compute_inherited_metadata(self, results_by_url, url, my_metadata, metadata_to_inherit):
+        """
+        Compute the inherited metadata of the descendants of the container at
+        url, whose own metadata is my_metadata, into metadata_to_inherit.
+        """
+        # 'parent' is not part of inherited metadata, but we're piggybacking
+        # on this traversal to grab and cache the child's parent, as a
+        # performance optimization.
+        parent = {self.get_branch_setting(): url}
 
-        if root is not None:
-            _compute_inherited_metadata(root)
+        # go through all the children and recurse, but only if we have
+        # in the result set. Remember results will not contain leaf nodes
+        for child in results_by_url[url].get('definition', {}).get('children', []):
+            if child in results_by_url:
+                metadata_to_inherit[child] = InheritedMetadata(
+                    results_by_url[child].get('metadata', {}), my_metadata, parent
+                )
+                self._compute_inherited_metadata(
+                    results_by_url, child, metadata_to_inherit[child], metadata_to_inherit
+                )
+            else:
+                # this is likely a leaf node, so let's record what metadata we need to inherit
+                metadata_to_inherit[child] = my_metadata.with_parent(parent)
+
+    def _update_metadata_inheritance_tree(self, course_id, tree, location):
+        """
+        Return a copy of the metadata inheritance tree, updated for a change to the
+        block at location: only the metadata inherited by its descendants is
+        recomputed.  Return None if the tree can't be updated that way.
+        """
+        url = unicode(as_published(location))
+        if location.block_type not in BLOCK_TYPES_WITH_CHILDREN:
+            # Only containers pass metadata down.
+            return tree
+        if url not in tree:
+            # The course itself (which isn't in the tree), or an orphan.
+            return None if location.block_type == 'course' else tree
+
+        my_metadata = tree[url]
+        branch = self.get_branch_setting()
+        if not isinstance(my_metadata, InheritedMetadata) or branch not in my_metadata.get('parent', {}):
+            # The tree was computed in a different way, or for another branch.
+            return None
 
-        return metadata_to_inherit
+        # The descendants of location in the current tree.
+        children_by_url = {}
+        for child_url, child_metadata in tree.iteritems():
+            parent_url = child_metadata.get('parent', {}).get(branch)
+            if parent_url is not None:
+                children_by_url.setdefault(parent_url, []).append(child_url)
+        old_descendants = set()
+        to_visit = [url]
+        while to_visit:
+            for child_url in children_by_url.get(to_visit.pop(), []):
+                if child_url not in old_descendants:
+                    old_descendants.add(child_url)
+                    to_visit.append(child_url)
+
+        # Get the containers under location, one level at a time.
+        results_by_url = {}
+        block_ids = [location.block_id]
+        while block_ids:
+            level = self._get_inheritable_metadata(course_id, block_ids)
+            results_by_url.update(level)
+            block_ids = set(
+                UsageKey.from_string(child_url).block_id
+                for result in level.itervalues()
+                for child_url in result.get('definition', {}).get('children', [])
+                if child_url not in results_by_url
+            )
+        if url not in results_by_url:
+            return None
+
+        tree = dict(tree)
+        for descendant_url in old_descendants:
+            del tree[descendant_url]
+        tree[url] = my_metadata.with_settings(results_by_url[url].get('metadata', {}))
+        self._compute_inherited_metadata(results_by_url, url, tree[url], tree)
+        return tree
 
     def _get_cached_metadata_inheritance_tree(self, course_id, force_refresh=False):
         '''
@@ -793,10 +932,20 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             # now write out computed tree to caching subsystem (e.g. memcached), if available
             if self.metadata_inheritance_cache_subsystem is not None:
                 self.metadata_inheritance_cache_subsystem.set(unicode(course_id), tree)
+                # incremental updates of the previous tree in progress must not overwrite this one
+                self._bump_metadata_inheritance_tree_version(course_id)
 
         # now populate a request_cache, if available. NOTE, we are outside of the
         # scope of the above if: statement so that after a memcache hit, it'll get
         # put into the request_cache
+        self._set_request_cached_metadata_inheritance_tree(course_id, tree)
+
+        return tree
+
+    def _set_request_cached_metadata_inheritance_tree(self, course_id, tree):
+        """
+        Put the metadata inheritance tree of the course into the request cache, if available.
+        """
         if self.request_cache is not None:
             # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
             # defined
@@ -804,20 +953,88 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
                 self.request_cache.data['metadata_inheritance'] = {}
             self.request_cache.data['metadata_inheritance'][unicode(course_id)] = tree
 
-        return tree
+    def _get_metadata_inheritance_tree_version(self, course_id):
+        """
+        Return the version of the course's tree in the caching subsystem, or None
+        if the caching subsystem can't keep versions.
+        """
+        cache = self.metadata_inheritance_cache_subsystem
+        if cache is None or not hasattr(cache, 'incr'):
+            return None
+        version_key = u'{}.version'.format(course_id)
+        cache.add(version_key, 0)
+        return cache.get(version_key)
+
+    def _bump_metadata_inheritance_tree_version(self, course_id):
+        """
+        Increment the version of the course's tree in the caching subsystem, and
+        return the new version, or None if it can't be incremented.
+        """
+        try:
+            return self.metadata_inheritance_cache_subsystem.incr(u'{}.version'.format(course_id))
+        except (AttributeError, ValueError):
+            return None
+
+    def _get_incrementally_updated_metadata_inheritance_tree(self, course_id, location):
+        """
+        Update the cached metadata inheritance tree of the course for a change to
+        the block at location, recomputing only the part of the tree under it.
+
+        Return the updated tree, or None if there's no cached tree to update or
+        it can't be updated incrementally.
 
-    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None):
+        The tree in the caching subsystem is shared with other processes, so it is
+        read again rather than taken from the request cache, and written back only
+        if its version didn't change meanwhile.  The version is incremented before
+        and after the write: any other write of the tree in between changes it,
+        and its writer or this one then recomputes the whole tree.
+        """
+        course_id = self.fill_in_run(course_id)
+        cache = self.metadata_inheritance_cache_subsystem
+        if cache is not None:
+            # The version has to be read before the tree.
+            version = self._get_metadata_inheritance_tree_version(course_id)
+            if version is None:
+                return None
+            tree = cache.get(unicode(course_id), {})
+        elif self.request_cache is not None:
+            tree = self.request_cache.data.get('metadata_inheritance', {}).get(unicode(course_id))
+        else:
+            tree = None
+        if not tree:
+            return None
+
+        updated_tree = self._update_metadata_inheritance_tree(course_id, tree, location)
+        if updated_tree is None:
+            return None
+        if updated_tree is not tree and cache is not None:
+            if self._bump_metadata_inheritance_tree_version(course_id) != version + 1:
+                return None
+            cache.set(unicode(course_id), updated_tree)
+            if self._bump_metadata_inheritance_tree_version(course_id) != version + 2:
+                return None
+        self._set_request_cached_metadata_inheritance_tree(course_id, updated_tree)
+        return updated_tree
+
+    def refresh_cached_metadata_inheritance_tree(self, course_id, runtime=None, location=None):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
         for location
 
         If given a runtime, it replaces the cached_metadata in that runtime. NOTE: failure to provide
         a runtime may mean that some objects report old values for inherited data.
+
+        If given the location of the changed block, only the part of the cached tree
+        under that block is recomputed, when possible.
         """
         course_id = course_id.for_branch(None)
         if not self._is_in_bulk_operation(course_id):
-            # below is done for side effects when runtime is None
-            cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
+            cached_metadata = None
+            if location is not None:
+                cached_metadata = self._get_incrementally_updated_metadata_inheritance_tree(course_id, location)
+            if cached_metadata is None:
+                # below is done for side effects when runtime is None
+                cached_metadata = self._get_cached_metadata_inheritance_tree(course_id, force_refresh=True)
             if runtime:
                 runtime.cached_metadata = cached_metadata
 
@@ -1565,7 +1782,9 @@ class MongoModuleStore(ModuleStoreDraftAndPublished, ModuleStoreWriteBase, Mongo
             xblock._edit_info = payload['edit_info']
 
             # recompute (and update) the metadata inheritance tree which is cached
-            self.refresh_cached_metadata_inheritance_tree(xblock.scope_ids.usage_id.course_key, xblock.runtime)
+            self.refresh_cached_metadata_inheritance_tree(
+                xblock.scope_ids.usage_id.course_key, xblock.runtime, xblock.scope_ids.usage_id
+            )
             # fire signal that we've written to DB
         except ItemNotFoundError:
             if not allow_not_found:
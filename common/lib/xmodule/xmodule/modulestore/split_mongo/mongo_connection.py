@@ -26,7 +26,7 @@ from contracts import check, new_contract
 from mongodb_proxy import autoretry_read
 from xmodule.exceptions import HeartbeatFailure
 from xmodule.modulestore import BlockData
-from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo import BlockKey, structure_encoding
 from xmodule.mongo_utils import connect_to_mongodb, create_collection_index
 
 
@@ -206,11 +206,21 @@ def structure_to_mongo(structure, course_context=None):
 class CourseStructureCache(object):
     """
     Wrapper around django cache object to cache course structure objects.
-    The course structures are pickled and compressed when cached.
+    The course structures are cached in the compact encoding of
+    structure_encoding.  Encodings too large for a single cache entry are
+    split into chunks, each cached under its own key, and the entry for the
+    structure lists how many chunks there are.
 
     If the 'course_structure_cache' doesn't exist, then don't do anything for
     for set and get.
     """
+    # Keep entries under memcached's default 1MB item size limit, leaving
+    # room for the key and memcached's overhead.
+    MAX_CHUNK_SIZE = 1000 * 1000 - 50 * 1000
+
+    # Prefix of the entry listing the chunks of a chunked structure.
+    CHUNKED_MAGIC = 'SCS-chunks:'
+
     def __init__(self):
         self.cache = None
         if DJANGO_AVAILABLE:
@@ -220,41 +230,139 @@ class CourseStructureCache(object):
                 pass
 
     def get(self, key, course_context=None):
-        """Pull the compressed, pickled struct data from cache and deserialize."""
+        """Pull the encoded struct data from cache and decode it."""
         if self.cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
-            compressed_pickled_data = self.cache.get(key)
-            tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
+            entry = self.cache.get(key)
+            data = self._join_chunks({} if entry is None else {key: entry}, tagger).get(key)
+            tagger.tag(from_cache=str(data is not None).lower())
 
-            if compressed_pickled_data is None:
+            if data is None:
                 # Always log cache misses, because they are unexpected
                 tagger.sample_rate = 1
                 return None
 
-            tagger.measure('compressed_size', len(compressed_pickled_data))
+            tagger.measure('encoded_size', len(data))
+
+            start = time()
+            structure = self._decode(data)
+            tagger.measure('decode_time_ms', (time() - start) * 1000)
+
+            return structure
 
-            pickled_data = zlib.decompress(compressed_pickled_data)
-            tagger.measure('uncompressed_size', len(pickled_data))
+    def get_many(self, keys, course_context=None):
+        """
+        Pull the encoded data of several structs from cache and decode them.
+        Returns a dict of key to structure, for the keys which are cached.
+        """
+        if self.cache is None:
+            return {}
 
-            return pickle.loads(pickled_data)
+        with TIMER.timer("CourseStructureCache.get_many", course_context) as tagger:
+            tagger.measure('requested', len(keys))
+            data_by_key = self._join_chunks(self.cache.get_many(keys), tagger)
+            tagger.measure('found', len(data_by_key))
+            if len(data_by_key) < len(keys):
+                # Always log cache misses, because they are unexpected
+                tagger.sample_rate = 1
+
+            tagger.measure('encoded_size', sum(len(data) for data in data_by_key.itervalues()))
+
+            start = time()
+            structures = {key: self._decode(data) for key, data in data_by_key.iteritems()}
+            tagger.measure('decode_time_ms', (time() - start) * 1000)
+
+            return structures
 
     def set(self, key, structure, course_context=None):
-        """Given a structure, will pickle, compress, and write to cache."""
+        """Given a structure, will encode it and write it to cache."""
         if self.cache is None:
             return None
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
-            pickled_data = pickle.dumps(structure, pickle.HIGHEST_PROTOCOL)
-            tagger.measure('uncompressed_size', len(pickled_data))
-
-            # 1 = Fastest (slightly larger results)
-            compressed_pickled_data = zlib.compress(pickled_data, 1)
-            tagger.measure('compressed_size', len(compressed_pickled_data))
+            entries = self._encode(key, structure, tagger)
 
             # Stuctures are immutable, so we set a timeout of "never"
-            self.cache.set(key, compressed_pickled_data, None)
+            entry = entries.pop(key)
+            if entries:
+                self.cache.set_many(entries, None)
+            # Set last, so that the chunks are there when the structure is found.
+            self.cache.set(key, entry, None)
+
+    def set_many(self, structures, course_context=None):
+        """Given a dict of key to structure, will encode them and write them to cache."""
+        if self.cache is None or not structures:
+            return None
+
+        with TIMER.timer("CourseStructureCache.set_many", course_context) as tagger:
+            entries = {}
+            for key, structure in structures.iteritems():
+                entries.update(self._encode(key, structure, tagger))
+
+            # Structures whose chunks aren't all set yet are read as misses.
+            self.cache.set_many(entries, None)
+
+    def _encode(self, key, structure, tagger):
+        """
+        Return the dict of cache key to entry to cache for the structure.
+        """
+        start = time()
+        data = structure_encoding.encode_structure(structure)
+        tagger.measure('encode_time_ms', (time() - start) * 1000)
+        tagger.measure('encoded_size', len(data))
+
+        if len(data) <= self.MAX_CHUNK_SIZE:
+            return {key: data}
+
+        chunk_count = int(math.ceil(float(len(data)) / self.MAX_CHUNK_SIZE))
+        tagger.measure('chunks', chunk_count)
+        entries = {
+            chunk_key: data[index * self.MAX_CHUNK_SIZE:(index + 1) * self.MAX_CHUNK_SIZE]
+            for index, chunk_key in enumerate(self._chunk_keys(key, chunk_count))
+        }
+        entries[key] = '{}{}'.format(self.CHUNKED_MAGIC, chunk_count)
+        return entries
+
+    def _join_chunks(self, entries, tagger):
+        """
+        Given a dict of key to cached entry, return a dict of key to encoded
+        structure, getting the chunks of chunked structures.  Structures with
+        any chunk missing are left out.
+        """
+        data_by_key = {}
+        chunk_keys_by_key = {}
+        for key, entry in entries.iteritems():
+            if entry.startswith(self.CHUNKED_MAGIC):
+                chunk_count = int(entry[len(self.CHUNKED_MAGIC):])
+                tagger.measure('chunks', chunk_count)
+                chunk_keys_by_key[key] = self._chunk_keys(key, chunk_count)
+            else:
+                data_by_key[key] = entry
+
+        if chunk_keys_by_key:
+            chunks = self.cache.get_many([
+                chunk_key for chunk_keys in chunk_keys_by_key.itervalues() for chunk_key in chunk_keys
+            ])
+            for key, chunk_keys in chunk_keys_by_key.iteritems():
+                if all(chunk_key in chunks for chunk_key in chunk_keys):
+                    data_by_key[key] = ''.join(chunks[chunk_key] for chunk_key in chunk_keys)
+
+        return data_by_key
+
+    @staticmethod
+    def _decode(data):
+        """Return the structure encoded in data."""
+        if structure_encoding.is_encoded_structure(data):
+            return structure_encoding.decode_structure(data)
+        # Cached before the compact encoding: a compressed pickle.
+        return pickle.loads(zlib.decompress(data))
+
+    @staticmethod
+    def _chunk_keys(key, chunk_count):
+        """Return the cache keys of the chunks of the structure cached at key."""
+        return [u'{}.{}'.format(key, index) for index in range(chunk_count)]
 
 
 class MongoConnection(object):
@@ -339,6 +447,34 @@ class MongoConnection(object):
             tagger.measure("structures", len(docs))
             return docs
 
+    def get_structures(self, ids, course_context=None):
+        """
+        Return a dict of id to structure, for the structures with the given ids
+        which exist.
+
+        Like get_structure, this uses the cached versions of the structures,
+        but it gets all the cached ones at once, and then all the others.
+        """
+        with TIMER.timer("get_structures", course_context) as tagger:
+            tagger.measure("requested_ids", len(ids))
+            cache = CourseStructureCache()
+
+            structures = cache.get_many(ids, course_context)
+            tagger.measure("from_cache", len(structures))
+            missing_ids = [structure_id for structure_id in ids if structure_id not in structures]
+            if missing_ids:
+                # Always log cache misses, because they are unexpected
+                tagger.sample_rate = 1
+
+                found = {
+                    structure['_id']: structure
+                    for structure in self.find_structures_by_id(missing_ids, course_context)
+                }
+                cache.set_many(found, course_context)
+                structures.update(found)
+
+            return structures
+
     @autoretry_read()
     def find_courselike_blocks_by_id(self, ids, block_type, course_context=None):
         """
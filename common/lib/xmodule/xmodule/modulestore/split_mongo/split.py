@@ -88,6 +88,7 @@ from .caching_descriptor_system import CachingDescriptorSystem
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.modulestore.split_mongo.mongo_connection import MongoConnection, DuplicateKeyError
 from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo.structure_index import STRUCTURE_INDEXES, StructureIndex
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.error_module import ErrorDescriptor
 from collections import defaultdict
@@ -1143,6 +1144,53 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(course_id)
         return self._get_structure(course_id, depth, **kwargs)
 
+    def get_courses_by_keys(self, course_keys, depth=0, **kwargs):
+        """
+        Gets the course descriptors for the courses identified by the locators, as a
+        dict of locator to course descriptor. Courses which don't exist are left out.
+
+        Rather than looking each course up on its own, this finds all the course
+        indexes with one query, and then all the structures with one lookup in the
+        structure cache plus one query for those which aren't cached.
+        """
+        courses = {}
+        batched_keys = []
+        for course_key in course_keys:
+            if not isinstance(course_key, CourseLocator) or course_key.deprecated:
+                continue
+            if (
+                    course_key.version_guid or course_key.branch is None or isinstance(course_key, CCXLocator) or
+                    self._is_in_bulk_operation(course_key)
+            ):
+                # Leave version checks, errors and bulk operations to get_course
+                try:
+                    courses[course_key] = self.get_course(course_key, depth, **kwargs)
+                except ItemNotFoundError:
+                    pass
+            else:
+                batched_keys.append(course_key)
+
+        if not batched_keys:
+            return courses
+
+        indexes = {
+            (index['org'], index['course'], index['run']): index
+            for index in self.find_matching_course_indexes(course_keys=batched_keys)
+        }
+        version_guids = {}
+        for course_key in batched_keys:
+            index = indexes.get((course_key.org, course_key.course, course_key.run))
+            if index is not None and course_key.branch in index['versions']:
+                version_guids[course_key] = index['versions'][course_key.branch]
+
+        structures = self.db_connection.get_structures(list(set(version_guids.values())))
+        for course_key, version_guid in version_guids.iteritems():
+            structure = structures.get(version_guid)
+            if structure is not None:
+                envelope = CourseEnvelope(course_key.replace(version_guid=version_guid), structure)
+                courses[course_key] = self._load_items(envelope, [structure['root']], depth, **kwargs)[0]
+        return courses
+
     def get_library(self, library_id, depth=0, head_validation=True, **kwargs):
         """
         Gets the 'library' root block for the library identified by the locator
@@ -1257,31 +1305,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return []
 
         course = self._lookup_course(course_locator)
-        items = []
         qualifiers = qualifiers.copy() if qualifiers else {}  # copy the qualifiers (destructively manipulated here)
 
-        def _block_matches_all(block_data):
-            """
-            Check that the block matches all the criteria
-            """
-            # do the checks which don't require loading any additional data
-            if (  # pylint: disable=bad-continuation
-                self._block_matches(block_data, qualifiers) and
-                self._block_matches(block_data.fields, settings)
-            ):
-                if content:
-                    definition_block = self.get_definition(course_locator, block_data.definition)
-                    return self._block_matches(definition_block['fields'], content)
-                else:
-                    return True
-
         if settings is None:
             settings = {}
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
             block_ids = []
-            for block_id, block in course.structure['blocks'].iteritems():
+            for block_id in course.structure['blocks']:
                 # Don't do an in comparison blindly; first check to make sure
                 # that the name qualifier we're looking at isn't a plain string;
                 # if it is a string, then it should match exactly. If it's other
@@ -1292,9 +1324,10 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                     name_matches = block_id.id == block_name
                 else:
                     name_matches = block_id.id in block_name
-                if name_matches and _block_matches_all(block):
+                if name_matches:
                     block_ids.append(block_id)
 
+            block_ids = self._find_matching_blocks(course, block_ids, qualifiers, settings, content)
             return self._load_items(course, block_ids, **kwargs)
 
         if 'category' in qualifiers:
@@ -1304,84 +1337,82 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
 
-        # No need of these caches unless include_orphans is set to False
-        path_cache = None
-        parents_cache = None
+        # Use the structure's index to skip the blocks which can't match.
+        structure_index = self._get_structure_index(course)
+        candidates = structure_index.find(qualifiers.get('block_type'), settings)
+        items = self._find_matching_blocks(course, candidates, qualifiers, settings, content)
 
         if not include_orphans:
-            path_cache = {}
-            parents_cache = self.build_block_key_to_parents_mapping(course.structure)
-
-        for block_id, value in course.structure['blocks'].iteritems():
-            if _block_matches_all(value):
-                if not include_orphans:
-                    if (  # pylint: disable=bad-continuation
-                        block_id.type in DETACHED_XBLOCK_TYPES or
-                        self.has_path_to_root(block_id, course, path_cache, parents_cache)
-                    ):
-                        items.append(block_id)
-                else:
-                    items.append(block_id)
+            items = [
+                block_id
+                for block_id in items
+                if block_id.type in DETACHED_XBLOCK_TYPES or structure_index.has_path_to_root(block_id)
+            ]
 
         if len(items) > 0:
             return self._load_items(course, items, depth=0, **kwargs)
         else:
             return []
 
-    def build_block_key_to_parents_mapping(self, structure):
+    def _find_matching_blocks(self, course, block_keys, qualifiers, settings, content):
+        """
+        Return the keys, among the given block_keys of the course, of the blocks
+        matching all the get_items criteria.
+
+        The definitions needed to check the content criteria are loaded
+        together, rather than one by one.
         """
-        Given a structure, builds block_key to parents mapping for all block keys in structure
-        and returns it
+        blocks = course.structure['blocks']
 
-        :param structure: db json of course structure
+        # do the checks which don't require loading any additional data
+        block_keys = [
+            block_key
+            for block_key in block_keys
+            if (  # pylint: disable=bad-continuation
+                self._block_matches(blocks[block_key], qualifiers) and
+                self._block_matches(blocks[block_key].fields, settings)
+            )
+        ]
 
-        :return dict: a dictionary containing mapping of block_keys against their parents.
+        if content and block_keys:
+            definitions = {
+                definition['_id']: definition
+                for definition in self.get_definitions(
+                    course.course_key, [blocks[block_key].definition for block_key in block_keys]
+                )
+            }
+            block_keys = [
+                block_key
+                for block_key in block_keys
+                if blocks[block_key].definition in definitions and
+                self._block_matches(definitions[blocks[block_key].definition]['fields'], content)
+            ]
+
+        return block_keys
+
+    def _get_structure_index(self, course):
         """
-        children_to_parents = defaultdict(list)
-        for parent_key, value in structure['blocks'].iteritems():
-            for child_key in value.fields.get('children', []):
-                children_to_parents[child_key].append(parent_key)
+        Return the StructureIndex of the course's structure.
 
-        return children_to_parents
+        The index is cached, unless the structure is being modified by an
+        active bulk operation.
+        """
+        structure = course.structure
+        bulk_write_record = self._get_bulk_ops_record(course.course_key)
+        if bulk_write_record.active and structure['_id'] not in bulk_write_record.structures_in_db:
+            return StructureIndex(structure)
+        return STRUCTURE_INDEXES.get(structure)
 
-    def has_path_to_root(self, block_key, course, path_cache=None, parents_cache=None):
+    def has_path_to_root(self, block_key, course):
         """
-        Check recursively if an xblock has a path to the course root
+        Check if an xblock has a path to the course root
 
         :param block_key: BlockKey of the component whose path is to be checked
         :param course: actual db json of course from structures
-        :param path_cache: a dictionary that records which modules have a path to the root so that we don't have to
-        double count modules if we're computing this for a list of modules in a course.
-        :param parents_cache: a dictionary containing mapping of block_key to list of its parents. Optionally, this
-        should be built for course structure to make this method faster.
 
         :return Bool: whether or not component has path to the root
         """
-
-        if path_cache and block_key in path_cache:
-            return path_cache[block_key]
-
-        if parents_cache is None:
-            xblock_parents = self._get_parents_from_structure(block_key, course.structure)
-        else:
-            xblock_parents = parents_cache[block_key]
-
-        if len(xblock_parents) == 0 and block_key.type in ["course", "library"]:
-            # Found, xblock has the path to the root
-            if path_cache is not None:
-                path_cache[block_key] = True
-
-            return True
-
-        has_path = any(
-            self.has_path_to_root(xblock_parent, course, path_cache, parents_cache)
-            for xblock_parent in xblock_parents
-        )
-
-        if path_cache is not None:
-            path_cache[block_key] = has_path
-
-        return has_path
+        return self._get_structure_index(course).has_path_to_root(block_key)
 
     def get_parent_location(self, locator, **kwargs):
         """
@@ -1396,14 +1427,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        all_parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        structure_index = self._get_structure_index(course)
+        all_parent_ids = structure_index.get_parents(BlockKey.from_usage_key(locator))
 
         # Check and verify the found parent_ids are not orphans; Remove parent which has no valid path
         # to the course root
         parent_ids = [
             valid_parent
             for valid_parent in all_parent_ids
-            if self.has_path_to_root(valid_parent, course)
+            if structure_index.has_path_to_root(valid_parent)
         ]
 
         if len(parent_ids) == 0:
@@ -1439,6 +1471,42 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             for block_id in items
         ]
 
+    def get_block_keys_changed_since(self, course_key, version_guid, **kwargs):
+        """
+        Return the usage keys of the blocks in the given course that were added or changed since the
+        given version of its structure, or None if that version cannot be found.
+
+        Removed blocks are not returned; their former parents are, since removing a block changes
+        its parent's children.
+        """
+        if not isinstance(course_key, CourseLocator) or course_key.deprecated:
+            # The supplied CourseKey is of the wrong type, so it can't possibly be stored in this modulestore.
+            raise ItemNotFoundError(course_key)
+
+        current_structure = self._lookup_course(course_key).structure
+        if current_structure['_id'] == course_key.as_object_id(version_guid):
+            return []
+
+        previous_structure = self.get_structure(course_key, course_key.as_object_id(version_guid))
+        if previous_structure is None:
+            return None
+
+        previous_blocks = previous_structure['blocks']
+        changed_block_keys = []
+        for block_key, block_data in current_structure['blocks'].iteritems():
+            previous_block_data = previous_blocks.get(block_key)
+            if (
+                previous_block_data is None or
+                previous_block_data.edit_info.update_version != block_data.edit_info.update_version or
+                previous_block_data.definition != block_data.definition or
+                previous_block_data.fields != block_data.fields
+            ):
+                changed_block_keys.append(block_key)
+        return [
+            course_key.make_usage_key(block_type=block_key.type, block_id=block_key.id)
+            for block_key in changed_block_keys
+        ]
+
     def get_course_index_info(self, course_key):
         """
         The index records the initial creation of the indexed course and tracks the current version
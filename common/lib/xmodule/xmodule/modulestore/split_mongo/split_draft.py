@@ -57,6 +57,14 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         course_id = self._map_revision_to_branch(course_id)
         return super(DraftVersioningModuleStore, self).get_course(course_id, depth=depth, **kwargs)
 
+    def get_courses_by_keys(self, course_keys, depth=0, **kwargs):
+        """
+        See :py:meth: xmodule.modulestore.split_mongo.split.SplitMongoModuleStore.get_courses_by_keys
+        """
+        branched_keys = {self._map_revision_to_branch(course_key): course_key for course_key in course_keys}
+        courses = super(DraftVersioningModuleStore, self).get_courses_by_keys(branched_keys, depth=depth, **kwargs)
+        return {branched_keys[course_key]: course for course_key, course in courses.iteritems()}
+
     def get_library(self, library_id, depth=0, head_validation=True, **kwargs):
         if not head_validation and library_id.version_guid:
             return SplitMongoModuleStore.get_library(
@@ -317,6 +325,10 @@ class DraftVersioningModuleStore(SplitMongoModuleStore, ModuleStoreDraftAndPubli
         course_key = self._map_revision_to_branch(course_key)
         return super(DraftVersioningModuleStore, self).get_orphans(course_key, **kwargs)
 
+    def get_block_keys_changed_since(self, course_key, version_guid, **kwargs):
+        course_key = self._map_revision_to_branch(course_key)
+        return super(DraftVersioningModuleStore, self).get_block_keys_changed_since(course_key, version_guid, **kwargs)
+
     def fix_not_found(self, course_key, user_id):
         """
         Fix any children which point to non-existent blocks in the course's published and draft branches
@@ -0,0 +1,180 @@
+"""
+Compact encoding of split modulestore structures for CourseStructureCache.
+
+Rather than pickling the structure as a whole, the encoding interns block
+types and ids into tables, refers to children by their index in those
+tables, and stores each distinct dict of block fields only once, however
+many blocks share it.  Each block's data is pickled separately, so that
+decoding a structure only creates placeholders for its blocks; a block's
+data is unpickled the first time one of its attributes is read.
+
+Layout: MAGIC, then the zlib-compressed pickle of the encoded tables.
+"""
+import cPickle as pickle
+import zlib
+from threading import Lock
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+
+MAGIC = 'SCS\x01'
+
+
+def is_encoded_structure(data):
+    """
+    Return whether the data was produced by encode_structure.
+    """
+    return data[:len(MAGIC)] == MAGIC
+
+
+def encode_structure(structure):
+    """
+    Return the compact encoding of the given structure (with its blocks as
+    a dict of BlockKey to BlockData, as returned by structure_from_mongo).
+    """
+    header = dict(structure)
+    blocks = header.pop('blocks')
+
+    block_types, block_type_indices = [], {}
+    block_ids, block_id_indices = [], {}
+    keys, key_indices = [], {}
+
+    def _intern(value, values, indices):
+        """
+        Return the index of value in values, adding it if needed.
+        """
+        index = indices.get(value)
+        if index is None:
+            index = indices[value] = len(values)
+            values.append(value)
+        return index
+
+    def _intern_key(block_key):
+        """
+        Return the index of the block key in keys, adding it if needed.
+        """
+        if block_key not in key_indices:
+            key_indices[block_key] = len(keys)
+            keys.append((
+                _intern(block_key.type, block_types, block_type_indices),
+                _intern(block_key.id, block_ids, block_id_indices),
+            ))
+        return key_indices[block_key]
+
+    field_dicts, field_dict_indices = [], {}
+    block_table = []
+    block_records = []
+    for block_key, block_data in blocks.iteritems():
+        fields = dict(block_data.fields)
+        children = fields.pop('children', None)
+        if children is not None:
+            children = [_intern_key(child_key) for child_key in children]
+        block_table.append((
+            _intern_key(block_key),
+            _intern(pickle.dumps(fields, pickle.HIGHEST_PROTOCOL), field_dicts, field_dict_indices),
+            children,
+        ))
+        block_records.append(pickle.dumps((
+            block_data.block_type,
+            block_data.definition,
+            block_data.defaults,
+            block_data.get_asides(),
+            block_data.edit_info.to_storable(),
+        ), pickle.HIGHEST_PROTOCOL))
+
+    return MAGIC + zlib.compress(pickle.dumps(
+        (header, block_types, block_ids, keys, block_table, field_dicts, block_records),
+        pickle.HIGHEST_PROTOCOL,
+    ), 1)
+
+
+def decode_structure(data):
+    """
+    Return the structure encoded in the data by encode_structure.  The data
+    of its blocks is decoded lazily.
+    """
+    header, block_types, block_ids, keys, block_table, field_dicts, block_records = pickle.loads(
+        zlib.decompress(data[len(MAGIC):])
+    )
+    decoder = _BlockDecoder(
+        [BlockKey(block_types[type_index], block_ids[id_index]) for type_index, id_index in keys],
+        block_table,
+        field_dicts,
+        block_records,
+    )
+
+    structure = header
+    structure['blocks'] = {
+        decoder.keys[key_index]: LazyBlockData(decoder, index)
+        for index, (key_index, __, __) in enumerate(block_table)
+    }
+    return structure
+
+
+class _BlockDecoder(object):
+    """
+    Decodes the data of single blocks of an encoded structure.
+    """
+    def __init__(self, keys, block_table, field_dicts, block_records):
+        self.keys = keys
+        self.block_table = block_table
+        self.field_dicts = field_dicts
+        self.block_records = block_records
+        self.lock = Lock()
+
+    def decode(self, index):
+        """
+        Return the storable dict of the block at the given index.
+        """
+        __, field_dict_index, children = self.block_table[index]
+        # Each block gets its own copy of the fields, even when they are shared.
+        fields = pickle.loads(self.field_dicts[field_dict_index])
+        if children is not None:
+            fields['children'] = [self.keys[key_index] for key_index in children]
+        block_type, definition, defaults, asides, edit_info = pickle.loads(self.block_records[index])
+        return {
+            'fields': fields,
+            'block_type': block_type,
+            'definition': definition,
+            'defaults': defaults,
+            'asides': asides,
+            'edit_info': edit_info,
+        }
+
+
+class LazyBlockData(BlockData):
+    """
+    BlockData which is decoded from an encoded structure the first time one
+    of its attributes is read.
+    """
+    def __init__(self, decoder, index):  # pylint: disable=super-init-not-called
+        self.definition_loaded = False
+        self._decoder = decoder
+        self._index = index
+
+    def __getattr__(self, name):
+        # Only called for attributes which aren't set yet.
+        if name.startswith('_') or '_decoder' not in self.__dict__:
+            raise AttributeError(name)
+        self._decode()
+        return getattr(self, name)
+
+    def _decode(self):
+        """
+        Set the attributes from the encoded data, if not done yet.
+        """
+        decoder = self.__dict__.get('_decoder')
+        if decoder is None:
+            return
+        with decoder.lock:
+            if '_decoder' in self.__dict__:
+                self.from_storable(decoder.decode(self._index))
+                del self.__dict__['_decoder']
+                del self.__dict__['_index']
+
+    def __getstate__(self):
+        self._decode()
+        return self.__dict__
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
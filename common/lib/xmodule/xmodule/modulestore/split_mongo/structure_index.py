@@ -0,0 +1,168 @@
+"""
+Indexes over split modulestore structures, for answering get_items queries
+and parent lookups without scanning all the blocks of a structure.
+
+Saved structures are immutable, so the index of a saved structure is built
+the first time it's needed and then kept, keyed on the structure's version.
+"""
+from collections import OrderedDict, defaultdict
+from threading import Lock
+
+import six
+
+# Settings fields whose presence on blocks is indexed.
+INDEXED_SETTINGS_FIELDS = ('group_access', 'discussion_id')
+
+# Types of the blocks which are roots of their structure.
+ROOT_BLOCK_TYPES = ('course', 'library')
+
+# How many structure indexes to keep.
+STRUCTURE_INDEX_CACHE_SIZE = 100
+
+
+class StructureIndex(object):
+    """
+    An immutable index of the blocks of a structure by block type, by which
+    of the INDEXED_SETTINGS_FIELDS they set, and by parent.  It also knows
+    which blocks have a path to the structure's root.
+
+    Block keys are kept in the iteration order of the structure's blocks.
+    """
+    def __init__(self, structure):
+        blocks = structure['blocks']
+        block_keys_by_type = defaultdict(list)
+        block_keys_by_field = defaultdict(set)
+        parents = defaultdict(list)
+        for block_key, block_data in blocks.iteritems():
+            block_keys_by_type[block_key.type].append(block_key)
+            for field_name in INDEXED_SETTINGS_FIELDS:
+                if field_name in block_data.fields:
+                    block_keys_by_field[field_name].add(block_key)
+            for child_key in block_data.fields.get('children', []):
+                parents[child_key].append(block_key)
+
+        # Walk down from the roots: the course or library blocks without parents.
+        reachable = set(
+            block_key
+            for block_key in blocks
+            if block_key.type in ROOT_BLOCK_TYPES and not parents.get(block_key)
+        )
+        to_visit = list(reachable)
+        while to_visit:
+            block_data = blocks.get(to_visit.pop())
+            if block_data is None:
+                continue
+            for child_key in block_data.fields.get('children', []):
+                if child_key not in reachable:
+                    reachable.add(child_key)
+                    to_visit.append(child_key)
+
+        self._parents = {block_key: tuple(parent_keys) for block_key, parent_keys in parents.iteritems()}
+        self._reachable = frozenset(reachable)
+
+        self._block_keys = tuple(blocks)
+        self._block_keys_by_type = {
+            block_type: tuple(block_keys) for block_type, block_keys in block_keys_by_type.iteritems()
+        }
+        self._block_keys_by_field = {
+            field_name: frozenset(block_keys) for field_name, block_keys in block_keys_by_field.iteritems()
+        }
+
+    def find(self, block_type=None, settings=None):
+        """
+        Return the keys of the blocks which may match the block_type and
+        settings criteria of a get_items query, in structure order.
+
+        The criteria still have to be checked on the returned blocks; the
+        index only rules out blocks which can't match.
+        """
+        block_types = self._get_block_types(block_type)
+        if block_types is None:
+            block_keys = self._block_keys
+        else:
+            block_keys = [
+                block_key
+                for block_type in block_types
+                for block_key in self._block_keys_by_type.get(block_type, ())
+            ]
+            if len(block_types) > 1:
+                # Keep the structure order.
+                order = set(block_keys)
+                block_keys = [block_key for block_key in self._block_keys if block_key in order]
+
+        for field_name, criteria in (settings or {}).iteritems():
+            if field_name not in INDEXED_SETTINGS_FIELDS:
+                continue
+            if isinstance(criteria, dict) and '$exists' in criteria and not criteria['$exists']:
+                # Blocks without the field can match.
+                continue
+            # Any other criteria requires the field to be set.
+            with_field = self._block_keys_by_field.get(field_name, frozenset())
+            block_keys = [block_key for block_key in block_keys if block_key in with_field]
+
+        return block_keys
+
+    def get_parents(self, block_key):
+        """
+        Return the keys of the parents of the given block, in structure order.
+        """
+        return self._parents.get(block_key, ())
+
+    def has_path_to_root(self, block_key):
+        """
+        Return whether the given block can be reached from the root of the
+        structure, i.e. whether it isn't an orphan nor in an orphaned subtree.
+        """
+        return block_key in self._reachable
+
+    @staticmethod
+    def _get_block_types(criteria):
+        """
+        Return the list of block types the block_type criteria matches, or
+        None if that can't be told without checking each block (e.g. for
+        regexes and functions).
+        """
+        if isinstance(criteria, six.string_types):
+            return [criteria]
+        if isinstance(criteria, dict) and criteria.keys() == ['$in']:
+            if all(isinstance(block_type, six.string_types) for block_type in criteria['$in']):
+                return list(criteria['$in'])
+        return None
+
+
+class StructureIndexCache(object):
+    """
+    A thread-safe LRU cache of StructureIndexes, keyed on structure version.
+    """
+    def __init__(self, size):
+        self.size = size
+        self._indexes = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, structure):
+        """
+        Return the index of the given saved structure, building it if needed.
+        """
+        version = structure['_id']
+        with self._lock:
+            index = self._indexes.pop(version, None)
+            if index is not None:
+                self._indexes[version] = index
+                return index
+
+        index = StructureIndex(structure)
+        with self._lock:
+            self._indexes[version] = index
+            while len(self._indexes) > self.size:
+                self._indexes.popitem(last=False)
+        return index
+
+    def clear(self):
+        """
+        Remove all the indexes.
+        """
+        with self._lock:
+            self._indexes.clear()
+
+
+STRUCTURE_INDEXES = StructureIndexCache(STRUCTURE_INDEX_CACHE_SIZE)
@@ -1094,6 +1094,17 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
             course = self.store.get_item(self.course_locations[self.MONGO_COURSEID])
             self.assertEqual(course.id, self.course_locations[self.MONGO_COURSEID].course_key)
 
+    @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
+    def test_get_courses_by_keys(self, default_ms):
+        self.initdb(default_ms)
+        course_key = self.course_locations[self.MONGO_COURSEID].course_key
+        missing_key = self.store.make_course_key('org', 'missing', 'run')
+
+        courses = self.store.get_courses_by_keys([course_key, missing_key])
+        self.assertEqual(set(courses), {course_key, missing_key})
+        self.assertEqual(courses[course_key].location, self.store.get_course(course_key).location)
+        self.assertIsNone(courses[missing_key])
+
     @ddt.data(ModuleStoreEnum.Type.mongo, ModuleStoreEnum.Type.split)
     def test_get_library(self, default_ms):
         """
@@ -1826,6 +1837,46 @@ class TestMixedModuleStore(CommonMixedModuleStoreSetup):
             found_orphans = self.store.get_orphans(self.course_locations[self.MONGO_COURSEID].course_key)
         self.assertItemsEqual(found_orphans, orphan_locations)
 
+    @ddt.data(ModuleStoreEnum.Type.split)
+    def test_get_block_keys_changed_since(self, default_ms):
+        """
+        Test finding the blocks changed since a published version of a course.
+        """
+        self.initdb(default_ms)
+        course_key = self.course_locations[self.MONGO_COURSEID].course_key
+        self.store.publish(self.writable_chapter_location, self.user_id)
+        with self.store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+            previous_version = self.store.get_course(course_key).course_version
+            self.assertEqual(self.store.get_block_keys_changed_since(course_key, previous_version), [])
+
+        problem = self.store.create_child(self.user_id, self.writable_chapter_location, 'problem', 'ChangedProblem')
+        self.store.publish(self.writable_chapter_location, self.user_id)
+
+        with self.store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+            changed_block_keys = self.store.get_block_keys_changed_since(course_key, previous_version)
+        self.assertIn(self.writable_chapter_location, changed_block_keys)
+        self.assertIn(problem.location, changed_block_keys)
+
+        # Block structures record the version as a string, and collect them within a bulk operation
+        # whose structure cache starts empty.
+        with self.store.bulk_operations(course_key):
+            with self.store.branch_setting(ModuleStoreEnum.Branch.published_only, course_key):
+                bulk_changed_block_keys = self.store.get_block_keys_changed_since(
+                    course_key, unicode(previous_version)
+                )
+        self.assertIsNotNone(bulk_changed_block_keys)
+        self.assertItemsEqual(bulk_changed_block_keys, changed_block_keys)
+
+    @ddt.data(ModuleStoreEnum.Type.mongo)
+    def test_get_block_keys_changed_since_unsupported(self, default_ms):
+        """
+        Test that old mongo courses do not report changed blocks.
+        """
+        self.initdb(default_ms)
+        course_key = self.course_locations[self.MONGO_COURSEID].course_key
+        with self.assertRaises(NotImplementedError):
+            self.store.get_block_keys_changed_since(course_key, None)
+
     @ddt.data(ModuleStoreEnum.Type.mongo)
     def test_get_non_orphan_parents(self, default_ms):
         """
@@ -37,7 +37,7 @@ from xmodule.exceptions import NotFoundError
 from xmodule.x_module import XModuleMixin
 from xmodule.modulestore.mongo.base import as_draft
 from xmodule.modulestore.tests.mongo_connection import MONGO_PORT_NUM, MONGO_HOST
-from xmodule.modulestore.tests.utils import LocationMixin, mock_tab_from_json
+from xmodule.modulestore.tests.utils import LocationMixin, MemoryCache, mock_tab_from_json
 from xmodule.modulestore.edit_info import EditInfoMixin
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.modulestore.inheritance import InheritanceMixin
@@ -712,6 +712,68 @@ class TestMongoModuleStore(TestMongoModuleStoreBase):
         # Clean up the data so we don't break other tests which apparently expect a particular state
         self.draft_store.delete_course(course.id, self.dummy_user)
 
+    def test_incremental_metadata_inheritance_tree(self):
+        """
+        Edits to blocks update the cached metadata inheritance tree under them
+        to what recomputing the whole tree gives.
+        """
+        course = self.draft_store.create_course("TestX", "InheritanceTest", "1234_A1", self.dummy_user)
+        self.addCleanup(self.draft_store.delete_course, course.id, self.dummy_user)
+        chapter = self.draft_store.create_child(self.dummy_user, course.location, "chapter")
+        sequential = self.draft_store.create_child(self.dummy_user, chapter.location, "sequential")
+        vertical = self.draft_store.create_child(self.dummy_user, sequential.location, "vertical")
+        problem = self.draft_store.create_child(self.dummy_user, vertical.location, "problem")
+
+        def assert_tree_is_current():
+            """ Check the cached tree against a recomputed one """
+            tree = self.draft_store._get_cached_metadata_inheritance_tree(course.id)
+            expected = self.draft_store._compute_metadata_inheritance_tree(course.id)
+            self.assertEqual(
+                {url: metadata.copy() for url, metadata in tree.iteritems()},
+                {url: metadata.copy() for url, metadata in expected.iteritems()},
+            )
+
+        with patch.object(self.draft_store, 'metadata_inheritance_cache_subsystem', MemoryCache()):
+            self.draft_store.refresh_cached_metadata_inheritance_tree(course.id)
+
+            sequential.graded = True
+            sequential.start = datetime(2015, 1, 1, tzinfo=UTC)
+            self.draft_store.update_item(sequential, self.dummy_user)
+            assert_tree_is_current()
+            tree = self.draft_store._get_cached_metadata_inheritance_tree(course.id)
+            self.assertEqual(tree[unicode(problem.location)]['graded'], True)
+            self.assertEqual(tree[unicode(problem.location)]['parent'].values(), [unicode(vertical.location)])
+
+            # Editing a leaf or moving blocks around doesn't recompute the whole tree.
+            with patch.object(self.draft_store, '_compute_metadata_inheritance_tree') as compute:
+                problem.display_name = "Problem"
+                self.draft_store.update_item(problem, self.dummy_user)
+                other_vertical = self.draft_store.create_child(self.dummy_user, sequential.location, "vertical")
+                vertical.children = []
+                self.draft_store.update_item(vertical, self.dummy_user)
+                other_vertical.children = [problem.location]
+                self.draft_store.update_item(other_vertical, self.dummy_user)
+                self.assertFalse(compute.called)
+            assert_tree_is_current()
+
+            # Another process writing the tree during an update makes it recompute the whole tree.
+            update_tree = self.draft_store._update_metadata_inheritance_tree
+
+            def concurrently_updated_tree(*args):
+                """ Update the tree, while another process writes it """
+                self.draft_store._bump_metadata_inheritance_tree_version(course.id)
+                return update_tree(*args)
+
+            with patch.object(self.draft_store, '_update_metadata_inheritance_tree', concurrently_updated_tree):
+                with patch.object(
+                    self.draft_store, '_compute_metadata_inheritance_tree',
+                    wraps=self.draft_store._compute_metadata_inheritance_tree
+                ) as compute:
+                    sequential.graded = False
+                    self.draft_store.update_item(sequential, self.dummy_user)
+                    self.assertTrue(compute.called)
+            assert_tree_is_current()
+
     def test_make_course_usage_key(self):
         """Test that we get back the appropriate usage key for the root of a course key."""
         course_key = CourseLocator(org="edX", course="101", run="2015")
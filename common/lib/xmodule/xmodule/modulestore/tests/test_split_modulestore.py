@@ -706,6 +706,27 @@ class SplitModuleCourseTests(SplitModuleTest):
             locator_key_fields=['org', 'course', 'run']
         )
 
+    @patch('xmodule.tabs.CourseTab.from_json', side_effect=mock_tab_from_json)
+    def test_get_courses_by_keys(self, _from_json):
+        '''
+        get_courses_by_keys gets the same courses as get_course, without looking up each course index
+        '''
+        greek_hero = CourseLocator(org='testx', course='GreekHero', run="run", branch=BRANCH_NAME_DRAFT)
+        wonderful = CourseLocator(org='testx', course='wonderful', run="run", branch=BRANCH_NAME_DRAFT)
+        published = CourseLocator(org='testx', course='wonderful', run="run", branch=BRANCH_NAME_PUBLISHED)
+        missing = CourseLocator(org='testx', course='missing', run="run", branch=BRANCH_NAME_DRAFT)
+
+        with patch.object(modulestore().db_connection, 'get_course_index') as get_course_index:
+            courses = modulestore().get_courses_by_keys([greek_hero, wonderful, published, missing])
+            self.assertFalse(get_course_index.called)
+
+        self.assertEqual(set(courses), {greek_hero, wonderful, published})
+        for course_key, course in courses.iteritems():
+            expected = modulestore().get_course(course_key)
+            self.assertEqual(course.location, expected.location)
+            self.assertEqual(course.display_name, expected.display_name)
+            self.assertEqual(course.children, expected.children)
+
     @patch('xmodule.tabs.CourseTab.from_json', side_effect=mock_tab_from_json)
     def test_get_course(self, _from_json):
         '''
@@ -976,6 +997,25 @@ class TestCourseStructureCache(SplitModuleTest):
         # now make sure that you get the same structure
         self.assertEqual(cached_structure, not_cached_structure)
 
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.CourseStructureCache.MAX_CHUNK_SIZE', 100)
+    @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
+    def test_course_structure_cache_chunks(self, mock_get_cache):
+        mock_get_cache.return_value = self.cache
+
+        with check_mongo_calls(1):
+            not_cached_structure = self._get_structure(self.new_course)
+
+        # the structure is cached in chunks, which are put back together
+        with check_mongo_calls(0):
+            cached_structure = self._get_structure(self.new_course)
+        self.assertEqual(cached_structure, not_cached_structure)
+
+        # losing any chunk loses the structure
+        structure_id = self.new_course.location.as_object_id(self.new_course.location.version_guid)
+        self.cache.delete(u'{}.1'.format(structure_id))
+        with check_mongo_calls(1):
+            self._get_structure(self.new_course)
+
     @patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache')
     def test_course_structure_cache_no_cache_configured(self, mock_get_cache):
         mock_get_cache.side_effect = InvalidCacheBackendError
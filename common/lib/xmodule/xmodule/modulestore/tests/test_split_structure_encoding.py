@@ -0,0 +1,97 @@
+""" Test split_mongo/structure_encoding """
+import cPickle as pickle
+import datetime
+import unittest
+
+from bson.objectid import ObjectId
+
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_encoding import (
+    LazyBlockData, decode_structure, encode_structure, is_encoded_structure
+)
+
+
+class TestStructureEncoding(unittest.TestCase):
+    """ Test encoding and decoding structures """
+    shard = 2
+
+    def setUp(self):
+        super(TestStructureEncoding, self).setUp()
+        edit_info = {
+            'edited_on': datetime.datetime(2017, 1, 1),
+            'edited_by': 1,
+            'previous_version': None,
+            'update_version': ObjectId(),
+            'source_version': None,
+            'original_usage': None,
+            'original_usage_version': None,
+        }
+        self.structure = {
+            '_id': ObjectId(),
+            'root': BlockKey('course', 'course'),
+            'original_version': ObjectId(),
+            'blocks': {
+                BlockKey('course', 'course'): BlockData(
+                    block_type='course',
+                    definition=ObjectId(),
+                    fields={'display_name': u'Course', 'children': [BlockKey('vertical', 'vert1')]},
+                    edit_info=edit_info,
+                ),
+                BlockKey('vertical', 'vert1'): BlockData(
+                    block_type='vertical',
+                    definition=ObjectId(),
+                    fields={'children': [BlockKey('problem', 'p1'), BlockKey('problem', 'p2')]},
+                    edit_info=edit_info,
+                ),
+                BlockKey('problem', 'p1'): BlockData(
+                    block_type='problem',
+                    definition=ObjectId(),
+                    fields={'weight': 1.0, 'group_access': {1: [2]}},
+                    asides={'tagging_aside': {'difficulty': 'hard'}},
+                    edit_info=edit_info,
+                ),
+                BlockKey('problem', 'p2'): BlockData(
+                    block_type='problem',
+                    definition=ObjectId(),
+                    fields={'weight': 1.0, 'group_access': {1: [2]}},
+                    defaults={'max_attempts': 2},
+                    edit_info=edit_info,
+                ),
+            },
+        }
+
+    def test_round_trip(self):
+        data = encode_structure(self.structure)
+        self.assertTrue(is_encoded_structure(data))
+        self.assertEqual(decode_structure(data), self.structure)
+
+    def test_legacy_data(self):
+        self.assertFalse(is_encoded_structure(pickle.dumps(self.structure)))
+
+    def test_shared_fields(self):
+        blocks = decode_structure(encode_structure(self.structure))['blocks']
+        p1_fields = blocks[BlockKey('problem', 'p1')].fields
+        p2_fields = blocks[BlockKey('problem', 'p2')].fields
+        self.assertEqual(p1_fields, p2_fields)
+        # Blocks sharing fields in the encoding can still change them independently.
+        p1_fields['group_access'][1].append(3)
+        self.assertEqual(p2_fields, {'weight': 1.0, 'group_access': {1: [2]}})
+
+    def test_lazy_decoding(self):
+        blocks = decode_structure(encode_structure(self.structure))['blocks']
+        block = blocks[BlockKey('problem', 'p1')]
+        self.assertIsInstance(block, LazyBlockData)
+        self.assertNotIn('fields', block.__dict__)
+
+        self.assertEqual(block.block_type, 'problem')
+        self.assertIn('fields', block.__dict__)
+        self.assertEqual(block, self.structure['blocks'][BlockKey('problem', 'p1')])
+        # The other blocks are left encoded.
+        self.assertNotIn('fields', blocks[BlockKey('problem', 'p2')].__dict__)
+
+    def test_pickle_lazy_block(self):
+        blocks = decode_structure(encode_structure(self.structure))['blocks']
+        block = pickle.loads(pickle.dumps(blocks[BlockKey('problem', 'p2')], pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(block, self.structure['blocks'][BlockKey('problem', 'p2')])
+        self.assertEqual(block.defaults, {'max_attempts': 2})
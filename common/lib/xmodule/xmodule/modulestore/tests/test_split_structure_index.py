@@ -0,0 +1,90 @@
+""" Test split_mongo/structure_index """
+import re
+import unittest
+from collections import OrderedDict
+
+from bson.objectid import ObjectId
+
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_index import StructureIndex, StructureIndexCache
+
+
+class FakeBlockData(object):
+    """ The part of BlockData the index uses """
+    def __init__(self, **fields):
+        self.fields = fields
+
+
+class TestStructureIndex(unittest.TestCase):
+    """ Test finding candidate blocks with StructureIndex """
+    shard = 2
+
+    def setUp(self):
+        super(TestStructureIndex, self).setUp()
+        self.structure = {
+            '_id': ObjectId(),
+            'blocks': OrderedDict([
+                (BlockKey('course', 'course'), FakeBlockData(children=[BlockKey('vertical', 'vert1')])),
+                (BlockKey('problem', 'p1'), FakeBlockData(group_access={1: [1]})),
+                (BlockKey('video', 'v1'), FakeBlockData()),
+                (BlockKey('vertical', 'vert1'), FakeBlockData(children=[BlockKey('problem', 'p1')])),
+                (BlockKey('problem', 'p2'), FakeBlockData()),
+                (BlockKey('vertical', 'vert2'), FakeBlockData(
+                    children=[BlockKey('problem', 'p1'), BlockKey('video', 'v2')],
+                )),
+                (BlockKey('video', 'v2'), FakeBlockData(group_access={})),
+            ]),
+        }
+        self.index = StructureIndex(self.structure)
+
+    def test_find_by_block_type(self):
+        self.assertEqual(
+            self.index.find('problem'),
+            [BlockKey('problem', 'p1'), BlockKey('problem', 'p2')],
+        )
+        self.assertEqual(self.index.find('html'), [])
+        self.assertEqual(
+            self.index.find({'$in': ['video', 'problem']}),
+            [BlockKey('problem', 'p1'), BlockKey('video', 'v1'), BlockKey('problem', 'p2'), BlockKey('video', 'v2')],
+        )
+
+    def test_find_all(self):
+        all_blocks = list(self.structure['blocks'])
+        self.assertEqual(list(self.index.find()), all_blocks)
+        # Criteria the index can't evaluate don't rule out any block.
+        self.assertEqual(list(self.index.find(re.compile('prob'))), all_blocks)
+        self.assertEqual(list(self.index.find(lambda block_type: True)), all_blocks)
+
+    def test_find_by_settings(self):
+        self.assertEqual(
+            self.index.find(settings={'group_access': {'$exists': True}}),
+            [BlockKey('problem', 'p1'), BlockKey('video', 'v2')],
+        )
+        self.assertEqual(
+            self.index.find('video', settings={'group_access': {}}),
+            [BlockKey('video', 'v2')],
+        )
+        # Blocks without the field can match these.
+        self.assertEqual(len(self.index.find(settings={'group_access': {'$exists': False}})), 7)
+        self.assertEqual(len(self.index.find(settings={'display_name': 'Problem'})), 7)
+
+    def test_parents(self):
+        self.assertEqual(
+            self.index.get_parents(BlockKey('problem', 'p1')),
+            (BlockKey('vertical', 'vert1'), BlockKey('vertical', 'vert2')),
+        )
+        self.assertEqual(self.index.get_parents(BlockKey('course', 'course')), ())
+
+    def test_has_path_to_root(self):
+        for block_key in (BlockKey('course', 'course'), BlockKey('vertical', 'vert1'), BlockKey('problem', 'p1')):
+            self.assertTrue(self.index.has_path_to_root(block_key), block_key)
+        # Orphans and their descendants which have no other parent.
+        for block_key in (BlockKey('vertical', 'vert2'), BlockKey('video', 'v1'), BlockKey('video', 'v2')):
+            self.assertFalse(self.index.has_path_to_root(block_key), block_key)
+
+    def test_cache(self):
+        cache = StructureIndexCache(1)
+        index = cache.get(self.structure)
+        self.assertIs(cache.get(self.structure), index)
+        cache.get(dict(self.structure, _id=ObjectId()))
+        self.assertIsNot(cache.get(self.structure), index)
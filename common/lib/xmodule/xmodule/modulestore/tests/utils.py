@@ -216,6 +216,21 @@ class MemoryCache(object):
         """
         self.data[key] = value
 
+    def add(self, key, value):
+        """
+        Set a key in the cache, unless it is already set.
+        """
+        self.data.setdefault(key, value)
+
+    def incr(self, key):
+        """
+        Increment the value of a key in the cache, and return the new value.
+        """
+        if key not in self.data:
+            raise ValueError("Key '{}' not found".format(key))
+        self.data[key] += 1
+        return self.data[key]
+
 
 class MongoContentstoreBuilder(object):
     """
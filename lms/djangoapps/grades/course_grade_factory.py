@@ -2,6 +2,7 @@
 Course Grade Factory Class
 """
 from collections import namedtuple
+from itertools import islice
 from logging import getLogger
 
 from six import text_type
@@ -11,7 +12,8 @@ from openedx.core.djangoapps.signals.signals import COURSE_GRADE_CHANGED, COURSE
 from .config import assume_zero_if_absent, should_persist_grades
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
-from .models import PersistentCourseGrade, prefetch
+from .models import PersistentCourseGrade, bulk_prefetch, clear_bulk_prefetched_data, prefetch
+from .subsection_grade_factory import SubsectionGradeFactory
 
 log = getLogger(__name__)
 
@@ -22,6 +24,9 @@ class CourseGradeFactory(object):
     """
     GradeResult = namedtuple('GradeResult', ['student', 'course_grade', 'error'])
 
+    # Number of users whose grading state is prefetched at once by iter's bulk mode.
+    BULK_PREFETCH_BATCH_SIZE = 100
+
     def read(
             self,
             user,
@@ -82,6 +87,7 @@ class CourseGradeFactory(object):
             collected_block_structure=None,
             course_key=None,
             force_update=False,
+            bulk_prefetch_state=False,
     ):
         """
         Given a course and an iterable of students (User), yield a GradeResult
@@ -91,6 +97,12 @@ class CourseGradeFactory(object):
 
         If an error occurred, course_grade will be None and err_msg will be an
         exception message. If there was no error, err_msg is an empty string.
+
+        If bulk_prefetch_state is True, students are graded in batches of
+        BULK_PREFETCH_BATCH_SIZE.  The courseware and submissions scores,
+        persisted course and subsection grades, overrides and visible blocks
+        of a whole batch are fetched up front, so the number of queries made
+        to read this state is fixed per batch rather than per student.
         """
         # Pre-fetch the collected course_structure (in _iter_grade_result) so:
         # 1. Correctness: the same version of the course is used to
@@ -101,8 +113,35 @@ class CourseGradeFactory(object):
             user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
         )
         stats_tags = [u'action:{}'.format(course_data.course_key)]
-        for user in users:
-            yield self._iter_grade_result(user, course_data, force_update)
+        if bulk_prefetch_state:
+            users = iter(users)
+            for user_batch in iter(lambda: list(islice(users, self.BULK_PREFETCH_BATCH_SIZE)), []):
+                self._bulk_prefetch(user_batch, course_data)
+                try:
+                    for user in user_batch:
+                        yield self._iter_grade_result(user, course_data, force_update)
+                finally:
+                    self._clear_bulk_prefetched_data(user_batch, course_data)
+        else:
+            for user in users:
+                yield self._iter_grade_result(user, course_data, force_update)
+
+    @staticmethod
+    def _bulk_prefetch(users, course_data):
+        """
+        Prefetches all the state needed to grade the given users.
+        """
+        bulk_prefetch(users, course_data.course_key)
+        SubsectionGradeFactory.bulk_prefetch_scores(course_data, users)
+
+    @staticmethod
+    def _clear_bulk_prefetched_data(users, course_data):
+        """
+        Clears the state cached by `_bulk_prefetch`, to bound memory use
+        across batches.
+        """
+        clear_bulk_prefetched_data(users, course_data.course_key)
+        SubsectionGradeFactory.clear_prefetched_scores(course_data.course_key, users)
 
     def _iter_grade_result(self, user, course_data, force_update):
         try:
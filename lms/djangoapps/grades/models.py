@@ -237,6 +237,28 @@ class VisibleBlocks(models.Model):
         get_cache(cls._CACHE_NAMESPACE)[cls._cache_key(user_id, course_key)] = prefetched
         return prefetched
 
+    @classmethod
+    def bulk_prefetch(cls, course_key, users):
+        """
+        Prefetches the visible blocks of the given course with a single
+        query, and stores them in the cache of each of the given users.
+        Visible blocks are shared by all users of a course, so the same
+        records are used for all of them.
+        """
+        prefetched = {record.hashed: record for record in cls.objects.filter(course_id=course_key)}
+        cache = get_cache(cls._CACHE_NAMESPACE)
+        for user in users:
+            cache[cls._cache_key(user.id, course_key)] = prefetched
+
+    @classmethod
+    def clear_prefetched_data(cls, course_key, users):
+        """
+        Clears the prefetched visible blocks of the given users from the RequestCache.
+        """
+        cache = get_cache(cls._CACHE_NAMESPACE)
+        for user in users:
+            cache.pop(cls._cache_key(user.id, course_key), None)
+
     @classmethod
     def _update_cache(cls, user_id, course_key, visible_blocks):
         """
@@ -658,6 +680,33 @@ class PersistentSubsectionGradeOverride(models.Model):
             cls.objects.filter(grade__user_id=user_id, grade__course_id=course_key)
         }
 
+    @classmethod
+    def bulk_prefetch(cls, course_key, users):
+        """
+        Prefetches the overrides of all the given users in the given
+        course with a single query.
+        """
+        prefetched = {user.id: {} for user in users}
+        overrides = cls.objects.select_related('grade').filter(
+            grade__user_id__in=list(prefetched),
+            grade__course_id=course_key,
+        )
+        for override in overrides:
+            prefetched[override.grade.user_id][override.grade.usage_key] = override
+
+        cache = get_cache(cls._CACHE_NAMESPACE)
+        for user_id, user_overrides in prefetched.iteritems():
+            cache[(user_id, str(course_key))] = user_overrides
+
+    @classmethod
+    def clear_prefetched_data(cls, course_key, users):
+        """
+        Clears the prefetched overrides of the given users from the RequestCache.
+        """
+        cache = get_cache(cls._CACHE_NAMESPACE)
+        for user in users:
+            cache.pop((user.id, str(course_key)), None)
+
     @classmethod
     def get_override(cls, user_id, usage_key):
         prefetch_values = get_cache(cls._CACHE_NAMESPACE).get((user_id, str(usage_key.course_key)), None)
@@ -777,3 +826,25 @@ class PersistentSubsectionGradeOverrideHistory(models.Model):
 def prefetch(user, course_key):
     PersistentSubsectionGradeOverride.prefetch(user.id, course_key)
     VisibleBlocks.bulk_read(user.id, course_key)
+
+
+def bulk_prefetch(users, course_key):
+    """
+    Prefetches the persisted grades, overrides and visible blocks of all
+    the given users in the course, with a fixed number of queries
+    regardless of the number of users.
+    """
+    PersistentCourseGrade.prefetch(course_key, users)
+    PersistentSubsectionGrade.prefetch(course_key, users)
+    PersistentSubsectionGradeOverride.bulk_prefetch(course_key, users)
+    VisibleBlocks.bulk_prefetch(course_key, users)
+
+
+def clear_bulk_prefetched_data(users, course_key):
+    """
+    Clears the data cached by `bulk_prefetch` from the RequestCache.
+    """
+    PersistentCourseGrade.clear_prefetched_data(course_key)
+    PersistentSubsectionGrade.clear_prefetched_data(course_key)
+    PersistentSubsectionGradeOverride.clear_prefetched_data(course_key, users)
+    VisibleBlocks.clear_prefetched_data(course_key, users)
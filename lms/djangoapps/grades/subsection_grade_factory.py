@@ -7,20 +7,73 @@ from courseware.model_data import ScoresClient
 from lms.djangoapps.grades.config import assume_zero_if_absent, should_persist_grades
 from lms.djangoapps.grades.models import PersistentSubsectionGrade
 from lms.djangoapps.grades.scores import possibly_scored
+from openedx.core.lib.cache_utils import get_cache
 from openedx.core.lib.grade_utils import is_score_higher_or_equal
 from student.models import anonymous_id_for_user
 from submissions import api as submissions_api
+from submissions.models import ScoreSummary
+from submissions.serializers import UnannotatedScoreSerializer
 
 from .course_data import CourseData
 from .subsection_grade import CreateSubsectionGrade, ReadSubsectionGrade, ZeroSubsectionGrade
 
 log = getLogger(__name__)
 
+_PREFETCHED_SCORES_NAMESPACE = u'grades.subsection_grade_factory.prefetched_scores'
+
 
 class SubsectionGradeFactory(object):
     """
     Factory for Subsection Grades.
     """
+    @classmethod
+    def bulk_prefetch_scores(cls, course_data, users):
+        """
+        Prefetches the CSM and Submissions API scores of all the given users
+        in the course, with one query for each, so that factories created
+        for these users don't query them user by user.
+
+        `course_data` should hold the collected (not user-specific) course
+        structure, so the scorable locations of all users are included.
+        """
+        course_key = course_data.course_key
+        scorable_locations = [block_key for block_key in course_data.collected_structure if possibly_scored(block_key)]
+        csm_scores = ScoresClient.bulk_create_for_locations(course_key, [user.id for user in users], scorable_locations)
+
+        # The anonymous ids are only used for lookups here, so there's no need to save them.
+        users_by_anonymous_id = {anonymous_id_for_user(user, course_key, save=False): user for user in users}
+        submissions_scores = {user.id: {} for user in users}
+        score_summaries = ScoreSummary.objects.filter(
+            student_item__course_id=str(course_key),
+            student_item__student_id__in=list(users_by_anonymous_id),
+        ).select_related('latest', 'latest__submission', 'student_item')
+        # This mirrors submissions_api.get_scores, for many students at once.
+        for summary in score_summaries:
+            if not summary.latest.is_hidden():
+                user = users_by_anonymous_id[summary.student_item.student_id]
+                submissions_scores[user.id][summary.student_item.item_id] = (
+                    UnannotatedScoreSerializer(summary.latest).data
+                )
+
+        cache = get_cache(_PREFETCHED_SCORES_NAMESPACE)
+        for user in users:
+            cache[cls._prefetched_scores_key(course_key, user.id)] = (
+                csm_scores[user.id], submissions_scores[user.id]
+            )
+
+    @classmethod
+    def clear_prefetched_scores(cls, course_key, users):
+        """
+        Clears the scores cached by `bulk_prefetch_scores` from the RequestCache.
+        """
+        cache = get_cache(_PREFETCHED_SCORES_NAMESPACE)
+        for user in users:
+            cache.pop(cls._prefetched_scores_key(course_key, user.id), None)
+
+    @staticmethod
+    def _prefetched_scores_key(course_key, user_id):
+        return u'{}.{}'.format(course_key, user_id)
+
     def __init__(self, student, course=None, course_structure=None, course_data=None):
         self.student = student
         self.course_data = course_data or CourseData(student, course=course, structure=course_structure)
@@ -104,6 +157,9 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns all the scores stored in the user
         state (in CSM) for the course, while caching the result.
         """
+        prefetched_scores = self._prefetched_scores
+        if prefetched_scores is not None:
+            return prefetched_scores[0]
         scorable_locations = [block_key for block_key in self.course_data.structure if possibly_scored(block_key)]
         return ScoresClient.create_for_locations(self.course_data.course_key, self.student.id, scorable_locations)
 
@@ -113,9 +169,22 @@ class SubsectionGradeFactory(object):
         Lazily queries and returns the scores stored by the
         Submissions API for the course, while caching the result.
         """
+        prefetched_scores = self._prefetched_scores
+        if prefetched_scores is not None:
+            return prefetched_scores[1]
         anonymous_user_id = anonymous_id_for_user(self.student, self.course_data.course_key)
         return submissions_api.get_scores(str(self.course_data.course_key), anonymous_user_id)
 
+    @lazy
+    def _prefetched_scores(self):
+        """
+        Returns the (CSM scores, submissions scores) prefetched for the
+        student by `bulk_prefetch_scores`, or None if they were not.
+        """
+        return get_cache(_PREFETCHED_SCORES_NAMESPACE).get(
+            self._prefetched_scores_key(self.course_data.course_key, self.student.id)
+        )
+
     def _get_bulk_cached_grade(self, subsection):
         """
         Returns the student's SubsectionGrade for the subsection,
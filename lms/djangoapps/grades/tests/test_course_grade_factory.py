@@ -19,6 +19,7 @@ from ..config.waffle import ASSUME_ZERO_GRADE_IF_ABSENT, waffle
 from ..course_grade import CourseGrade, ZeroCourseGrade
 from ..course_grade_factory import CourseGradeFactory
 from ..subsection_grade import ReadSubsectionGrade, ZeroSubsectionGrade
+from ..subsection_grade_factory import SubsectionGradeFactory
 from .base import GradeTestBase
 from .utils import mock_get_score
 
@@ -296,6 +297,25 @@ class TestGradeIteration(SharedModuleStoreTestCase):
             self.assertIsNone(course_grade.letter_grade)
             self.assertEqual(course_grade.percent, 0.0)
 
+    def test_bulk_prefetch_state(self):
+        """
+        In bulk mode, the grading state is prefetched once per batch of
+        students, and every student is still graded.
+        """
+        with patch.object(CourseGradeFactory, 'BULK_PREFETCH_BATCH_SIZE', 2):
+            with patch.object(
+                SubsectionGradeFactory,
+                'bulk_prefetch_scores',
+                wraps=SubsectionGradeFactory.bulk_prefetch_scores,
+            ) as mock_prefetch_scores:
+                grade_results = list(CourseGradeFactory().iter(self.students, self.course, bulk_prefetch_state=True))
+
+        self.assertEqual(mock_prefetch_scores.call_count, 3)
+        self.assertEqual([result.student for result in grade_results], self.students)
+        for result in grade_results:
+            self.assertIsNone(result.error)
+            self.assertEqual(result.course_grade.percent, 0.0)
+
     @patch('lms.djangoapps.grades.course_grade_factory.CourseGradeFactory.read')
     def test_grading_exception(self, mock_course_grade):
         """Test that we correctly capture exception messages that bubble up from
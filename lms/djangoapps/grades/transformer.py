@@ -135,11 +135,22 @@ class GradesTransformer(BlockStructureTransformer):
     def _collect_max_scores(cls, block_structure):
         """
         Collect the `max_score` for every block in the provided `block_structure`.
+
+        Computing `max_score` can require parsing the problem, so the value from
+        the previous collection is reused for blocks that have not changed since.
         """
         for block_locator in block_structure.post_order_traversal():
             block = block_structure.get_xblock(block_locator)
             if getattr(block, 'has_score', False):
-                cls._collect_max_score(block_structure, block)
+                if block_structure.has_previous_collection(block_locator):
+                    block_structure.set_transformer_block_field(
+                        block_locator,
+                        cls,
+                        'max_score',
+                        block_structure.get_previous_transformer_block_field(block_locator, cls, 'max_score'),
+                    )
+                else:
+                    cls._collect_max_score(block_structure, block)
 
     @classmethod
     def _collect_max_score(cls, block_structure, module):
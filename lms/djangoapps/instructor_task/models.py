@@ -18,15 +18,18 @@ import hashlib
 import json
 import logging
 import os.path
+import tempfile
 from uuid import uuid4
 
+import unicodecsv
 from boto.exception import BotoServerError
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.files.base import ContentFile
+from django.core.files.base import File
 from django.db import models, transaction
 from opaque_keys.edx.django.models import CourseKeyField
 from six import text_type
+from storages.backends.s3boto import S3BotoStorage
 
 from openedx.core.storage import get_storage
 
@@ -269,14 +272,54 @@ class DjangoStorageReportStore(ReportStore):
         """
         Given a course_id, filename, and rows (each row is an iterable of
         strings), write the rows to the storage backend in csv format.
+
+        `rows` may be a generator: rows are streamed to the storage backend
+        as they are produced instead of being held in memory.  S3 files
+        opened for writing are sent as a multipart upload, one buffered
+        chunk at a time; other backends are given a temporary file.
+        """
+        if isinstance(self.storage, S3BotoStorage):
+            with self.storage.open(self.path_to(course_id, filename), 'wb') as output_file:
+                self._write_csv(output_file, rows)
+        else:
+            with tempfile.TemporaryFile() as output_file:
+                self._write_csv(output_file, rows)
+                output_file.seek(0)
+                self.store(course_id, filename, File(output_file))
+
+    def _write_csv(self, output_file, rows):
+        """
+        Write `rows` in csv format to the file-like `output_file`.
         """
-        output_buffer = ContentFile('')
         # Adding unicode signature (BOM) for MS Excel 2013 compatibility
-        output_buffer.write(codecs.BOM_UTF8)
-        csvwriter = csv.writer(output_buffer)
-        csvwriter.writerows(self._get_utf8_encoded_rows(rows))
-        output_buffer.seek(0)
-        self.store(course_id, filename, output_buffer)
+        output_file.write(codecs.BOM_UTF8)
+        csvwriter = csv.writer(output_file)
+        for row in self._get_utf8_encoded_rows(rows):
+            csvwriter.writerow(row)
+
+    def read_rows(self, course_id, filename):
+        """
+        Given a course_id and filename of a CSV previously written with
+        `store_rows`, yield its rows as lists of unicode strings.
+        """
+        path = self.path_to(course_id, filename)
+        with self.storage.open(path) as csv_file:
+            for row in unicodecsv.reader(csv_file, encoding='utf-8-sig'):
+                yield row
+
+    def exists(self, course_id, filename):
+        """
+        Return whether a file named `filename` is stored for the given `course_id`.
+        """
+        return self.storage.exists(self.path_to(course_id, filename))
+
+    def delete(self, course_id, filename):
+        """
+        Delete the file named `filename` for the given `course_id`, if it exists.
+        """
+        path = self.path_to(course_id, filename)
+        if self.storage.exists(path):
+            self.storage.delete(path)
 
     def links_for(self, course_id):
         """
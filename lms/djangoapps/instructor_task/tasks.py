@@ -183,10 +183,63 @@ def calculate_grades_csv(entry_id, xmodule_instance_args):
         xmodule_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
+    if CourseGradeReport.is_sharding_enabled():
+        task_fn = partial(CourseGradeReport.generate_sharded, xmodule_instance_args, _create_grades_csv_shard_subtask)
+    else:
+        task_fn = partial(CourseGradeReport.generate, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
 
 
+def _create_grades_csv_shard_subtask(
+    entry_id, xmodule_instance_args, shard_index, min_user_id, max_user_id, subtask_status
+):
+    """
+    Creates a subtask to grade the users of a course within a range of user ids.
+    """
+    return calculate_grades_csv_shard.subtask(
+        (
+            entry_id,
+            xmodule_instance_args,
+            shard_index,
+            min_user_id,
+            max_user_id,
+            subtask_status.to_dict(),
+        ),
+        task_id=subtask_status.task_id,
+        routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+    )
+
+
+@task(routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)
+def calculate_grades_csv_shard(
+    entry_id, xmodule_instance_args, shard_index, min_user_id, max_user_id, subtask_status_dict
+):
+    """
+    Grade the users of a course whose ids are in [min_user_id, max_user_id]
+    and store the rows as a partial grade report.
+
+    Once the last shard has completed, the partial reports are merged by
+    `merge_grades_csv_shards`.
+    """
+    all_shards_done = CourseGradeReport.generate_shard(
+        entry_id, xmodule_instance_args, shard_index, min_user_id, max_user_id, subtask_status_dict
+    )
+    if all_shards_done:
+        merge_grades_csv_shards.apply_async(
+            (entry_id, xmodule_instance_args),
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+
+@task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)
+def merge_grades_csv_shards(entry_id, xmodule_instance_args):
+    """
+    Merge the partial grade reports of a sharded grade report, in order,
+    and push the result to an S3 bucket for download.
+    """
+    return CourseGradeReport.merge_shards(entry_id, xmodule_instance_args)
+
+
 @task(base=BaseInstructorTask, routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY)
 def calculate_problem_grade_report(entry_id, xmodule_instance_args):
     """
@@ -1,17 +1,19 @@
 """
 Functionality for generating grade reports.
 """
+import json
 import logging
 import re
 from collections import defaultdict, OrderedDict
 from datetime import datetime
-from itertools import chain, izip, izip_longest
+from itertools import chain, count, izip, izip_longest
 from time import time
 
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from lazy import lazy
 from opaque_keys.edx.keys import UsageKey
+from celery.states import FAILURE, SUCCESS
 from pytz import UTC
 from six import text_type
 
@@ -24,6 +26,13 @@ from lms.djangoapps.certificates.models import CertificateWhitelist, GeneratedCe
 from lms.djangoapps.grades.context import grading_context, grading_context_for_course
 from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsectionGrade
 from lms.djangoapps.grades.course_grade_factory import CourseGradeFactory
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportStore
+from lms.djangoapps.instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    queue_subtasks_for_query,
+    update_subtask_status
+)
 from lms.djangoapps.teams.models import CourseTeamMembership
 from lms.djangoapps.verify_student.services import IDVerificationService
 from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
@@ -42,6 +51,7 @@ from .utils import upload_csv_to_report_store
 WAFFLE_NAMESPACE = 'instructor_task'
 WAFFLE_SWITCHES = WaffleSwitchNamespace(name=WAFFLE_NAMESPACE)
 OPTIMIZE_GET_LEARNERS_FOR_COURSE = 'optimize_get_learners_for_course'
+SHARD_COURSE_GRADE_REPORTS = 'shard_course_grade_reports'
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
@@ -201,6 +211,9 @@ class CourseGradeReport(object):
     # Batch size for chunking the list of enrollees in the course.
     USER_BATCH_SIZE = 100
 
+    # Number of enrollees graded by each subtask of a sharded grade report.
+    USERS_PER_SHARD = 5000
+
     @classmethod
     def generate(cls, _xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
         """
@@ -210,6 +223,218 @@ class CourseGradeReport(object):
             context = _CourseGradeReportContext(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
             return CourseGradeReport()._generate(context)
 
+    @classmethod
+    def is_sharding_enabled(cls):
+        """
+        Returns whether grade reports should be split across subtasks.
+        """
+        return WAFFLE_SWITCHES.is_enabled(SHARD_COURSE_GRADE_REPORTS)
+
+    @classmethod
+    def generate_sharded(
+        cls, _xmodule_instance_args, create_shard_subtask, _entry_id, course_id, _task_input, action_name
+    ):
+        """
+        Public method to generate a grade report by splitting the enrollees of
+        the course into ranges of user ids and grading each range in its own
+        subtask.  The last subtask to complete queues the step that merges the
+        partial reports, see `merge_shards`.
+
+        `create_shard_subtask` is a function taking the arguments
+        (entry_id, xmodule_instance_args, shard_index, min_user_id, max_user_id, subtask_status)
+        that returns the celery subtask to run for a single shard.
+
+        Small courses, that fit in a single shard, are graded in-process by `generate`.
+        """
+        entry = InstructorTask.objects.get(pk=_entry_id)
+
+        # If subtasks have already been defined, this task is being requeued
+        # (e.g. after losing the connection to the broker): don't queue a
+        # second set of shards.
+        if entry.subtasks and entry.task_output:
+            TASK_LOG.warning(u'Task %s has already queued grade report shards', entry.task_id)
+            return json.loads(entry.task_output)
+
+        enrolled_user_ids = cls._users_in_range(course_id).order_by('id')
+        total_num_users = enrolled_user_ids.count()
+        if total_num_users <= cls.USERS_PER_SHARD:
+            return cls.generate(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name)
+
+        shard_indexes = count()
+
+        def _create_subtask(user_id_items, initial_subtask_status):
+            """
+            Creates the subtask that grades the range of users in `user_id_items`.
+            """
+            user_ids = [item['pk'] for item in user_id_items]
+            return create_shard_subtask(
+                _entry_id,
+                _xmodule_instance_args,
+                next(shard_indexes),
+                min(user_ids),
+                max(user_ids),
+                initial_subtask_status,
+            )
+
+        TASK_LOG.info(
+            u'Task %s: queueing grade report shards for %s users in course %s',
+            entry.task_id,
+            total_num_users,
+            course_id,
+        )
+        return queue_subtasks_for_query(
+            entry,
+            action_name,
+            _create_subtask,
+            [enrolled_user_ids],
+            [],
+            cls.USERS_PER_SHARD,
+            total_num_users,
+        )
+
+    @classmethod
+    def generate_shard(cls, entry_id, xmodule_instance_args, shard_index, min_user_id, max_user_id, subtask_status_dict):
+        """
+        Grades the enrollees whose ids are in [min_user_id, max_user_id] and
+        stores the resulting rows, without headers, as partial reports.
+
+        Progress is accumulated on the parent InstructorTask through its
+        subtask status.  Returns True if this was the last shard to complete,
+        in which case the caller should queue `merge_shards`.
+        """
+        subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+        current_task_id = subtask_status.task_id
+        check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+        entry = InstructorTask.objects.get(pk=entry_id)
+        course_id = entry.course_id
+        context = _CourseGradeReportContext(
+            xmodule_instance_args, entry_id, course_id, json.loads(entry.task_input),
+            json.loads(entry.task_output)['action_name'],
+        )
+        try:
+            with modulestore().bulk_operations(course_id):
+                report = cls()
+                batched_rows = report._batched_rows(context, user_id_range=(min_user_id, max_user_id))
+                success_rows, error_rows = report._compile(context, batched_rows)
+
+            report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+            for csv_name, rows in (('grade_report', success_rows), ('grade_report_err', error_rows)):
+                shard_filename = cls._shard_filename(entry_id, csv_name, shard_index)
+                # Remove the output of an earlier attempt, so it is replaced rather than renamed.
+                report_store.delete(course_id, shard_filename)
+                if rows:
+                    report_store.store_rows(course_id, shard_filename, rows)
+        except Exception:  # pylint: disable=broad-except
+            TASK_LOG.exception(
+                u'%s, Task type: %s, Failed to grade shard %s (users %s to %s)',
+                context.task_info_string,
+                context.action_name,
+                shard_index,
+                min_user_id,
+                max_user_id,
+            )
+            subtask_status.increment(state=FAILURE)
+        else:
+            TASK_LOG.info(
+                u'%s, Task type: %s, Graded shard %s (users %s to %s)',
+                context.task_info_string,
+                context.action_name,
+                shard_index,
+                min_user_id,
+                max_user_id,
+            )
+            subtask_status.increment(succeeded=len(success_rows), failed=len(error_rows), state=SUCCESS)
+
+        return update_subtask_status(entry_id, current_task_id, subtask_status, complete_when_done=False)
+
+    @classmethod
+    def merge_shards(cls, entry_id, xmodule_instance_args):
+        """
+        Stitches the partial reports written by `generate_shard`, in shard
+        order, into the final grade report and marks the parent
+        InstructorTask as completed.
+        """
+        entry = InstructorTask.objects.get(pk=entry_id)
+        course_id = entry.course_id
+        subtask_dict = json.loads(entry.subtasks)
+        task_progress = json.loads(entry.task_output)
+        if subtask_dict['failed'] > 0:
+            msg = u'{} of {} grade report shards failed for course {}'.format(
+                subtask_dict['failed'], subtask_dict['total'], course_id
+            )
+            TASK_LOG.error(msg)
+            raise ValueError(msg)
+
+        with modulestore().bulk_operations(course_id):
+            context = _CourseGradeReportContext(
+                xmodule_instance_args, entry_id, course_id, json.loads(entry.task_input), task_progress['action_name']
+            )
+            report = cls()
+            success_headers = report._success_headers(context)
+
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        shard_indexes = range(subtask_dict['total'])
+
+        def _shard_rows(csv_name):
+            """
+            Yields the rows of every stored shard of `csv_name`, in shard order.
+            """
+            for shard_index in shard_indexes:
+                shard_filename = cls._shard_filename(entry_id, csv_name, shard_index)
+                if report_store.exists(course_id, shard_filename):
+                    for row in report_store.read_rows(course_id, shard_filename):
+                        yield row
+
+        TASK_LOG.info(u'%s, Task type: %s, Merging %s grade report shards',
+                      context.task_info_string, context.action_name, len(shard_indexes))
+        date = datetime.now(UTC)
+        upload_csv_to_report_store(
+            chain([success_headers], _shard_rows('grade_report')), 'grade_report', course_id, date
+        )
+        if task_progress['failed'] > 0:
+            upload_csv_to_report_store(
+                chain([report._error_headers()], _shard_rows('grade_report_err')), 'grade_report_err', course_id, date
+            )
+
+        for shard_index in shard_indexes:
+            for csv_name in ('grade_report', 'grade_report_err'):
+                report_store.delete(course_id, cls._shard_filename(entry_id, csv_name, shard_index))
+
+        task_progress['duration_ms'] = int((time() - task_progress['start_time']) * 1000)
+        task_progress['step'] = u'Completed grades'
+        entry.task_output = InstructorTask.create_output_for_success(task_progress)
+        entry.task_state = SUCCESS
+        entry.save_now()
+        return task_progress
+
+    @staticmethod
+    def _shard_filename(entry_id, csv_name, shard_index):
+        """
+        Returns the name of a partial report.  Partial reports are kept in a
+        sub-directory so that they are not listed as downloadable reports.
+        """
+        return u'shards/{entry_id}/{csv_name}_{shard_index:05d}.csv'.format(
+            entry_id=entry_id,
+            csv_name=csv_name,
+            shard_index=shard_index,
+        )
+
+    @staticmethod
+    def _users_in_range(course_id, min_user_id=None, max_user_id=None):
+        """
+        Returns a queryset of the ids of users enrolled in the given course,
+        optionally restricted to the range [min_user_id, max_user_id].
+        """
+        filter_kwargs = {
+            'courseenrollment__course_id': course_id,
+        }
+        if min_user_id is not None:
+            filter_kwargs['id__gte'] = min_user_id
+        if max_user_id is not None:
+            filter_kwargs['id__lte'] = max_user_id
+        return get_user_model().objects.filter(**filter_kwargs).values_list('id', flat=True)
+
     def _generate(self, context):
         """
         Internal method for generating a grade report for the given context.
@@ -248,11 +473,11 @@ class CourseGradeReport(object):
         """
         return ["Student ID", "Username", "Error"]
 
-    def _batched_rows(self, context):
+    def _batched_rows(self, context, user_id_range=None):
         """
         A generator of batches of (success_rows, error_rows) for this report.
         """
-        for users in self._batch_users(context):
+        for users in self._batch_users(context, user_id_range):
             users = filter(lambda u: u is not None, users)
             yield self._rows_for_users(context, users)
 
@@ -262,7 +487,7 @@ class CourseGradeReport(object):
         the given batched_rows and context.
         """
         # partition and chain successes and errors
-        success_rows, error_rows = izip(*batched_rows)
+        success_rows, error_rows = list(izip(*batched_rows)) or ([], [])
         success_rows = list(chain(*success_rows))
         error_rows = list(chain(*error_rows))
 
@@ -295,9 +520,12 @@ class CourseGradeReport(object):
             grades_header.append(assignment_info['average_header'])
         return grades_header
 
-    def _batch_users(self, context):
+    def _batch_users(self, context, user_id_range=None):
         """
         Returns a generator of batches of users.
+
+        If `user_id_range` is given as a (min_user_id, max_user_id) tuple, only
+        users whose ids fall within that range are returned.
         """
         def grouper(iterable, chunk_size=self.USER_BATCH_SIZE, fillvalue=None):
             args = [iter(iterable)] * chunk_size
@@ -315,7 +543,7 @@ class CourseGradeReport(object):
             users = users.select_related('profile')
             return grouper(users)
 
-        def users_for_course_v2(course_id):
+        def users_for_course_v2(course_id, min_user_id=None, max_user_id=None):
             """
             Get all the enrolled users in a course chunk by chunk.
 
@@ -326,7 +554,7 @@ class CourseGradeReport(object):
                 'courseenrollment__course_id': course_id,
             }
 
-            user_ids_list = get_user_model().objects.filter(**filter_kwargs).values_list('id', flat=True).order_by('id')
+            user_ids_list = self._users_in_range(course_id, min_user_id, max_user_id).order_by('id')
             user_chunks = grouper(user_ids_list)
             for user_ids in user_chunks:
                 user_ids = [user_id for user_id in user_ids if user_id is not None]
@@ -340,6 +568,10 @@ class CourseGradeReport(object):
                 yield users
 
         task_log_message = u'{}, Task type: {}'.format(context.task_info_string, context.action_name)
+        if user_id_range is not None:
+            TASK_LOG.info(u'%s, Creating Course Grade for users %s to %s', task_log_message, *user_id_range)
+            return users_for_course_v2(context.course_id, *user_id_range)
+
         if WAFFLE_SWITCHES.is_enabled(OPTIMIZE_GET_LEARNERS_FOR_COURSE):
             TASK_LOG.info(u'%s, Creating Course Grade with optimization', task_log_message)
             return users_for_course_v2(context.course_id)
@@ -506,10 +738,12 @@ class ProblemGradeReport(object):
         """
         Generate a CSV containing all students' problem grades within a given
         `course_id`.
+
+        Rows are streamed to the report store as students are graded, so
+        memory use does not grow with the number of students.
         """
         start_time = time()
         start_date = datetime.now(UTC)
-        status_interval = 100
         enrolled_students = CourseEnrollment.objects.users_enrolled_in(course_id, include_inactive=True)
         task_progress = TaskProgress(action_name, enrolled_students.count(), start_time)
 
@@ -522,15 +756,38 @@ class ProblemGradeReport(object):
         graded_scorable_blocks = cls._graded_scorable_blocks_to_header(course)
 
         # Just generate the static fields for now.
-        rows = [list(header_row.values()) + ['Enrollment Status', 'Grade'] + _flatten(graded_scorable_blocks.values())]
+        header = list(header_row.values()) + ['Enrollment Status', 'Grade'] + _flatten(graded_scorable_blocks.values())
         error_rows = [list(header_row.values()) + ['error_msg']]
-        current_step = {'step': 'Calculating Grades'}
 
         # Bulk fetch and cache enrollment states so we can efficiently determine
         # whether each user is currently enrolled in the course.
         CourseEnrollment.bulk_fetch_enrollment_states(enrolled_students, course_id)
 
-        for student, course_grade, error in CourseGradeFactory().iter(enrolled_students, course):
+        rows = cls._rows_for_users(
+            enrolled_students, course, header_row, graded_scorable_blocks, task_progress, error_rows
+        )
+
+        # Perform the upload if any students have been successfully graded
+        first_row = next(rows, None)
+        if first_row is not None:
+            upload_csv_to_report_store(chain([header, first_row], rows), 'problem_grade_report', course_id, start_date)
+        # If there are any error rows, write them out as well
+        if len(error_rows) > 1:
+            upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
+
+        return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
+
+    @classmethod
+    def _rows_for_users(cls, users, course, header_row, graded_scorable_blocks, task_progress, error_rows):
+        """
+        A generator of the report rows of the given users that could be
+        graded.  Rows for users that failed to be graded are appended to
+        `error_rows`, and `task_progress` is updated as users are graded.
+        """
+        status_interval = 100
+        current_step = {'step': 'Calculating Grades'}
+
+        for student, course_grade, error in CourseGradeFactory().iter(users, course, bulk_prefetch_state=True):
             student_fields = [getattr(student, field_name) for field_name in header_row]
             task_progress.attempted += 1
 
@@ -543,7 +800,7 @@ class ProblemGradeReport(object):
                 task_progress.failed += 1
                 continue
 
-            enrollment_status = _user_enrollment_status(student, course_id)
+            enrollment_status = _user_enrollment_status(student, course.id)
 
             earned_possible_values = []
             for block_location in graded_scorable_blocks:
@@ -557,21 +814,12 @@ class ProblemGradeReport(object):
                     else:
                         earned_possible_values.append([u'Not Attempted', problem_score.possible])
 
-            rows.append(student_fields + [enrollment_status, course_grade.percent] + _flatten(earned_possible_values))
+            yield student_fields + [enrollment_status, course_grade.percent] + _flatten(earned_possible_values)
 
             task_progress.succeeded += 1
             if task_progress.attempted % status_interval == 0:
                 task_progress.update_task_state(extra_meta=current_step)
 
-        # Perform the upload if any students have been successfully graded
-        if len(rows) > 1:
-            upload_csv_to_report_store(rows, 'problem_grade_report', course_id, start_date)
-        # If there are any error rows, write them out as well
-        if len(error_rows) > 1:
-            upload_csv_to_report_store(error_rows, 'problem_grade_report_err', course_id, start_date)
-
-        return task_progress.update_task_state(extra_meta={'step': 'Uploading CSV'})
-
     @classmethod
     def _graded_scorable_blocks_to_header(cls, course):
         """
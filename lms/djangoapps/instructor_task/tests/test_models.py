@@ -1,3 +1,4 @@
+# -*- coding: utf-8 -*-
 """
 Tests for instructor_task/models.py.
 """
@@ -51,6 +52,22 @@ class ReportStoreTestMixin(object):
             ['new_file', 'middle_file', 'old_file']
         )
 
+    def test_store_rows_from_generator(self):
+        """
+        Test that rows produced by a generator are streamed to storage and
+        can be read back.
+        """
+        report_store = self.create_report_store()
+        rows = [[u'Student ID', u'Username']] + [[unicode(index), u'üser_{}'.format(index)] for index in range(100)]
+
+        report_store.store_rows(self.course_id, 'report.csv', (row for row in rows))
+
+        self.assertTrue(report_store.exists(self.course_id, 'report.csv'))
+        self.assertEqual(list(report_store.read_rows(self.course_id, 'report.csv')), rows)
+
+        report_store.delete(self.course_id, 'report.csv')
+        self.assertFalse(report_store.exists(self.course_id, 'report.csv'))
+
 
 class LocalFSReportStoreTestCase(ReportStoreTestMixin, TestReportMixin, SimpleTestCase):
     """
@@ -1,11 +1,19 @@
 """
 Unit tests for instructor_task subtasks.
 """
+import json
 from uuid import uuid4
 
+from celery.states import SUCCESS
 from mock import Mock, patch
 
-from lms.djangoapps.instructor_task.subtasks import queue_subtasks_for_query
+from lms.djangoapps.instructor_task.models import PROGRESS, InstructorTask
+from lms.djangoapps.instructor_task.subtasks import (
+    SubtaskStatus,
+    initialize_subtask_info,
+    queue_subtasks_for_query,
+    update_subtask_status
+)
 from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.instructor_task.tests.test_base import InstructorTaskCourseTestCase
 from student.models import CourseEnrollment
@@ -80,3 +88,37 @@ class TestSubtasks(InstructorTaskCourseTestCase):
         self.assertEqual(len(mock_create_subtask_fcn_args[0][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[1][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[2][0][0]), 5)
+
+    def _initialize_subtasks(self, subtask_ids):
+        """Create an InstructorTask with the given subtasks defined."""
+        instructor_task = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+        initialize_subtask_info(instructor_task, 'action_name', len(subtask_ids), subtask_ids)
+        return instructor_task
+
+    def _complete_subtask(self, instructor_task, subtask_id, **kwargs):
+        """Report the subtask as having succeeded for one item."""
+        subtask_status = SubtaskStatus.create(subtask_id, succeeded=1, state=SUCCESS)
+        return update_subtask_status(instructor_task.id, subtask_id, subtask_status, **kwargs)
+
+    def test_update_subtask_status_reports_last_subtask(self):
+        subtask_ids = [str(uuid4()), str(uuid4())]
+        instructor_task = self._initialize_subtasks(subtask_ids)
+
+        self.assertFalse(self._complete_subtask(instructor_task, subtask_ids[0]))
+        self.assertEqual(InstructorTask.objects.get(pk=instructor_task.id).task_state, PROGRESS)
+        self.assertTrue(self._complete_subtask(instructor_task, subtask_ids[1]))
+        self.assertEqual(InstructorTask.objects.get(pk=instructor_task.id).task_state, SUCCESS)
+
+    def test_update_subtask_status_without_completing(self):
+        subtask_ids = [str(uuid4())]
+        instructor_task = self._initialize_subtasks(subtask_ids)
+
+        self.assertTrue(self._complete_subtask(instructor_task, subtask_ids[0], complete_when_done=False))
+        instructor_task = InstructorTask.objects.get(pk=instructor_task.id)
+        self.assertEqual(instructor_task.task_state, PROGRESS)
+        self.assertEqual(json.loads(instructor_task.task_output)['succeeded'], 1)
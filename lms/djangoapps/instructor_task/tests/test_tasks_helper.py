@@ -8,15 +8,18 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 
 """
 
+import json
 import os
 import shutil
 import tempfile
 import urllib
 from contextlib import contextmanager
 from datetime import datetime, timedelta
+from uuid import uuid4
 
 import ddt
 import unicodecsv
+from celery.states import SUCCESS
 from capa.tests.response_xml_factory import MultipleChoiceResponseXMLFactory
 from course_modes.models import CourseMode
 from course_modes.tests.factories import CourseModeFactory
@@ -88,7 +91,8 @@ from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
 from openedx.core.djangoapps.credit.tests.factories import CreditCourseFactory
 from openedx.core.djangoapps.user_api.partition_schemes import RandomUserPartitionScheme
 from openedx.core.djangoapps.util.testing import ContentGroupTestCase, TestConditionalContent
-from ..models import ReportStore
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
+from ..models import PROGRESS, InstructorTask, ReportStore
 from ..tasks_helper.utils import UPDATE_STATUS_FAILED, UPDATE_STATUS_SUCCEEDED
 
 
@@ -442,6 +446,79 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
         )
 
 
+class TestShardedInstructorGradeReport(InstructorGradeReportTestCase):
+    """
+    Tests that grade reports split across subtasks are merged correctly.
+    """
+    def setUp(self):
+        super(TestShardedInstructorGradeReport, self).setUp()
+        self.course = CourseFactory.create()
+        self.students = [self.create_student(u'student{}'.format(index)) for index in range(3)]
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='grade_course',
+        )
+
+    def _queue_shards(self, users_per_shard):
+        """
+        Runs the parent task of a sharded report and returns the arguments
+        of the shards it queued.
+        """
+        shards = []
+
+        def create_shard_subtask(_entry_id, _xmodule_instance_args, *shard_args):
+            shards.append(shard_args[:-1] + (shard_args[-1].to_dict(),))
+            return Mock()
+
+        with patch.object(CourseGradeReport, 'USERS_PER_SHARD', users_per_shard):
+            with patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task'):
+                CourseGradeReport.generate_sharded(
+                    None, create_shard_subtask, self.entry.id, self.course.id, None, 'graded'
+                )
+        return shards
+
+    def test_small_course_is_not_sharded(self):
+        self.assertEqual(self._queue_shards(users_per_shard=10), [])
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        self.assertEqual(len(report_store.links_for(self.course.id)), 1)
+
+    def test_sharded_report(self):
+        shards = self._queue_shards(users_per_shard=2)
+        self.assertEqual([shard[:3] for shard in shards], [
+            (0, self.students[0].id, self.students[1].id),
+            (1, self.students[2].id, self.students[2].id),
+        ])
+
+        # Shards may complete in any order; only the last one reports completion.
+        all_done = [CourseGradeReport.generate_shard(self.entry.id, None, *shard) for shard in reversed(shards)]
+        self.assertEqual(all_done, [False, True])
+        self.assertEqual(InstructorTask.objects.get(pk=self.entry.id).task_state, PROGRESS)
+
+        CourseGradeReport.merge_shards(self.entry.id, None)
+        entry = InstructorTask.objects.get(pk=self.entry.id)
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertDictContainsSubset({'attempted': 3, 'succeeded': 3, 'failed': 0}, json.loads(entry.task_output))
+
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        links = report_store.links_for(self.course.id)
+        self.assertEqual(len(links), 1)
+        with report_store.storage.open(report_store.path_to(self.course.id, links[0][0])) as csv_file:
+            usernames = [row['Username'] for row in unicodecsv.DictReader(csv_file, encoding='utf-8-sig')]
+        self.assertEqual(usernames, [student.username for student in self.students])
+
+    @patch('lms.djangoapps.grades.course_grade_factory.CourseGradeFactory.iter')
+    def test_failed_shard_fails_merge(self, mock_grades_iter):
+        shards = self._queue_shards(users_per_shard=2)
+        mock_grades_iter.side_effect = Exception('Cannot grade students')
+        for shard in shards:
+            CourseGradeReport.generate_shard(self.entry.id, None, *shard)
+
+        with self.assertRaises(ValueError):
+            CourseGradeReport.merge_shards(self.entry.id, None)
+
+
 class TestTeamGradeReport(InstructorGradeReportTestCase):
     """ Test that teams appear correctly in the grade report when it is enabled for the course. """
 
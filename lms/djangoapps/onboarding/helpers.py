@@ -11,7 +11,7 @@ from django.core import serializers
 
 from common.lib.mandrill_client.client import MandrillClient
 from mailchimp_pipeline.signals.handlers import update_user_email_in_mailchimp
-from nodebb.tasks import task_update_user_profile_on_nodebb
+from nodebb.models import NodeBBProfileUpdate
 from oef.models import OrganizationOefUpdatePrompt
 from lms.djangoapps.onboarding.constants import ORG_SEARCH_TERM_LENGTH
 from lms.djangoapps.onboarding.models import (
@@ -8109,8 +8109,7 @@ def update_user_email(user, old_email, new_email):
     data_to_sync = {
         "email": new_email
     }
-    task_update_user_profile_on_nodebb.delay(
-        username=user.username, profile_data=data_to_sync)
+    NodeBBProfileUpdate.enqueue(user, data_to_sync)
 
     # update email manually in platform database, where required
     ManualEnrollmentAudit.objects.filter(enrolled_email=old_email).update(enrolled_email=new_email)
@@ -0,0 +1 @@
+default_app_config = 'lms.djangoapps.philu_overrides.apps.PhiluOverridesConfig'
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class PhiluOverridesConfig(AppConfig):
+    name = u'lms.djangoapps.philu_overrides'
+
+    def ready(self):
+        """
+        Connect signal handlers.
+        """
+        import lms.djangoapps.philu_overrides.handlers  # pylint: disable=unused-variable
@@ -0,0 +1,128 @@
+"""
+Cached rerun families of courses.
+
+The rerun family of a course is the course itself and its successful reruns,
+ordered by start date, with the dates needed to pick the current and upcoming
+classes of the course.  Families are cached per source course, built with a
+fixed number of queries however many are needed at once, and invalidated by
+the handlers of this app when a rerun succeeds or the overview or custom
+settings of a course change.  Since reruns are created and courses published
+from Studio, where those handlers don't run, cached families also expire after
+RERUN_FAMILY_CACHE_TIMEOUT.
+"""
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from course_action_state.models import CourseRerunState
+from custom_settings.models import CustomSettings
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+
+RERUN_FAMILY_CACHE_KEY = 'philu_overrides.rerun_family.{course_key}'
+RERUN_FAMILY_CACHE_TIMEOUT = 5 * 60
+
+CourseRun = namedtuple('CourseRun', [
+    'id', 'is_rerun', 'start', 'end', 'enrollment_start', 'enrollment_end', 'course_open_date', 'self_paced',
+])
+
+
+def get_rerun_family(course_key):
+    """
+    Return the rerun family of the course, as a list of CourseRun ordered by start date.
+    """
+    return get_rerun_families([course_key])[course_key]
+
+
+def get_rerun_families(course_keys):
+    """
+    Return a dict mapping each of the given course keys to its rerun family.
+    """
+    cache_keys = {course_key: RERUN_FAMILY_CACHE_KEY.format(course_key=course_key) for course_key in course_keys}
+    cached_families = cache.get_many(cache_keys.values())
+    families = {
+        course_key: cached_families[cache_key]
+        for course_key, cache_key in cache_keys.items() if cache_key in cached_families
+    }
+    missing_course_keys = [course_key for course_key in cache_keys if course_key not in families]
+    if missing_course_keys:
+        built_families = build_rerun_families(missing_course_keys)
+        cache.set_many(
+            {cache_keys[course_key]: family for course_key, family in built_families.items()},
+            RERUN_FAMILY_CACHE_TIMEOUT
+        )
+        families.update(built_families)
+    return families
+
+
+def build_rerun_families(course_keys):
+    """
+    Build the rerun families of the given courses from the database.
+    """
+    run_ids = {course_key: [course_key] for course_key in course_keys}
+    reruns = CourseRerunState.objects.filter(
+        source_course_key__in=run_ids.keys(), action="rerun", state="succeeded"
+    ).values_list('source_course_key', 'course_key')
+    for course_key, rerun_id in reruns:
+        run_ids[course_key].append(rerun_id)
+
+    all_run_ids = set(run_id for family_run_ids in run_ids.values() for run_id in family_run_ids)
+    course_open_dates = dict(
+        CustomSettings.objects.filter(id__in=all_run_ids).values_list('id', 'course_open_date')
+    )
+    overviews = {
+        overview['id']: overview
+        for overview in CourseOverview.objects.filter(id__in=all_run_ids).values(
+            'id', 'start', 'end', 'enrollment_start', 'enrollment_end', 'self_paced'
+        )
+    }
+
+    families = {}
+    for course_key, family_run_ids in run_ids.items():
+        runs = [
+            CourseRun(
+                id=run_id,
+                is_rerun=run_id != course_key,
+                start=overviews[run_id]['start'],
+                end=overviews[run_id]['end'],
+                enrollment_start=overviews[run_id]['enrollment_start'],
+                enrollment_end=overviews[run_id]['enrollment_end'],
+                course_open_date=course_open_dates.get(run_id) or overviews[run_id]['start'],
+                self_paced=overviews[run_id]['self_paced'],
+            )
+            for run_id in family_run_ids if run_id in overviews
+        ]
+        families[course_key] = sorted(runs, key=lambda run: (run.start is not None, run.start))
+    return families
+
+
+def invalidate_rerun_families(*course_keys):
+    """
+    Remove the cached families the given courses belong to: their own, and
+    those of the courses they are reruns of.
+    """
+    course_keys = [course_key for course_key in course_keys if course_key is not None]
+    source_course_keys = CourseRerunState.objects.filter(
+        course_key__in=course_keys, action="rerun", state="succeeded"
+    ).values_list('source_course_key', flat=True)
+    cache.delete_many([
+        RERUN_FAMILY_CACHE_KEY.format(course_key=course_key)
+        for course_key in set(course_keys) | set(source_course_keys)
+    ])
+
+
+def get_current_run(course_runs, current_time):
+    """
+    Return the run which started last among those which are ongoing, or None.
+    """
+    ongoing_runs = [
+        run for run in course_runs
+        if run.start and run.end and run.start <= current_time <= run.end
+    ]
+    return ongoing_runs[-1] if ongoing_runs else None
+
+
+def get_upcoming_runs(course_runs, current_time):
+    """
+    Return the runs which haven't started yet, ordered by start date.
+    """
+    return [run for run in course_runs if run.start and run.start > current_time]
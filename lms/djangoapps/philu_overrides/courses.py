@@ -0,0 +1,49 @@
+"""
+Cached data of courses shared by the course listings of philu_overrides and
+of the course card catalog.
+
+The first chapter of a course is cached per version of its overview, which
+Studio saves again whenever the course is published, so a publish is seen
+right away although the handlers of this app don't run in Studio.
+"""
+from django.core.cache import cache
+from xmodule.modulestore.django import modulestore
+
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from student.models import CourseEnrollment
+
+FIRST_CHAPTER_CACHE_KEY = 'philu_overrides.first_chapter.{course_key}.{version}'
+FIRST_CHAPTER_CACHE_TIMEOUT = 60 * 60
+
+
+def get_enrolled_course_ids(user, course_ids):
+    """
+    Return the set of the given courses in which the user is actively enrolled.
+    """
+    if not user.is_authenticated or not course_ids:
+        return set()
+    return set(CourseEnrollment.objects.filter(
+        user=user, is_active=True, course_id__in=course_ids
+    ).values_list('course_id', flat=True))
+
+
+def get_course_first_chapter_keys(course_key):
+    """
+    Return the url names of the first chapter of the course and of its
+    first section, either of which is empty if there is none.  Chapters
+    and sections only visible to staff are skipped.
+    """
+    version = CourseOverview.objects.filter(id=course_key).values_list('modified', flat=True).first()
+    cache_key = FIRST_CHAPTER_CACHE_KEY.format(
+        course_key=course_key, version=version.strftime('%Y%m%d%H%M%S%f') if version else ''
+    )
+    first_chapter_keys = cache.get(cache_key)
+    if first_chapter_keys is None:
+        first_chapter_keys = ('', '')
+        course = modulestore().get_course(course_key, depth=2)
+        chapters = [chapter for chapter in course.get_children() if not chapter.visible_to_staff_only]
+        if chapters:
+            sections = [section for section in chapters[0].get_children() if not section.visible_to_staff_only]
+            first_chapter_keys = (chapters[0].url_name, sections[0].url_name if sections else '')
+        cache.set(cache_key, first_chapter_keys, FIRST_CHAPTER_CACHE_TIMEOUT)
+    return first_chapter_keys
@@ -0,0 +1,29 @@
+"""
+Signal handlers keeping the cached rerun families up to date.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from course_action_state.models import CourseRerunState
+from custom_settings.models import CustomSettings
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+
+from .course_reruns import invalidate_rerun_families
+
+
+@receiver(post_save, sender=CourseRerunState)
+def invalidate_rerun_families_on_rerun(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    When a rerun succeeds, it joins the family of the course it was created from.
+    """
+    invalidate_rerun_families(instance.course_key, instance.source_course_key)
+
+
+@receiver(post_save, sender=CourseOverview)
+@receiver(post_delete, sender=CourseOverview)
+@receiver(post_save, sender=CustomSettings)
+def invalidate_rerun_families_on_course_change(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    When the dates of a course or its open date change, so does the order of its family.
+    """
+    invalidate_rerun_families(instance.id)
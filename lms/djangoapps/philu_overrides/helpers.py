@@ -64,25 +64,26 @@ def get_course_next_classes(request, course):
     """
 
     # imports to avoid circular dependencies
+    from django.conf import settings
+    from django.core.urlresolvers import reverse
     from lms.djangoapps.courseware.access import _can_enroll_courselike
-    from lms.djangoapps.courseware.views.views import registered_for_course
+    from lms.djangoapps.philu_overrides.courses import get_course_first_chapter_keys, get_enrolled_course_ids
     from student.models import CourseEnrollment
-    from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
+    # The classes are summarized from their course overviews, so that none of them is loaded from the modulestore.
     courses = get_all_reruns_of_a_course(course)
+    registered_course_ids = get_enrolled_course_ids(request.user, [_course.id for _course in courses])
+    full_course_ids = CourseEnrollment.objects.full_course_ids(courses)
 
     course_next_classes = []
 
     for _course in courses:
-        course_key = SlashSeparatedCourseKey.from_deprecated_string(_course.id.__str__())
-        course = get_course_by_id(course_key)
-        course.course_open_date = _course.course_open_date
-        registered = registered_for_course(course, request.user)
+        registered = _course.id in registered_course_ids
 
         # Used to provide context to message to student if enrollment not allowed
-        can_enroll = _can_enroll_courselike(request.user, course)
-        invitation_only = course.invitation_only
-        is_course_full = CourseEnrollment.objects.is_course_full(course)
+        can_enroll = _can_enroll_courselike(request.user, _course)
+        invitation_only = _course.invitation_only
+        is_course_full = _course.id in full_course_ids
 
         # Register button should be disabled if one of the following is true:
         # - Student is already registered for course
@@ -91,9 +92,11 @@ def get_course_next_classes(request, course):
         active_reg_button = not (registered or is_course_full or not can_enroll)
         course_first_chapter_link = ""
         if request.user.is_authenticated() and request.user.is_staff:
-            # imported get_course_first_chapter_link here because importing above was throwing circular exception
-            from openedx.core.djangoapps.timed_notification.core import get_course_first_chapter_link
-            course_first_chapter_link = get_course_first_chapter_link(_course)
+            first_chapter_url, first_section = get_course_first_chapter_keys(_course.id)
+            course_first_chapter_link = settings.LMS_ROOT_URL + reverse(
+                'courseware_section',
+                args=[_course.id.to_deprecated_string(), first_chapter_url, first_section]
+            )
 
         course_next_classes.append({
             'user': request.user,
@@ -101,7 +104,7 @@ def get_course_next_classes(request, course):
             'is_course_full': is_course_full,
             'can_enroll': can_enroll.has_access,
             'invitation_only': invitation_only,
-            'course': course,
+            'course': _course,
             'active_reg_button': active_reg_button,
             'course_first_chapter_link': course_first_chapter_link
         })
@@ -114,20 +117,19 @@ def get_all_reruns_of_a_course(course):
     :return reruns:
     """
     from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
-    from course_action_state.models import CourseRerunState
-    from openedx.features.course_card.helpers import get_course_open_date
-    courses = []
+    from lms.djangoapps.philu_overrides.course_reruns import get_rerun_family, get_upcoming_runs
     current_time = datetime.utcnow().replace(tzinfo=utc)
-    course_rerun_states = [crs.course_key for crs in CourseRerunState.objects.filter(
-        source_course_key=course.id, action="rerun", state="succeeded")] + [course.id]
-    course_rerun_objects = CourseOverview.objects.select_related('image_set').filter(
-        id__in=course_rerun_states).order_by('start')
-    for course_run in course_rerun_objects:
+    upcoming_runs = get_upcoming_runs(get_rerun_family(course.id), current_time)
+    if not upcoming_runs:
+        return []
 
-        course_open_date = get_course_open_date(course_run)
-        if course_run.start > current_time:
-            course_run.course_open_date = course_open_date
-            courses.append(course_run)
+    course_overviews = CourseOverview.objects.select_related('image_set').in_bulk([run.id for run in upcoming_runs])
+    courses = []
+    for course_run in upcoming_runs:
+        course_overview = course_overviews.get(course_run.id)
+        if course_overview:
+            course_overview.course_open_date = course_run.course_open_date
+            courses.append(course_overview)
 
     return courses
 
@@ -143,13 +145,11 @@ def get_user_current_enrolled_class(request, course):
     from django.core.urlresolvers import reverse
     from opaque_keys.edx.locations import SlashSeparatedCourseKey
     from lms.djangoapps.philu_overrides.courseware.views.views import get_course_related_keys
+    from lms.djangoapps.philu_overrides.course_reruns import get_rerun_family
     from student.models import CourseEnrollment
-    from course_action_state.models import CourseRerunState
 
-    all_course_reruns = [crs.course_key for crs in CourseRerunState.objects.filter(
-        source_course_key=course.id, action="rerun", state="succeeded")] + [course.id]
     current_time = datetime.utcnow().replace(tzinfo=utc)
-    current_class = get_course_current_class(all_course_reruns, current_time)
+    current_class = get_course_current_class(get_rerun_family(course.id), current_time)
 
     current_enrolled_class = False
     if current_class:
@@ -169,20 +169,21 @@ def get_user_current_enrolled_class(request, course):
     return current_class, current_enrolled_class, current_enrolled_class_target
 
 
-def get_course_current_class(all_course_reruns, current_time):
+def get_course_current_class(course_runs, current_time):
+    """
+    Return the overview of the ongoing run of the rerun family which started
+    last, with its course_open_date, or None.
+    """
     from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
-    from openedx.features.course_card.helpers import get_course_open_date
-    course = CourseOverview.objects.select_related('image_set').filter(
-        id__in=all_course_reruns, start__lte=current_time, end__gte=current_time).order_by('-start').first()
+    from lms.djangoapps.philu_overrides.course_reruns import get_current_run
+    current_run = get_current_run(course_runs, current_time)
+    if not current_run:
+        return None
 
+    course = CourseOverview.objects.select_related('image_set').filter(id=current_run.id).first()
     if course:
-        course_open_date = get_course_open_date(course)
-
-        if course.start <= current_time:
-            course.course_open_date = course_open_date
-            return course
-        else:
-            return None
+        course.course_open_date = current_run.course_open_date
+    return course
 
 
 def is_user_enrolled_in_any_class(course_current_class, course_next_classes):
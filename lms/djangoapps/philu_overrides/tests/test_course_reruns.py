@@ -0,0 +1,97 @@
+"""Tests for the cached rerun families of courses."""
+from datetime import datetime, timedelta
+
+import pytz
+from django.core.cache import cache
+from django.test.utils import override_settings
+
+from course_action_state.models import CourseRerunState
+from custom_settings.models import CustomSettings
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from student.tests.factories import UserFactory
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory
+
+from lms.djangoapps.philu_overrides.course_reruns import (
+    get_current_run,
+    get_rerun_families,
+    get_rerun_family,
+    get_upcoming_runs
+)
+
+utc = pytz.UTC
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'philu_overrides_rerun_families',
+    }
+})
+class RerunFamilyTestCase(ModuleStoreTestCase):
+    """Tests for building, caching and invalidating rerun families."""
+
+    def setUp(self):
+        super(RerunFamilyTestCase, self).setUp()
+        cache.clear()
+        self.staff = UserFactory(is_staff=True)
+        self.course = self.create_course('2015_Q1')
+        self.other_course = self.create_course('2015_Q1', number='CS102')
+        self.re_run_course = self.create_course('2015_Q2')
+        CourseRerunState.objects.initiated(self.course.id, self.re_run_course.id, self.staff,
+                                           display_name=self.re_run_course.display_name)
+        CourseRerunState.objects.succeeded(course_key=self.re_run_course.id)
+
+        self.set_course_dates(self.course, -10, 20)
+        self.set_course_dates(self.re_run_course, 15, 30)
+
+    def create_course(self, run, number='CS101'):
+        """Create a course along with its overview."""
+        course = CourseFactory.create(org='edX', number=number, run=run, default_store=ModuleStoreEnum.Type.split)
+        CourseOverview.load_from_module_store(course.id)
+        return course
+
+    def set_course_dates(self, course, start, end):
+        """Set the start and end of the course to the given number of days from now."""
+        course_overview = CourseOverview.get_from_id(course.id)
+        course_overview.start = datetime.utcnow().replace(tzinfo=utc) + timedelta(days=start)
+        course_overview.end = datetime.utcnow().replace(tzinfo=utc) + timedelta(days=end)
+        course_overview.save()
+
+    def test_family(self):
+        family = get_rerun_family(self.course.id)
+
+        self.assertEqual([run.id for run in family], [self.course.id, self.re_run_course.id])
+        self.assertEqual([run.is_rerun for run in family], [False, True])
+        self.assertEqual([run.course_open_date for run in family], [run.start for run in family])
+
+        current_time = datetime.utcnow().replace(tzinfo=utc)
+        self.assertEqual(get_current_run(family, current_time).id, self.course.id)
+        self.assertEqual([run.id for run in get_upcoming_runs(family, current_time)], [self.re_run_course.id])
+        self.assertIsNone(get_current_run(family, current_time + timedelta(days=60)))
+
+    def test_bulk_lookup(self):
+        with self.assertNumQueries(3):
+            families = get_rerun_families([self.course.id, self.other_course.id])
+        self.assertEqual([run.id for run in families[self.other_course.id]], [self.other_course.id])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_rerun_families([self.course.id, self.other_course.id]), families)
+
+    def test_invalidation(self):
+        get_rerun_family(self.course.id)
+
+        # The rerun starts before its parent now.
+        self.set_course_dates(self.re_run_course, -60, -30)
+        self.assertEqual([run.id for run in get_rerun_family(self.course.id)], [self.re_run_course.id, self.course.id])
+
+        course_open_date = datetime.utcnow().replace(tzinfo=utc) + timedelta(days=2)
+        CustomSettings(id=self.course.id, course_short_id=1, course_open_date=course_open_date).save()
+        self.assertEqual(get_rerun_family(self.course.id)[1].course_open_date, course_open_date)
+
+        new_re_run_course = self.create_course('2015_Q3')
+        CourseRerunState.objects.initiated(self.course.id, new_re_run_course.id, self.staff,
+                                           display_name=new_re_run_course.display_name)
+        CourseRerunState.objects.succeeded(course_key=new_re_run_course.id)
+        self.assertIn(new_re_run_course.id, [run.id for run in get_rerun_family(self.course.id)])
@@ -0,0 +1,75 @@
+"""Tests for the helpers resolving the classes of a course."""
+from datetime import datetime, timedelta
+
+import pytz
+from django.test.client import RequestFactory
+
+from course_action_state.models import CourseRerunState
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from student.models import CourseEnrollment
+from student.tests.factories import UserFactory
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, check_mongo_calls
+
+from lms.djangoapps.philu_overrides.helpers import get_course_next_classes
+
+utc = pytz.UTC
+
+
+class CourseNextClassesTestCase(ModuleStoreTestCase):
+    """Tests for get_course_next_classes."""
+
+    def setUp(self):
+        super(CourseNextClassesTestCase, self).setUp()
+        self.user = UserFactory()
+        self.staff = UserFactory(is_staff=True)
+        self.course = self.create_course('2015_Q1', -10, 20)
+        self.next_classes = [
+            self.create_course('2015_Q2', 30, 60, max_student_enrollments_allowed=1),
+            self.create_course('2015_Q3', 90, 120),
+        ]
+        for next_class in self.next_classes:
+            CourseRerunState.objects.initiated(self.course.id, next_class.id, self.staff,
+                                               display_name=next_class.display_name)
+            CourseRerunState.objects.succeeded(course_key=next_class.id)
+
+    def create_course(self, run, start, end, **kwargs):
+        """Create a course starting and ending the given number of days from now, with enrollment open."""
+        current_time = datetime.utcnow().replace(tzinfo=utc)
+        course = CourseFactory.create(
+            org='edX', number='CS101', run=run, default_store=ModuleStoreEnum.Type.split,
+            start=current_time + timedelta(days=start), end=current_time + timedelta(days=end),
+            enrollment_start=current_time - timedelta(days=1), enrollment_end=current_time + timedelta(days=start),
+            **kwargs
+        )
+        CourseOverview.load_from_module_store(course.id)
+        return course
+
+    def get_next_classes(self, user):
+        """Return the next classes of the course, for the given user."""
+        request = RequestFactory().get('/')
+        request.user = user
+        return get_course_next_classes(request, CourseOverview.get_from_id(self.course.id))
+
+    def test_next_classes(self):
+        CourseEnrollment.enroll(UserFactory(), self.next_classes[0].id)
+        CourseEnrollment.enroll(self.user, self.next_classes[1].id)
+
+        with check_mongo_calls(0):
+            next_classes = self.get_next_classes(self.user)
+
+        self.assertEqual([next_class['course'].id for next_class in next_classes],
+                         [next_class.id for next_class in self.next_classes])
+        self.assertEqual([next_class['is_course_full'] for next_class in next_classes], [True, False])
+        self.assertEqual([next_class['registered'] for next_class in next_classes], [False, True])
+        self.assertEqual([next_class['active_reg_button'] for next_class in next_classes], [False, False])
+        self.assertEqual([next_class['course_first_chapter_link'] for next_class in next_classes], ['', ''])
+
+    def test_first_chapter_link_for_staff(self):
+        next_classes = self.get_next_classes(self.staff)
+
+        self.assertTrue(all(
+            next_class['course_first_chapter_link'].endswith('/courses/{}/courseware///'.format(next_class['course'].id))
+            for next_class in next_classes
+        ))
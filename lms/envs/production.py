@@ -574,6 +574,8 @@ MONGODB_LOG = AUTH_TOKENS.get('MONGODB_LOG', {})
 EMAIL_HOST_USER = AUTH_TOKENS.get('EMAIL_HOST_USER', '')  # django default is ''
 EMAIL_HOST_PASSWORD = AUTH_TOKENS.get('EMAIL_HOST_PASSWORD', '')  # django default is ''
 
+CONTENTSERVER_DISK_CACHE.update(ENV_TOKENS.get('CONTENTSERVER_DISK_CACHE', {}))
+
 # Datadog for events!
 DATADOG = AUTH_TOKENS.get("DATADOG", {})
 DATADOG.update(ENV_TOKENS.get("DATADOG", {}))
@@ -621,6 +623,11 @@ TRACKING_BACKENDS.update(AUTH_TOKENS.get("TRACKING_BACKENDS", {}))
 EVENT_TRACKING_BACKENDS['tracking_logs']['OPTIONS']['backends'].update(AUTH_TOKENS.get("EVENT_TRACKING_BACKENDS", {}))
 EVENT_TRACKING_BACKENDS['segmentio']['OPTIONS']['processors'][0]['OPTIONS']['whitelist'].extend(
     AUTH_TOKENS.get("EVENT_TRACKING_SEGMENTIO_EMIT_WHITELIST", []))
+TRACKING_INSTRUMENTATION_ENABLED = ENV_TOKENS.get('TRACKING_INSTRUMENTATION_ENABLED', TRACKING_INSTRUMENTATION_ENABLED)
+if TRACKING_INSTRUMENTATION_ENABLED:
+    for tracking_backend in EVENT_TRACKING_BACKENDS.values():
+        if tracking_backend['ENGINE'] == 'eventtracking.backends.routing.RoutingBackend':
+            tracking_backend['ENGINE'] = 'track.instrumentation.InstrumentedRoutingBackend'
 TRACKING_SEGMENTIO_WEBHOOK_SECRET = AUTH_TOKENS.get(
     "TRACKING_SEGMENTIO_WEBHOOK_SECRET",
     TRACKING_SEGMENTIO_WEBHOOK_SECRET
@@ -1121,6 +1128,12 @@ NODEBB_MASTER_TOKEN = AUTH_TOKENS.get('NODEBB_MASTER_TOKEN', None)
 NODEBB_ENDPOINT = ENV_TOKENS.get('NODEBB_ENDPOINT', None)
 NODEBB_RETRY_DELAY = 60
 
+# Pending profile updates of users are sent to NodeBB by a periodic drain
+CELERYBEAT_SCHEDULE['drain-nodebb-profile-updates'] = {
+    'task': 'nodebb.tasks.task_drain_nodebb_profile_updates',
+    'schedule': datetime.timedelta(seconds=ENV_TOKENS.get('NODEBB_PROFILE_UPDATES_DRAIN_INTERVAL', 30)),
+}
+
 # SurveyGizmo settings
 SURVEY_GIZMO_TOKEN = AUTH_TOKENS.get('SURVEY_GIZMO_TOKEN', None)
 SURVEY_GIZMO_TOKEN_SECRET = AUTH_TOKENS.get('SURVEY_GIZMO_TOKEN_SECRET', None)
@@ -4,6 +4,7 @@ Higher order functions built on the BlockStructureManager to interact with a dja
 from django.core.cache import cache
 from xmodule.modulestore.django import modulestore
 
+from .local_cache import get_local_cache
 from .manager import BlockStructureManager
 
 
@@ -43,6 +44,23 @@ def clear_course_from_cache(course_key):
     get_block_structure_manager(course_key).clear()
 
 
+def clear_course_from_local_cache(course_key):
+    """
+    Removes the block structure for the given course_key from this
+    process's local cache.  Other processes stop using their local
+    copies once the course's block structure is next cached.
+    """
+    get_local_cache().delete(modulestore().make_course_usage_key(course_key))
+
+
+def get_local_cache_stats():
+    """
+    Returns the hit, miss and size counters of this process's local
+    block structure cache.
+    """
+    return get_local_cache().stats()
+
+
 def get_block_structure_manager(course_key):
     """
     Returns the manager for managing Block Structures for the given course.
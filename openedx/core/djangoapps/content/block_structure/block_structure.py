@@ -7,6 +7,8 @@ Module with family of classes for block structures.
 The following internal data structures are implemented:
     _BlockRelations - Data structure for a single block's relations.
     _BlockData - Data structure for a single block's data.
+    _BlockDataMap - Map of usage keys to their block data, optionally
+        backed by lazily decoded columnar storage.
 """
 from copy import deepcopy
 from functools import partial
@@ -360,7 +362,8 @@ class TransformerDataMap(dict):
             self[key] = new_transformer_data
             return new_transformer_data
 
-    def _translate_key(self, key):
+    @staticmethod
+    def _translate_key(key):
         """
         Allows the given key to be either the transformer's class or name,
         always returning the transformer's name.  This allows
@@ -392,6 +395,158 @@ class BlockData(FieldData):
         self.transformer_data = TransformerDataMap()
 
 
+class _BlockDataMap(dict):
+    """
+    Map of a block's usage key to its BlockData.
+
+    Entries of a deserialized block structure are backed by columnar
+    storage (see serializer.BlockDataColumns) and are only assembled
+    into BlockData objects the first time they are accessed.  Single
+    collected fields of a not-yet-assembled block are read directly
+    from their column, so only the columns that are actually used are
+    ever decoded.
+    """
+    def __init__(self, *args, **kwargs):
+        super(_BlockDataMap, self).__init__(*args, **kwargs)
+
+        # Columnar storage backing the pending entries.
+        # BlockDataColumns or None
+        self._columns = None
+
+        # Map of usage keys of not-yet-assembled blocks to their
+        # index in self._columns.
+        # dict {UsageKey: int}
+        self._pending = {}
+
+    @classmethod
+    def from_columns(cls, columns, pending):
+        """
+        Returns a new map whose entries are lazily loaded from the
+        given columns.
+
+        Arguments:
+            columns (BlockDataColumns) - The columnar storage of the
+                blocks' data.
+
+            pending (dict {UsageKey: int}) - Map of usage keys to their
+                index in the given columns.
+        """
+        block_data_map = cls()
+        block_data_map._columns = columns  # pylint: disable=protected-access
+        block_data_map._pending = pending  # pylint: disable=protected-access
+        return block_data_map
+
+    def get_xblock_field(self, usage_key, field_name, default=None):
+        """
+        Returns the collected value of the given xBlock field for the
+        given block; returns default if not found.
+        """
+        index = self._pending.get(usage_key)
+        if index is not None:
+            return self._columns.get_xblock_field(index, field_name, default)
+        block_data = dict.get(self, usage_key)
+        return getattr(block_data, field_name, default) if block_data else default
+
+    def get_transformer_block_field(self, usage_key, transformer, key, default=None):
+        """
+        Returns the value associated with the given key for the given
+        transformer for the given block; returns default if not found.
+        """
+        index = self._pending.get(usage_key)
+        if index is not None:
+            transformer_fields = self._columns.get_transformer_block_fields(
+                index,
+                TransformerDataMap._translate_key(transformer),  # pylint: disable=protected-access
+            )
+            return transformer_fields.get(key, default) if transformer_fields is not None else default
+        try:
+            transformer_data = self[usage_key].transformer_data[transformer]
+        except KeyError:
+            return default
+        return getattr(transformer_data, key, default)
+
+    def __missing__(self, usage_key):
+        index = self._pending.pop(usage_key)
+        block_data = self._columns.create_block_data(usage_key, index)
+        dict.__setitem__(self, usage_key, block_data)
+        return block_data
+
+    def __contains__(self, usage_key):
+        return dict.__contains__(self, usage_key) or usage_key in self._pending
+
+    def __len__(self):
+        return dict.__len__(self) + len(self._pending)
+
+    def __setitem__(self, usage_key, block_data):
+        self._pending.pop(usage_key, None)
+        dict.__setitem__(self, usage_key, block_data)
+
+    def __delitem__(self, usage_key):
+        if self._pending.pop(usage_key, None) is None:
+            dict.__delitem__(self, usage_key)
+
+    def __iter__(self):
+        self._load_all()
+        return dict.__iter__(self)
+
+    def __deepcopy__(self, memo):
+        # Pending entries are re-read from the immutable serialized
+        # columns rather than being decoded only to be copied.
+        block_data_map = _BlockDataMap(
+            (usage_key, deepcopy(block_data, memo)) for usage_key, block_data in dict.iteritems(self)
+        )
+        if self._pending:
+            block_data_map._columns = self._columns.copy()
+            block_data_map._pending = dict(self._pending)
+        return block_data_map
+
+    def __reduce__(self):
+        self._load_all()
+        return (_BlockDataMap, (dict(self),))
+
+    def get(self, usage_key, default=None):
+        try:
+            return self[usage_key]
+        except KeyError:
+            return default
+
+    def pop(self, usage_key, *args):
+        if usage_key in self._pending:
+            self[usage_key]  # pylint: disable=pointless-statement
+        return dict.pop(self, usage_key, *args)
+
+    def keys(self):
+        self._load_all()
+        return dict.keys(self)
+
+    def values(self):
+        self._load_all()
+        return dict.values(self)
+
+    def items(self):
+        self._load_all()
+        return dict.items(self)
+
+    def iterkeys(self):
+        self._load_all()
+        return dict.iterkeys(self)
+
+    def itervalues(self):
+        self._load_all()
+        return dict.itervalues(self)
+
+    def iteritems(self):
+        self._load_all()
+        return dict.iteritems(self)
+
+    def _load_all(self):
+        """
+        Assembles the BlockData of all pending blocks.
+        """
+        for usage_key in self._pending.keys():
+            self[usage_key]  # pylint: disable=pointless-statement
+
+
 class BlockStructureBlockData(BlockStructure):
     """
     Subclass of BlockStructure that is responsible for managing block
@@ -401,15 +556,15 @@ class BlockStructureBlockData(BlockStructure):
     # update this value whenever the data structure changes. Dependent storage
     # layers can then use this value when serializing/deserializing block
     # structures, and invalidating any previously cached/stored data.
-    VERSION = 2
+    VERSION = 3
 
     def __init__(self, root_block_usage_key):
         super(BlockStructureBlockData, self).__init__(root_block_usage_key)
 
         # Map of a block's usage key to its collected data, including
         # its xBlock fields and block-specific transformer data.
-        # dict {UsageKey: BlockData}
-        self._block_data_map = {}
+        # _BlockDataMap {UsageKey: BlockData}
+        self._block_data_map = _BlockDataMap()
 
         # Map of a transformer's name to its non-block-specific data.
         self.transformer_data = TransformerDataMap()
@@ -463,8 +618,7 @@ class BlockStructureBlockData(BlockStructure):
             default (any type) - The value to return if a field value is
                 not found.
         """
-        block_data = self._block_data_map.get(usage_key)
-        return getattr(block_data, field_name, default) if block_data else default
+        return self._block_data_map.get_xblock_field(usage_key, field_name, default)
 
     def override_xblock_field(self, usage_key, field_name, override_data):
         """
@@ -550,11 +704,7 @@ class BlockStructureBlockData(BlockStructure):
             default (any type) - The value to return if a dictionary
                 entry is not found.
         """
-        try:
-            transformer_data = self.get_transformer_block_data(usage_key, transformer)
-        except KeyError:
-            return default
-        return getattr(transformer_data, key, default)
+        return self._block_data_map.get_transformer_block_field(usage_key, transformer, key, default)
 
     def set_transformer_block_field(self, usage_key, transformer, key, value):
         """
@@ -786,6 +936,17 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
         # set(string)
         self._requested_xblock_fields = set()
 
+        # The block structure collected before the most recent changes
+        # to the blocks, when collecting incrementally.
+        # BlockStructureBlockData or None
+        self._previous_block_structure = None
+
+        # Set of usage keys of the blocks whose previously collected
+        # data may be outdated: changed blocks, along with their
+        # ancestors and descendants.
+        # set(UsageKey)
+        self._outdated_block_keys = set()
+
     def request_xblock_fields(self, *field_names):
         """
         Records request for collecting data for the given xBlock fields.
@@ -812,9 +973,62 @@ class BlockStructureModulestoreData(BlockStructureBlockData):
         """
         return self._xblock_map[usage_key]
 
+    def has_previous_collection(self, usage_key):
+        """
+        Returns whether data collected for the given block before the
+        most recent changes to the blocks is still valid and may be
+        reused in place of recollecting it.  This is the case when
+        collecting incrementally and neither the block nor any of its
+        ancestors or descendants changed.
+
+        Arguments:
+            usage_key (UsageKey) - Usage key of the block.
+        """
+        return (
+            self._previous_block_structure is not None and
+            usage_key not in self._outdated_block_keys and
+            usage_key in self._previous_block_structure
+        )
+
+    def get_previous_transformer_block_field(self, usage_key, transformer, key, default=None):
+        """
+        Returns the value that was previously collected for the given
+        key for the given transformer for the given block; returns
+        default if not found.  Only valid for blocks for which
+        has_previous_collection returns True.
+        """
+        return self._previous_block_structure.get_transformer_block_field(usage_key, transformer, key, default)
+
     #--- Internal methods ---#
     # To be used within the block_structure framework or by tests.
 
+    def _set_previous_collection(self, previous_block_structure, changed_block_keys):
+        """
+        Enables incremental collection by recording the previously
+        collected block structure and the keys of the blocks that
+        changed since it was collected.
+
+        Arguments:
+            previous_block_structure (BlockStructureBlockData) - The
+                block structure from the previous collection.
+
+            changed_block_keys (iterable(UsageKey)) - Usage keys of the
+                blocks that were added or changed since then.
+        """
+        outdated_block_keys = set()
+        for get_relatives in (self.get_children, self.get_parents):
+            pending = [block_key for block_key in changed_block_keys if block_key in self]
+            visited = set(pending)
+            while pending:
+                for relative in get_relatives(pending.pop()):
+                    if relative not in visited:
+                        visited.add(relative)
+                        pending.append(relative)
+            outdated_block_keys |= visited
+
+        self._previous_block_structure = previous_block_structure
+        self._outdated_block_keys = outdated_block_keys
+
     def _add_xblock(self, usage_key, xblock):
         """
         Associates the given xBlock object with the given usage_key.
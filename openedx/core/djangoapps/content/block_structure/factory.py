@@ -1,7 +1,7 @@
 """
 Module for factory class for BlockStructure objects.
 """
-from .block_structure import BlockStructureModulestoreData, BlockStructureBlockData
+from .block_structure import BlockStructureModulestoreData, BlockStructureBlockData, _BlockDataMap
 
 
 class BlockStructureFactory(object):
@@ -93,5 +93,7 @@ class BlockStructureFactory(object):
         block_structure = BlockStructureBlockData(root_block_usage_key)
         block_structure._block_relations = block_relations  # pylint: disable=protected-access
         block_structure.transformer_data = transformer_data
+        if not isinstance(block_data_map, _BlockDataMap):
+            block_data_map = _BlockDataMap(block_data_map)
         block_structure._block_data_map = block_data_map  # pylint: disable=protected-access
         return block_structure
@@ -0,0 +1,131 @@
+"""
+Process-local cache of serialized block structures.
+
+This is a small LRU tier in front of the shared django cache.  Entries
+are keyed by the block structure's root usage key and the version of the
+course it was collected from, and the tier is bounded by the total size
+of the serialized data it holds.
+"""
+from collections import OrderedDict
+from threading import Lock
+
+from django.conf import settings
+
+
+class LocalBlockStructureCache(object):
+    """
+    A thread-safe, memory-bounded LRU map of root usage key to the
+    version and serialized data of its block structure.
+    """
+    def __init__(self, max_size_in_bytes):
+        """
+        Arguments:
+            max_size_in_bytes (int) - The maximum total size of the
+                serialized data to keep.  0 disables the cache.
+        """
+        self.max_size_in_bytes = max_size_in_bytes
+        self.size_in_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # dict {unicode: (unicode, str)}, in least to most recently used order.
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    @property
+    def enabled(self):
+        """
+        Returns whether the cache may hold any data.
+        """
+        return self.max_size_in_bytes > 0
+
+    def get(self, root_block_usage_key, version):
+        """
+        Returns the serialized data cached for the given root usage key
+        and version, or None if not found.
+        """
+        key = unicode(root_block_usage_key)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry[0] == version:
+                self._entries[key] = entry
+                self.hits += 1
+                return entry[1]
+
+            # Entries of other versions are outdated and are dropped.
+            if entry is not None:
+                self.size_in_bytes -= len(entry[1])
+            self.misses += 1
+            return None
+
+    def set(self, root_block_usage_key, version, serialized_data):
+        """
+        Caches the given serialized data for the given root usage key
+        and version, replacing any other version for the same root.
+        """
+        if len(serialized_data) > self.max_size_in_bytes:
+            self.delete(root_block_usage_key)
+            return
+
+        key = unicode(root_block_usage_key)
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = (version, serialized_data)
+            self.size_in_bytes += len(serialized_data)
+            while self.size_in_bytes > self.max_size_in_bytes:
+                self._pop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, root_block_usage_key):
+        """
+        Removes any data cached for the given root usage key.
+        """
+        with self._lock:
+            self._pop(unicode(root_block_usage_key))
+
+    def clear(self):
+        """
+        Removes all cached data and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size_in_bytes = self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """
+        Returns a dict of the cache's counters, for sizing the cache.
+        """
+        with self._lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                entries=len(self._entries),
+                size_in_bytes=self.size_in_bytes,
+                max_size_in_bytes=self.max_size_in_bytes,
+            )
+
+    def _pop(self, key):
+        """
+        Removes the entry for the given key, if any.  Must be called
+        with the lock held.
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size_in_bytes -= len(entry[1])
+
+
+_LOCAL_CACHE = None
+
+
+def get_local_cache():
+    """
+    Returns the process-wide LocalBlockStructureCache.
+    """
+    global _LOCAL_CACHE  # pylint: disable=global-statement
+    if _LOCAL_CACHE is None:
+        _LOCAL_CACHE = LocalBlockStructureCache(
+            settings.BLOCK_STRUCTURES_SETTINGS.get('LOCAL_CACHE_MAX_SIZE_IN_BYTES', 0)
+        )
+    return _LOCAL_CACHE
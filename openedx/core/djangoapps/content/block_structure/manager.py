@@ -8,6 +8,7 @@ from . import config
 from .exceptions import UsageKeyNotInBlockStructure, TransformerDataIncompatible, BlockStructureNotFound
 from .factory import BlockStructureFactory
 from .store import BlockStructureStore
+from .transformer_registry import TransformerRegistry
 from .transformers import BlockStructureTransformers
 
 
@@ -112,22 +113,63 @@ class BlockStructureManager(object):
         """
         with self._bulk_operations():
             if not self.store.is_up_to_date(self.root_block_usage_key, self.modulestore):
-                self._update_collected()
+                self._update_collected(incremental=config.waffle().is_enabled(config.INCREMENTAL_COLLECTION))
 
-    def _update_collected(self):
+    def _update_collected(self, incremental=False):
         """
         The store is updated with newly collected transformers data from
         the modulestore.
+
+        Arguments:
+            incremental (bool) - Whether transformers may reuse data
+                from the previous collection for blocks that have not
+                changed since.
         """
         with self._bulk_operations():
             block_structure = BlockStructureFactory.create_from_modulestore(
                 self.root_block_usage_key,
                 self.modulestore,
             )
+            if incremental:
+                self._set_previous_collection(block_structure)
             BlockStructureTransformers.collect(block_structure)
             self.store.add(block_structure)
             return block_structure
 
+    def _set_previous_collection(self, block_structure):
+        """
+        Prepares the given block structure for incremental collection,
+        provided the previously collected block structure was collected
+        by the current transformer versions and the modulestore can
+        report which blocks changed since.
+        """
+        try:
+            previous_block_structure = self.store.get(self.root_block_usage_key)
+        except BlockStructureNotFound:
+            return
+
+        for transformer in TransformerRegistry.get_registered_transformers():
+            # pylint: disable=protected-access
+            if previous_block_structure._get_transformer_data_version(transformer) != transformer.WRITE_VERSION:
+                return
+
+        previous_version = previous_block_structure.get_xblock_field(self.root_block_usage_key, 'course_version')
+        if previous_version is None or not hasattr(self.modulestore, 'get_block_keys_changed_since'):
+            return
+        try:
+            changed_block_keys = self.modulestore.get_block_keys_changed_since(
+                self.root_block_usage_key.course_key,
+                previous_version,
+            )
+        except NotImplementedError:
+            return
+
+        if changed_block_keys is not None:
+            block_structure._set_previous_collection(  # pylint: disable=protected-access
+                previous_block_structure,
+                changed_block_keys,
+            )
+
     def clear(self):
         """
         Removes data for the block structure associated with the given
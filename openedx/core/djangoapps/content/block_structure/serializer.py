@@ -0,0 +1,297 @@
+"""
+Compact binary serialization of BlockStructure objects.
+
+Rather than pickling the structure's object graph, the serialized form
+interns every usage key into an integer index, stores the parent/child
+adjacency lists as flat integer arrays and stores collected block data
+column-wise: one section per xBlock field and one per transformer.
+
+Each section is compressed independently.  When a block structure is
+deserialized, only the usage keys and relations are decoded up front;
+a data column is decoded the first time one of its values is read.
+
+Layout (all integers are big-endian):
+    header:  magic (4 bytes), format version (uint16), section count (uint16)
+    index:   for each section: name length (uint16), name, payload length (uint32)
+    payload: the section payloads, in index order
+"""
+import cPickle as pickle
+import struct
+import sys
+import zlib
+from array import array
+
+from .block_structure import BlockData, TransformerData, _BlockDataMap, _BlockRelations
+from .factory import BlockStructureFactory
+
+
+MAGIC = 'BSC\x00'
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('!4sHH')
+_SECTION_HEADER = struct.Struct('!HI')
+
+# Section names.
+_KEYS = 'keys'
+_CHILDREN_OFFSETS = 'children.offsets'
+_CHILDREN = 'children'
+_PARENTS_OFFSETS = 'parents.offsets'
+_PARENTS = 'parents'
+_BLOCK_DATA = 'block_data'
+_TRANSFORMER_DATA = 'transformer_data'
+_FIELD_PREFIX = 'field:'
+_TRANSFORMER_PREFIX = 'transformer:'
+
+
+def is_serialized_block_structure(serialized_data):
+    """
+    Returns whether the given data was produced by serialize, as opposed
+    to the legacy pickled format.
+    """
+    return serialized_data[:len(MAGIC)] == MAGIC
+
+
+def serialize(block_structure):
+    """
+    Returns the compact binary serialization of the given
+    BlockStructureBlockData.
+    """
+    # pylint: disable=protected-access
+    block_relations = block_structure._block_relations
+    block_data_map = block_structure._block_data_map
+
+    keys = []
+    key_indices = {}
+
+    def _intern(usage_key):
+        """
+        Returns the index of the given usage key, assigning one if needed.
+        """
+        index = key_indices.get(usage_key)
+        if index is None:
+            index = key_indices[usage_key] = len(keys)
+            keys.append(usage_key)
+        return index
+
+    # The blocks of the structure come first so that their relations
+    # line up with the first len(block_relations) keys.
+    for usage_key in block_relations:
+        _intern(usage_key)
+    num_blocks = len(keys)
+
+    children_offsets, children = array('i', [0]), array('i')
+    parents_offsets, parents = array('i', [0]), array('i')
+    for usage_key in keys[:num_blocks]:
+        relations = block_relations[usage_key]
+        children.extend(_intern(child_key) for child_key in relations.children)
+        children_offsets.append(len(children))
+        parents.extend(_intern(parent_key) for parent_key in relations.parents)
+        parents_offsets.append(len(parents))
+
+    block_data_indices = array('i')
+    field_columns = {}
+    transformer_columns = {}
+    for usage_key, block_data in block_data_map.iteritems():
+        index = _intern(usage_key)
+        block_data_indices.append(index)
+        for field_name, value in block_data.fields.iteritems():
+            field_columns.setdefault(field_name, {})[index] = value
+        for transformer_name, transformer_data in block_data.transformer_data.iteritems():
+            transformer_columns.setdefault(transformer_name, {})[index] = transformer_data.fields
+
+    sections = [
+        (_KEYS, _dump((keys, num_blocks))),
+        (_CHILDREN_OFFSETS, _dump_array(children_offsets)),
+        (_CHILDREN, _dump_array(children)),
+        (_PARENTS_OFFSETS, _dump_array(parents_offsets)),
+        (_PARENTS, _dump_array(parents)),
+        (_BLOCK_DATA, _dump_array(block_data_indices)),
+        (_TRANSFORMER_DATA, _dump(block_structure.transformer_data)),
+    ]
+    sections.extend(
+        (_FIELD_PREFIX + field_name, _dump(column))
+        for field_name, column in field_columns.iteritems()
+    )
+    sections.extend(
+        (_TRANSFORMER_PREFIX + transformer_name, _dump(column))
+        for transformer_name, column in transformer_columns.iteritems()
+    )
+    return _pack_sections(sections)
+
+
+def deserialize(serialized_data, root_block_usage_key):
+    """
+    Returns the BlockStructureBlockData serialized in the given data.
+    Block data is loaded lazily, one column at a time.
+    """
+    columns = BlockDataColumns(serialized_data)
+    keys, num_blocks = columns.load(_KEYS)
+
+    children_offsets, children = columns.load_array(_CHILDREN_OFFSETS), columns.load_array(_CHILDREN)
+    parents_offsets, parents = columns.load_array(_PARENTS_OFFSETS), columns.load_array(_PARENTS)
+    block_relations = {}
+    for index in xrange(num_blocks):
+        relations = _BlockRelations()
+        relations.children = [keys[i] for i in children[children_offsets[index]:children_offsets[index + 1]]]
+        relations.parents = [keys[i] for i in parents[parents_offsets[index]:parents_offsets[index + 1]]]
+        block_relations[keys[index]] = relations
+
+    block_data_map = _BlockDataMap.from_columns(
+        columns,
+        {keys[index]: index for index in columns.load_array(_BLOCK_DATA)},
+    )
+    return BlockStructureFactory.create_new(
+        root_block_usage_key,
+        block_relations,
+        columns.load(_TRANSFORMER_DATA),
+        block_data_map,
+    )
+
+
+class BlockDataColumns(object):
+    """
+    Read access to the sections of serialized block structure data.
+    Sections are decompressed on first use and then kept.
+    """
+    def __init__(self, serialized_data):
+        magic, version, num_sections = _HEADER.unpack_from(serialized_data)
+        if magic != MAGIC:
+            raise ValueError('Data is not a serialized block structure.')
+        if version != FORMAT_VERSION:
+            raise ValueError('Unsupported block structure format version {}.'.format(version))
+
+        self._serialized_data = serialized_data
+
+        # Map of section name to the (offset, length) of its payload.
+        # dict {string: (int, int)}
+        self._section_offsets = {}
+
+        # Map of section name to its decoded payload.
+        # dict {string: any type}
+        self._loaded = {}
+
+        position = _HEADER.size
+        index = []
+        for _ in xrange(num_sections):
+            name_length, payload_length = _SECTION_HEADER.unpack_from(serialized_data, position)
+            position += _SECTION_HEADER.size
+            index.append((serialized_data[position:position + name_length], payload_length))
+            position += name_length
+        for name, payload_length in index:
+            self._section_offsets[name] = (position, payload_length)
+            position += payload_length
+
+        self._field_names = self._names_with_prefix(_FIELD_PREFIX)
+        self._transformer_names = self._names_with_prefix(_TRANSFORMER_PREFIX)
+
+    def copy(self):
+        """
+        Returns a new instance over the same serialized data, without
+        any of the decoded sections.
+        """
+        return BlockDataColumns(self._serialized_data)
+
+    def load(self, name, default=None):
+        """
+        Returns the decoded pickled section with the given name, or
+        default if there is no such section.
+        """
+        try:
+            return self._loaded[name]
+        except KeyError:
+            payload = self._payload(name)
+            value = pickle.loads(zlib.decompress(payload)) if payload is not None else default
+            self._loaded[name] = value
+            return value
+
+    def load_array(self, name):
+        """
+        Returns the decoded integer array section with the given name.
+        """
+        integers = array('i')
+        integers.fromstring(zlib.decompress(self._payload(name)))
+        if sys.byteorder == 'big':
+            integers.byteswap()
+        return integers
+
+    def get_xblock_field(self, index, field_name, default=None):
+        """
+        Returns the value of the given xBlock field for the block at
+        the given index; returns default if not found.
+        """
+        return self.load(_FIELD_PREFIX + field_name, {}).get(index, default)
+
+    def get_transformer_block_fields(self, index, transformer_name):
+        """
+        Returns the fields dict of the given transformer's data for
+        the block at the given index; returns None if not found.
+        """
+        return self.load(_TRANSFORMER_PREFIX + transformer_name, {}).get(index)
+
+    def create_block_data(self, usage_key, index):
+        """
+        Returns a new BlockData for the block at the given index,
+        populated from all of its columns.
+        """
+        block_data = BlockData(usage_key)
+        for field_name in self._field_names:
+            column = self.load(_FIELD_PREFIX + field_name)
+            if index in column:
+                block_data.fields[field_name] = column.pop(index)
+        for transformer_name in self._transformer_names:
+            column = self.load(_TRANSFORMER_PREFIX + transformer_name)
+            if index in column:
+                transformer_data = TransformerData()
+                transformer_data.fields = column.pop(index)
+                block_data.transformer_data[transformer_name] = transformer_data
+        return block_data
+
+    def _payload(self, name):
+        """
+        Returns the raw payload of the section with the given name, or
+        None if there is no such section.
+        """
+        try:
+            offset, length = self._section_offsets[name]
+        except KeyError:
+            return None
+        return self._serialized_data[offset:offset + length]
+
+    def _names_with_prefix(self, prefix):
+        """
+        Returns the names, without the prefix, of all sections whose
+        name starts with the given prefix.
+        """
+        return [name[len(prefix):] for name in self._section_offsets if name.startswith(prefix)]
+
+
+def _dump(data):
+    """
+    Returns the compressed pickle of the given data.
+    """
+    return zlib.compress(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+
+
+def _dump_array(integers):
+    """
+    Returns the compressed little-endian bytes of the given integer array.
+    """
+    if sys.byteorder == 'big':
+        integers = array('i', integers)
+        integers.byteswap()
+    return zlib.compress(integers.tostring())
+
+
+def _pack_sections(sections):
+    """
+    Returns the header, section index and payloads of the given list of
+    (name, payload) sections as a single string.
+    """
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, len(sections))]
+    for name, payload in sections:
+        if isinstance(name, unicode):
+            name = name.encode('utf-8')
+        parts.append(_SECTION_HEADER.pack(len(name), len(payload)))
+        parts.append(name)
+    parts.extend(payload for _, payload in sections)
+    return ''.join(parts)
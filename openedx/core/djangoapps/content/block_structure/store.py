@@ -3,13 +3,15 @@ Module for the Storage of BlockStructure objects.
 """
 # pylint: disable=protected-access
 from logging import getLogger
+from uuid import uuid4
 
-from openedx.core.lib.cache_utils import zpickle, zunpickle
+from openedx.core.lib.cache_utils import zunpickle
 
-from . import config
+from . import config, serializer
 from .block_structure import BlockStructureBlockData
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
+from .local_cache import get_local_cache
 from .models import BlockStructureModel
 from .transformer_registry import TransformerRegistry
 
@@ -51,8 +53,8 @@ class BlockStructureStore(object):
 
     def add(self, block_structure):
         """
-        Stores and caches a compressed and pickled serialization of
-        the given block structure.
+        Stores and caches a compact binary serialization of the
+        given block structure.
 
         The data stored includes the structure's
         block relations, transformer data, and block data.
@@ -64,7 +66,8 @@ class BlockStructureStore(object):
         serialized_data = self._serialize(block_structure)
 
         bs_model = self._update_or_create_model(block_structure, serialized_data)
-        self._add_to_cache(serialized_data, bs_model)
+        data_version = block_structure.get_xblock_field(block_structure.root_block_usage_key, 'course_version')
+        self._add_to_cache(serialized_data, bs_model, data_version)
 
     def get(self, root_block_usage_key):
         """
@@ -93,7 +96,7 @@ class BlockStructureStore(object):
             serialized_data = self._get_from_cache(bs_model)
         except BlockStructureNotFound:
             serialized_data = self._get_from_store(bs_model)
-            self._add_to_cache(serialized_data, bs_model)
+            self._add_to_cache(serialized_data, bs_model, getattr(bs_model, 'data_version', None))
 
         return self._deserialize(serialized_data, root_block_usage_key)
 
@@ -107,7 +110,9 @@ class BlockStructureStore(object):
                 of the block structure that is to be removed.
         """
         bs_model = self._get_model(root_block_usage_key)
-        self._cache.delete(self._encode_root_cache_key(bs_model))
+        cache_key = self._encode_root_cache_key(bs_model)
+        self._cache.delete_many([cache_key, self._encode_version_cache_key(cache_key)])
+        get_local_cache().delete(root_block_usage_key)
         bs_model.delete()
         logger.info("BlockStructure: Deleted from cache and store; %s.", bs_model)
 
@@ -151,28 +156,51 @@ class BlockStructureStore(object):
         else:
             return StubModel(block_structure.root_block_usage_key)
 
-    def _add_to_cache(self, serialized_data, bs_model):
+    def _add_to_cache(self, serialized_data, bs_model, data_version=None):
         """
         Adds the given serialized_data for the given BlockStructureModel
-        to the cache.
+        to the cache and to the process-local cache.
+
+        A new version token is cached along with the data so that
+        other processes can tell whether their local copies are
+        current without fetching the data itself.
         """
         cache_key = self._encode_root_cache_key(bs_model)
-        self._cache.set(cache_key, serialized_data, timeout=config.cache_timeout_in_seconds())
+        version = u'{}.{}'.format(data_version, uuid4().hex)
+        self._cache.set_many(
+            {cache_key: serialized_data, self._encode_version_cache_key(cache_key): version},
+            timeout=config.cache_timeout_in_seconds(),
+        )
+        local_cache = get_local_cache()
+        if local_cache.enabled:
+            local_cache.set(bs_model.data_usage_key, version, serialized_data)
         logger.info("BlockStructure: Added to cache; %s, size: %d", bs_model, len(serialized_data))
 
     def _get_from_cache(self, bs_model):
         """
         Returns the serialized data for the given BlockStructureModel
-        from the cache.
+        from the process-local cache or, failing that, the cache.
         Raises:
              BlockStructureNotFound if not found.
         """
         cache_key = self._encode_root_cache_key(bs_model)
-        serialized_data = self._cache.get(cache_key)
+        version_cache_key = self._encode_version_cache_key(cache_key)
+        local_cache = get_local_cache()
 
+        if local_cache.enabled:
+            serialized_data = local_cache.get(bs_model.data_usage_key, self._cache.get(version_cache_key))
+            if serialized_data:
+                return serialized_data
+
+        cached = self._cache.get_many([cache_key, version_cache_key])
+        serialized_data = cached.get(cache_key)
         if not serialized_data:
             logger.info("BlockStructure: Not found in cache; %s.", bs_model)
             raise BlockStructureNotFound(bs_model.data_usage_key)
+
+        version = cached.get(version_cache_key)
+        if local_cache.enabled and version:
+            local_cache.set(bs_model.data_usage_key, version, serialized_data)
         return serialized_data
 
     def _get_from_store(self, bs_model):
@@ -191,17 +219,17 @@ class BlockStructureStore(object):
         """
         Serializes the data for the given block_structure.
         """
-        data_to_cache = (
-            block_structure._block_relations,
-            block_structure.transformer_data,
-            block_structure._block_data_map,
-        )
-        return zpickle(data_to_cache)
+        return serializer.serialize(block_structure)
 
     def _deserialize(self, serialized_data, root_block_usage_key):
         """
         Deserializes the given data and returns the parsed block_structure.
         """
+        if serializer.is_serialized_block_structure(serialized_data):
+            return serializer.deserialize(serialized_data, root_block_usage_key)
+
+        # Data stored before the compact format was introduced is read
+        # until the course is next collected.
         block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
         return BlockStructureFactory.create_new(
             root_block_usage_key,
@@ -225,6 +253,14 @@ class BlockStructureStore(object):
                 root_usage_key=unicode(bs_model.data_usage_key),
             )
 
+    @staticmethod
+    def _encode_version_cache_key(cache_key):
+        """
+        Returns the cache key of the version token for the data cached
+        at the given cache key.
+        """
+        return u'{}.version'.format(cache_key)
+
     @staticmethod
     def _version_data_of_block(root_block):
         """
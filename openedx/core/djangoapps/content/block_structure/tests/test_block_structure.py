@@ -310,3 +310,29 @@ class TestBlockStructureData(TestCase, ChildrenMapTestMixin):
         _set_value(new_copy, 'edit2')
         self.assertEquals(_get_value(block_structure), 'edit1')
         self.assertEquals(_get_value(new_copy), 'edit2')
+
+    @ddt.data(
+        ([], []),
+        ([1], [0, 1, 3, 5, 6]),
+        ([4], [0, 2, 4]),
+        ([3], [0, 1, 2, 3, 5, 6]),
+    )
+    @ddt.unpack
+    def test_previous_collection(self, changed_blocks, outdated_blocks):
+        previous_block_structure = self.create_block_structure(ChildrenMapTestMixin.DAG_CHILDREN_MAP)
+        previous_block_structure.set_transformer_block_field(5, 'transformer', 'test_key', 'previous_value')
+
+        block_structure = self.create_block_structure(
+            ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+            BlockStructureModulestoreData,
+        )
+        self.assertFalse(block_structure.has_previous_collection(5))
+
+        block_structure._set_previous_collection(previous_block_structure, changed_blocks)
+        for block in range(len(ChildrenMapTestMixin.DAG_CHILDREN_MAP)):
+            self.assertEquals(block_structure.has_previous_collection(block), block not in outdated_blocks)
+        if 5 not in outdated_blocks:
+            self.assertEquals(
+                block_structure.get_previous_transformer_block_field(5, 'transformer', 'test_key'),
+                'previous_value',
+            )
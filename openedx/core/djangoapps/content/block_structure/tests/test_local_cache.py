@@ -0,0 +1,62 @@
+"""
+Tests for local_cache.py
+"""
+from unittest import TestCase
+
+from ..local_cache import LocalBlockStructureCache
+
+
+class TestLocalBlockStructureCache(TestCase):
+    """
+    Tests for LocalBlockStructureCache
+    """
+    shard = 2
+
+    def setUp(self):
+        super(TestLocalBlockStructureCache, self).setUp()
+        self.cache = LocalBlockStructureCache(max_size_in_bytes=10)
+
+    def test_get_and_set(self):
+        self.assertIsNone(self.cache.get('root', 'v1'))
+        self.cache.set('root', 'v1', 'data')
+        self.assertEqual(self.cache.get('root', 'v1'), 'data')
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_other_version(self):
+        self.cache.set('root', 'v1', 'data')
+        self.assertIsNone(self.cache.get('root', 'v2'))
+        self.assertIsNone(self.cache.get('root', 'v1'))
+        self.assertEqual(self.cache.stats()['size_in_bytes'], 0)
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set('a', 'v1', 'aaaa')
+        self.cache.set('b', 'v1', 'bbbb')
+        self.cache.get('a', 'v1')
+        self.cache.set('c', 'v1', 'cccc')
+
+        self.assertEqual(self.cache.get('a', 'v1'), 'aaaa')
+        self.assertIsNone(self.cache.get('b', 'v1'))
+        self.assertEqual(self.cache.get('c', 'v1'), 'cccc')
+        stats = self.cache.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['size_in_bytes'], 8)
+
+    def test_too_large(self):
+        self.cache.set('root', 'v1', 'data')
+        self.cache.set('root', 'v2', 'x' * 11)
+        self.assertIsNone(self.cache.get('root', 'v1'))
+        self.assertIsNone(self.cache.get('root', 'v2'))
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_delete(self):
+        self.cache.set('root', 'v1', 'data')
+        self.cache.delete('root')
+        self.assertIsNone(self.cache.get('root', 'v1'))
+        self.assertEqual(self.cache.stats()['size_in_bytes'], 0)
+
+    def test_disabled(self):
+        cache = LocalBlockStructureCache(max_size_in_bytes=0)
+        self.assertFalse(cache.enabled)
+        cache.set('root', 'v1', 'data')
+        self.assertIsNone(cache.get('root', 'v1'))
@@ -0,0 +1,108 @@
+"""
+Tests for serializer.py
+"""
+# pylint: disable=protected-access
+from unittest import TestCase
+
+import ddt
+
+from openedx.core.lib.cache_utils import zpickle
+
+from .. import serializer
+from ..block_structure import BlockStructureBlockData
+from .helpers import ChildrenMapTestMixin, MockTransformer, UsageKeyFactoryMixin
+
+
+@ddt.ddt
+class TestSerializer(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the compact block structure serializer.
+    """
+    shard = 2
+
+    def create_collected_block_structure(self, children_map):
+        """
+        Returns a block structure for the given children_map with
+        xBlock fields and transformer data set on each block.
+        """
+        block_structure = self.create_block_structure(children_map)
+        block_structure._add_transformer(MockTransformer)
+        for block_id in range(len(children_map)):
+            block_key = self.block_key_factory(block_id)
+            block_data = block_structure._get_or_create_block(block_key)
+            block_data.display_name = u'Block {}'.format(block_id)
+            if block_id % 2:
+                block_data.graded = True
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'test', block_id)
+        return block_structure
+
+    def round_trip(self, block_structure):
+        """
+        Returns the given block structure after serializing and
+        deserializing it.
+        """
+        serialized_data = serializer.serialize(block_structure)
+        self.assertTrue(serializer.is_serialized_block_structure(serialized_data))
+        return serializer.deserialize(serialized_data, block_structure.root_block_usage_key)
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_round_trip(self, children_map):
+        block_structure = self.create_collected_block_structure(children_map)
+        deserialized = self.round_trip(block_structure)
+
+        self.assert_block_structure(deserialized, children_map)
+        self.assertEqual(deserialized._get_transformer_data_version(MockTransformer), MockTransformer.WRITE_VERSION)
+        for block_key, block_data in block_structure.iteritems():
+            self.assertEqual(deserialized[block_key].location, block_key)
+            self.assertEqual(deserialized[block_key].fields, block_data.fields)
+            self.assertEqual(
+                deserialized.get_transformer_block_field(block_key, MockTransformer, 'test'),
+                block_structure.get_transformer_block_field(block_key, MockTransformer, 'test'),
+            )
+
+    def test_columns_loaded_lazily(self):
+        block_structure = self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP)
+        deserialized = self.round_trip(block_structure)
+        columns = deserialized._block_data_map._columns
+
+        self.assertTrue(deserialized.get_xblock_field(self.block_key_factory(1), 'graded'))
+        self.assertIsNone(deserialized.get_xblock_field(self.block_key_factory(2), 'graded'))
+        self.assertEqual(deserialized.get_xblock_field(self.block_key_factory(2), 'missing', 'default'), 'default')
+        self.assertIn('field:graded', columns._loaded)
+        self.assertNotIn('field:display_name', columns._loaded)
+        self.assertEqual(len(deserialized._block_data_map._pending), len(self.SIMPLE_CHILDREN_MAP))
+
+    def test_modify_deserialized(self):
+        block_structure = self.create_collected_block_structure(self.SIMPLE_CHILDREN_MAP)
+        deserialized = self.round_trip(block_structure)
+        copied = deserialized.copy()
+
+        deserialized.override_xblock_field(self.block_key_factory(1), 'graded', False)
+        deserialized.remove_block(self.block_key_factory(2), keep_descendants=False)
+        self.assertFalse(deserialized.get_xblock_field(self.block_key_factory(1), 'graded'))
+        self.assertNotIn(self.block_key_factory(2), deserialized)
+        self.assertEqual(len(list(deserialized.iteritems())), len(self.SIMPLE_CHILDREN_MAP) - 1)
+
+        self.assertTrue(copied.get_xblock_field(self.block_key_factory(1), 'graded'))
+        self.assertEqual(len(list(copied.iteritems())), len(self.SIMPLE_CHILDREN_MAP))
+
+        reserialized = self.round_trip(deserialized)
+        self.assert_block_structure(reserialized, self.SIMPLE_CHILDREN_MAP, missing_blocks=[2])
+        self.assertFalse(reserialized.get_xblock_field(self.block_key_factory(1), 'graded'))
+
+    def test_legacy_format(self):
+        block_structure = BlockStructureBlockData(self.block_key_factory(0))
+        legacy_data = zpickle((block_structure._block_relations, {}, {}))
+        self.assertFalse(serializer.is_serialized_block_structure(legacy_data))
+
+    def test_unsupported_version(self):
+        serialized_data = serializer.serialize(self.create_collected_block_structure(self.LINEAR_CHILDREN_MAP))
+        newer_data = serializer._HEADER.pack(serializer.MAGIC, serializer.FORMAT_VERSION + 1, 0) + serialized_data[
+            serializer._HEADER.size:
+        ]
+        with self.assertRaises(ValueError):
+            serializer.deserialize(newer_data, self.block_key_factory(0))
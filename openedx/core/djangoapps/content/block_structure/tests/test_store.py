@@ -1,14 +1,17 @@
 """
 Tests for block_structure/cache.py
 """
+# pylint: disable=protected-access
 import ddt
+from mock import patch
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
 from ..config import STORAGE_BACKING_FOR_CACHE, waffle
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
-from ..store import BlockStructureStore
+from ..local_cache import LocalBlockStructureCache
+from ..store import BlockStructureStore, StubModel
 from .helpers import ChildrenMapTestMixin, UsageKeyFactoryMixin, MockCache, MockTransformer
 
 
@@ -89,3 +92,21 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
         self.assertEquals(self.mock_cache.timeout_from_last_call, 0)
         self.store.add(self.block_structure)
         self.assertEquals(self.mock_cache.timeout_from_last_call, timeout)
+
+    def test_local_cache(self):
+        local_cache = LocalBlockStructureCache(max_size_in_bytes=1024 * 1024)
+        with patch('openedx.core.djangoapps.content.block_structure.store.get_local_cache', return_value=local_cache):
+            self.store.add(self.block_structure)
+            root_block_usage_key = self.block_structure.root_block_usage_key
+            cache_key = self.store._encode_root_cache_key(StubModel(root_block_usage_key))
+
+            # Served from the local cache while the cached version is current.
+            del self.mock_cache.map[cache_key]
+            self.assert_block_structure(self.store.get(root_block_usage_key), self.children_map)
+            self.assertEqual(local_cache.stats()['hits'], 1)
+
+            # Not served once the cached version changes.
+            self.mock_cache.set(self.store._encode_version_cache_key(cache_key), u'other', timeout=None)
+            with self.assertRaises(BlockStructureNotFound):
+                self.store.get(root_block_usage_key)
+            self.assertEqual(local_cache.stats()['misses'], 1)
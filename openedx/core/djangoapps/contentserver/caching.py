@@ -1,12 +1,17 @@
 """
 Helper functions for caching course assets.
 """
+import cPickle as pickle
+import logging
+
 from django.core.cache import caches
 from django.core.cache.backends.base import InvalidCacheBackendError
 from opaque_keys import InvalidKeyError
 
 from xmodule.contentstore.content import STATIC_CONTENT_VERSION
 
+log = logging.getLogger(__name__)
+
 # See if there's a "course_assets" cache configured, and if not, fallback to the default cache.
 CONTENT_CACHE = caches['default']
 try:
@@ -14,6 +19,12 @@ try:
 except InvalidCacheBackendError:
     pass
 
+# Course assets which change outside of Studio (e.g. on course import) don't invalidate
+# the cached static urls of the course, so keep them for a limited time only.
+STATIC_URLS_CACHE_TIMEOUT = 60 * 60
+# Tables of static urls bigger than this, pickled, aren't cached: memcached doesn't store values over 1MB.
+STATIC_URLS_MAX_BYTES = 512 * 1024
+
 
 def set_cached_content(content):
     """
@@ -31,7 +42,8 @@ def get_cached_content(location):
 
 def del_cached_content(location):
     """
-    Delete content for the given location, as well versions of the content without a run.
+    Delete content for the given location, as well versions of the content without a run,
+    and the static urls of its course.
 
     It's possible that the content could have been cached without knowing the course_key,
     and so without having the run.
@@ -47,4 +59,36 @@ def del_cached_content(location):
         # although deprecated keys allowed run=None, new keys don't if there is no version.
         pass
 
+    # The static urls of the course may refer to this content.
+    locations.append(static_urls_cache_key(location.course_key))
+
     CONTENT_CACHE.delete_many(locations, version=STATIC_CONTENT_VERSION)
+
+
+def static_urls_cache_key(course_key):
+    """
+    Returns the key which the static urls of the given course are cached under.
+    """
+    return u'static_urls.{}'.format(course_key).encode("utf-8")
+
+
+def set_cached_static_urls(course_key, static_urls):
+    """
+    Stores the given table of rewritten static urls of the course in the cache, unless it's
+    bigger than STATIC_URLS_MAX_BYTES.  It's cleared whenever content of the course is deleted
+    from the cache.
+    """
+    size = len(pickle.dumps(static_urls, pickle.HIGHEST_PROTOCOL))
+    if size > STATIC_URLS_MAX_BYTES:
+        log.warning(u"Not caching the %d bytes table of static urls of course %s", size, course_key)
+        return
+    CONTENT_CACHE.set(
+        static_urls_cache_key(course_key), static_urls, STATIC_URLS_CACHE_TIMEOUT, version=STATIC_CONTENT_VERSION
+    )
+
+
+def get_cached_static_urls(course_key):
+    """
+    Retrieves the table of rewritten static urls of the course if cached.
+    """
+    return CONTENT_CACHE.get(static_urls_cache_key(course_key), version=STATIC_CONTENT_VERSION)
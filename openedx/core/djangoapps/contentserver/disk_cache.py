@@ -0,0 +1,254 @@
+"""
+Local, content-addressed disk cache for course assets.
+
+Assets are stored under their content digest (the md5 GridFS keeps for every
+file), so an asset which changes simply gets a new entry, and an entry never
+needs to be invalidated.  Entries are written by streaming the asset from
+GridFS to the client and to a temporary file at the same time, which is moved
+into place once the whole asset was read and its digest checked.  When the
+cache grows over its maximum size, the least recently used entries are removed;
+since that walks the whole cache directory, each process does it at most once
+every eviction interval.
+
+When entries are sent by nginx, nginx usually runs as another user than the
+app workers, so entries are made readable by it (FILE_MODE), and the root and
+its subdirectories have to be traversable by it.
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+TEMP_FILE_PREFIX = '.spool-'
+# Temporary files older than this are left over by dead processes.
+STALE_TEMP_FILE_AGE = 24 * 60 * 60
+FILE_CHUNK_SIZE = 64 * 1024
+DEFAULT_EVICTION_INTERVAL = 5 * 60
+DEFAULT_FILE_MODE = 0o644
+
+# When this process last evicted entries from each cache root.
+_last_evictions = {}
+
+
+def get_asset_disk_cache():
+    """
+    Return the AssetDiskCache configured by the CONTENTSERVER_DISK_CACHE
+    setting, or None if it is disabled.
+    """
+    config = getattr(settings, 'CONTENTSERVER_DISK_CACHE', None) or {}
+    if not config.get('ROOT'):
+        return None
+    return AssetDiskCache(
+        config['ROOT'],
+        min_size=config.get('MIN_SIZE', 0),
+        max_size=config.get('MAX_SIZE'),
+        accel_redirect_prefix=config.get('X_ACCEL_REDIRECT_PREFIX'),
+        eviction_interval=config.get('EVICTION_INTERVAL', DEFAULT_EVICTION_INTERVAL),
+        file_mode=config.get('FILE_MODE', DEFAULT_FILE_MODE),
+    )
+
+
+def iter_file_range(cached_file, first_byte, last_byte, close=True):
+    """
+    Yield the bytes of the file between first_byte and last_byte (included),
+    and close the file when done unless told otherwise.
+    """
+    try:
+        cached_file.seek(first_byte)
+        remaining = last_byte - first_byte + 1
+        while remaining > 0:
+            chunk = cached_file.read(min(FILE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        if close:
+            cached_file.close()
+
+
+class AssetDiskCache(object):
+    """
+    A directory of assets, stored as root/<ab>/<cd>/<digest>.
+    """
+    def __init__(self, root, min_size=0, max_size=None, accel_redirect_prefix=None,
+                 eviction_interval=DEFAULT_EVICTION_INTERVAL, file_mode=DEFAULT_FILE_MODE):
+        self.root = root
+        self.min_size = min_size
+        self.max_size = max_size
+        self.accel_redirect_prefix = accel_redirect_prefix
+        self.eviction_interval = eviction_interval
+        self.file_mode = file_mode
+
+    def is_cacheable(self, content):
+        """
+        Return whether the given content should be served through the cache.
+        """
+        digest = getattr(content, 'content_digest', None)
+        return (
+            digest is not None and DIGEST_PATTERN.match(digest) is not None and
+            content.length is not None and content.length >= self.min_size
+        )
+
+    def relative_path(self, digest):
+        """
+        Return the path of the entry for the digest, relative to the root.
+        """
+        return os.path.join(digest[:2], digest[2:4], digest)
+
+    def path(self, digest):
+        """
+        Return the path of the entry for the digest.
+        """
+        return os.path.join(self.root, self.relative_path(digest))
+
+    def accel_redirect_url(self, digest):
+        """
+        Return the X-Accel-Redirect value which makes nginx send the entry for the digest.
+        """
+        return '{}/{}'.format(self.accel_redirect_prefix.rstrip('/'), self.relative_path(digest).replace(os.sep, '/'))
+
+    def contains(self, digest):
+        """
+        Return whether there is an entry for the digest, and mark it as recently used.
+        """
+        try:
+            os.utime(self.path(digest), None)
+        except OSError:
+            return False
+        return True
+
+    def open(self, digest):
+        """
+        Return the entry for the digest opened for reading, or None if there
+        is none.  The entry is marked as recently used.
+        """
+        path = self.path(digest)
+        try:
+            cached_file = open(path, 'rb')
+        except IOError:
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            # The entry was just evicted, but the open file can still be read.
+            pass
+        return cached_file
+
+    def spool(self, digest, chunks):
+        """
+        Yield the given chunks, writing them to the entry for the digest at
+        the same time.  The entry is only created if all chunks were consumed
+        and they match the digest, so a client which goes away half way
+        through leaves nothing behind.  Errors writing the entry are logged
+        and don't interrupt the stream.
+        """
+        temp_path = None
+        temp_file = None
+        try:
+            os.makedirs(os.path.dirname(self.path(digest)))
+        except OSError:
+            # The directory usually exists already; any other problem shows up below.
+            pass
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.root, prefix=TEMP_FILE_PREFIX)
+            temp_file = os.fdopen(fd, 'wb')
+        except (IOError, OSError):
+            log.exception(u"Unable to create a file in the asset disk cache at %s", self.root)
+
+        md5 = hashlib.md5()
+        try:
+            for chunk in chunks:
+                if temp_file is not None:
+                    try:
+                        temp_file.write(chunk)
+                        md5.update(chunk)
+                    except IOError:
+                        log.exception(u"Unable to write asset %s to the disk cache", digest)
+                        temp_file.close()
+                        temp_file = None
+                yield chunk
+
+            if temp_file is not None:
+                temp_file.close()
+                temp_file = None
+                if md5.hexdigest() == digest:
+                    try:
+                        # mkstemp creates the file readable by this user only.
+                        os.chmod(temp_path, self.file_mode)
+                        os.rename(temp_path, self.path(digest))
+                        temp_path = None
+                    except OSError:
+                        log.exception(u"Unable to add asset %s to the disk cache", digest)
+                    else:
+                        self.evict_if_due()
+                else:
+                    log.warning(u"Asset with digest %s has content with digest %s", digest, md5.hexdigest())
+        finally:
+            if temp_file is not None:
+                temp_file.close()
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def evict_if_due(self):
+        """
+        Evict entries, unless this process already did less than the eviction interval ago.
+        """
+        now = time.time()
+        if now - _last_evictions.get(self.root, 0) < self.eviction_interval:
+            return
+        _last_evictions[self.root] = now
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache is no bigger
+        than its maximum size, along with stale temporary files.
+        """
+        if self.max_size is None:
+            return
+
+        now = time.time()
+        entries = []
+        total_size = 0
+        for dirpath, __, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if filename.startswith(TEMP_FILE_PREFIX):
+                    if now - stat.st_mtime > STALE_TEMP_FILE_AGE:
+                        self._remove(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_size += stat.st_size
+
+        if total_size <= self.max_size:
+            return
+        entries.sort()
+        for __, size, path in entries:
+            if total_size <= self.max_size:
+                break
+            self._remove(path)
+            total_size -= size
+
+    def _remove(self, path):
+        """
+        Remove the file at path, if another process didn't do so already.
+        """
+        try:
+            os.remove(path)
+        except OSError:
+            pass
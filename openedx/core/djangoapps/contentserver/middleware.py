@@ -2,16 +2,19 @@
 Middleware to serve assets.
 """
 
+import calendar
 import logging
 import datetime
+from uuid import uuid4
 log = logging.getLogger(__name__)
 try:
     import newrelic.agent
 except ImportError:
     newrelic = None  # pylint: disable=invalid-name
 from django.http import (
-    HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
-    HttpResponseBadRequest, HttpResponseNotFound, HttpResponsePermanentRedirect)
+    FileResponse, HttpResponse, HttpResponseNotModified, HttpResponseForbidden,
+    HttpResponseBadRequest, HttpResponseNotFound, HttpResponsePermanentRedirect, StreamingHttpResponse)
+from django.utils.http import parse_etags, parse_http_date_safe, quote_etag
 from six import text_type
 from student.models import CourseEnrollment
 
@@ -22,6 +25,7 @@ from opaque_keys import InvalidKeyError
 from opaque_keys.edx.locator import AssetLocator
 from openedx.core.djangoapps.header_control import force_header_for_response
 from .caching import get_cached_content, set_cached_content
+from .disk_cache import get_asset_disk_cache, iter_file_range
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.exceptions import NotFoundError
 
@@ -31,6 +35,8 @@ from .models import CourseAssetCacheTtlConfig, CdnUserAgentsConfig
 # to change this file so instead of using course_id_partial, we're just using asset keys
 
 HTTP_DATE_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
+# Requests for more ranges than this (after merging overlapping ones) get the full content.
+MAX_BYTE_RANGES = 64
 
 
 class StaticContentServer(object):
@@ -47,7 +53,7 @@ class StaticContentServer(object):
             StaticContent.is_versioned_asset_path(request.path)
         )
 
-    # pylint: disable=too-many-statements
+    # pylint: disable=too-many-statements, too-many-branches
     def process_request(self, request):
         """Process the given request"""
         asset_path = request.path
@@ -109,11 +115,29 @@ class StaticContentServer(object):
 
             # Figure out if the client sent us a conditional request, and let them know
             # if this asset has changed since then.
-            last_modified_at_str = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+            if self.is_not_modified(request, content):
+                response = HttpResponseNotModified()
+                self.set_caching_headers(content, response)
+                return response
+
+            # Assets in the disk cache are sent from there instead of GridFS, by nginx if it's set up for it.
+            response = None
+            disk_cache = get_asset_disk_cache()
+            use_disk_cache = disk_cache is not None and disk_cache.is_cacheable(content)
+            cached_file = None
+            if use_disk_cache:
+                if disk_cache.accel_redirect_prefix:
+                    if disk_cache.contains(content.content_digest):
+                        # nginx handles any Range header itself.
+                        response = HttpResponse()
+                        response['X-Accel-Redirect'] = disk_cache.accel_redirect_url(content.content_digest)
+                else:
+                    cached_file = disk_cache.open(content.content_digest)
+
+            if newrelic and use_disk_cache:
+                newrelic.agent.add_custom_parameter(
+                    'contentserver.disk_cache_hit', response is not None or cached_file is not None
+                )
 
             # *** File streaming within a byte range ***
             # If a Range is provided, parse Range attribute of the request
@@ -121,10 +145,11 @@ class StaticContentServer(object):
             # Request -> Range attribute structure: "Range: bytes=first-[last]"
             # Response -> Content-Range attribute structure: "Content-Range: bytes first-last/totalLength"
             # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.35
-            response = None
-            if request.META.get('HTTP_RANGE'):
+            # A Range which is conditional on an If-Range that doesn't match is ignored.
+            multipart_boundary = None
+            if response is None and request.META.get('HTTP_RANGE') and self.is_if_range_satisfied(request, content):
                 # If we have a StaticContent, get a StaticContentStream.  Can't manipulate the bytes otherwise.
-                if isinstance(content, StaticContent):
+                if cached_file is None and isinstance(content, StaticContent):
                     content = AssetManager.find(loc, as_stream=True)
 
                 header_value = request.META['HTTP_RANGE']
@@ -136,40 +161,64 @@ class StaticContentServer(object):
                         u"%s in Range header: %s for content: %s", text_type(exception), header_value, unicode(loc)
                     )
                 else:
+                    if unit == 'bytes':
+                        # Unsatisfiable ranges are dropped, and overlapping or adjacent ones merged.
+                        ranges = coalesce_ranges([
+                            (first, last) for first, last in ranges if 0 <= first <= last < content.length
+                        ])
+
                     if unit != 'bytes':
                         # Only accept ranges in bytes
                         log.warning(u"Unknown unit in Range header: %s for content: %s", header_value, text_type(loc))
-                    elif len(ranges) > 1:
-                        # According to Http/1.1 spec content for multiple ranges should be sent as a multipart message.
-                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
-                        # But we send back the full content.
+                    elif not ranges:
+                        log.warning(
+                            u"Cannot satisfy ranges in Range header: %s for content: %s",
+                            header_value, text_type(loc)
+                        )
+                        if cached_file is not None:
+                            cached_file.close()
+                        response = HttpResponse(status=416)  # Requested Range Not Satisfiable
+                        response['Content-Range'] = 'bytes */{length}'.format(length=content.length)
+                        return response
+                    elif len(ranges) > MAX_BYTE_RANGES:
+                        # Sending lots of small parts costs more than sending the full content.
                         log.warning(
-                            u"More than 1 ranges in Range header: %s for content: %s", header_value, text_type(loc)
+                            u"Too many ranges in Range header: %s for content: %s", header_value, text_type(loc)
                         )
+                    elif len(ranges) > 1:
+                        # Content for multiple ranges is sent as a multipart message.
+                        # http://www.w3.org/Protocols/rfc2616/rfc2616-sec14.html#sec14.16
+                        multipart_boundary = uuid4().hex
+                        response = self.multipart_byteranges_response(content, cached_file, ranges, multipart_boundary)
                     else:
                         first, last = ranges[0]
-
-                        if 0 <= first <= last < content.length:
-                            # If the byte range is satisfiable
-                            response = HttpResponse(content.stream_data_in_range(first, last))
-                            response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
-                                first=first, last=last, length=content.length
+                        if cached_file is not None:
+                            response = StreamingHttpResponse(iter_file_range(cached_file, first, last))
+                        elif use_disk_cache and first == 0 and last == content.length - 1:
+                            # The whole asset was asked for, so it can be cached on the way.
+                            response = StreamingHttpResponse(
+                                disk_cache.spool(content.content_digest, content.stream_data())
                             )
-                            response['Content-Length'] = str(last - first + 1)
-                            response.status_code = 206  # Partial Content
-
-                            if newrelic:
-                                newrelic.agent.add_custom_parameter('contentserver.ranged', True)
                         else:
-                            log.warning(
-                                u"Cannot satisfy ranges in Range header: %s for content: %s",
-                                header_value, text_type(loc)
-                            )
-                            return HttpResponse(status=416)  # Requested Range Not Satisfiable
+                            response = HttpResponse(content.stream_data_in_range(first, last))
+                        response['Content-Range'] = 'bytes {first}-{last}/{length}'.format(
+                            first=first, last=last, length=content.length
+                        )
+                        response['Content-Length'] = str(last - first + 1)
+
+                    if response is not None:
+                        response.status_code = 206  # Partial Content
+                        if newrelic:
+                            newrelic.agent.add_custom_parameter('contentserver.ranged', True)
 
             # If Range header is absent or syntactically invalid return a full content response.
             if response is None:
-                response = HttpResponse(content.stream_data())
+                if cached_file is not None:
+                    response = FileResponse(cached_file)
+                elif use_disk_cache:
+                    response = StreamingHttpResponse(disk_cache.spool(content.content_digest, content.stream_data()))
+                else:
+                    response = HttpResponse(content.stream_data())
                 response['Content-Length'] = content.length
 
             if newrelic:
@@ -178,7 +227,8 @@ class StaticContentServer(object):
 
             # "Accept-Ranges: bytes" tells the user that only "bytes" ranges are allowed
             response['Accept-Ranges'] = 'bytes'
-            response['Content-Type'] = content.content_type
+            if multipart_boundary is None:
+                response['Content-Type'] = content.content_type
             response['X-Frame-Options'] = 'ALLOW'
 
             # Set any caching headers, and do any response cleanup needed.  Based on how much
@@ -189,6 +239,85 @@ class StaticContentServer(object):
 
             return response
 
+    def is_not_modified(self, request, content):
+        """
+        Determines whether the client sent a conditional request which the given content satisfies,
+        so that a 304 Not Modified response can be sent.  If-None-Match takes precedence over
+        If-Modified-Since, as per https://tools.ietf.org/html/rfc7232#section-6.
+        """
+        if 'HTTP_IF_NONE_MATCH' in request.META:
+            etag = get_etag(content)
+            if etag is None:
+                return False
+            etags = parse_etags(request.META['HTTP_IF_NONE_MATCH'])
+            # If-None-Match uses the weak comparison function.
+            return '*' in etags or strip_weakness(etag) in [strip_weakness(tag) for tag in etags]
+
+        if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+        if if_modified_since is None:
+            return False
+        return calendar.timegm(content.last_modified_at.utctimetuple()) <= if_modified_since
+
+    def is_if_range_satisfied(self, request, content):
+        """
+        Determines whether the Range of the request applies to the given content, which is
+        the case unless an If-Range validator doesn't match it.  If-Range uses the strong
+        comparison function, so weak entity tags never match.
+        """
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if not if_range:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"'):
+            return if_range == get_etag(content)
+        return if_range == content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+
+    def multipart_byteranges_response(self, content, cached_file, ranges, boundary):
+        """
+        Returns a streaming multipart/byteranges response with a part for each (first, last) range,
+        reading the bytes from the cached file if there is one, or else from the content stream.
+        """
+        part_headers = [
+            (
+                '{separator}--{boundary}\r\n'
+                'Content-Type: {content_type}\r\n'
+                'Content-Range: bytes {first}-{last}/{length}\r\n\r\n'
+            ).format(
+                separator='\r\n' if index else '', boundary=boundary, content_type=content.content_type,
+                first=first, last=last, length=content.length
+            )
+            for index, (first, last) in enumerate(ranges)
+        ]
+        closing_boundary = '\r\n--{boundary}--\r\n'.format(boundary=boundary)
+
+        def parts():
+            """
+            Yields the body of the response.
+            """
+            try:
+                for part_header, (first, last) in zip(part_headers, ranges):
+                    yield part_header
+                    if cached_file is not None:
+                        part_data = iter_file_range(cached_file, first, last, close=False)
+                    else:
+                        part_data = content.stream_data_in_range(first, last)
+                    for chunk in part_data:
+                        yield chunk
+                yield closing_boundary
+            finally:
+                if cached_file is not None:
+                    cached_file.close()
+
+        response = StreamingHttpResponse(
+            parts(), content_type='multipart/byteranges; boundary={}'.format(boundary)
+        )
+        response['Content-Length'] = str(
+            sum(len(part_header) for part_header in part_headers) +
+            sum(last - first + 1 for first, last in ranges) +
+            len(closing_boundary)
+        )
+        return response
+
     def set_caching_headers(self, content, response):
         """
         Sets caching headers based on whether or not the asset is locked.
@@ -215,6 +344,9 @@ class StaticContentServer(object):
             response['Cache-Control'] = "private, no-cache, no-store"
 
         response['Last-Modified'] = content.last_modified_at.strftime(HTTP_DATE_FORMAT)
+        etag = get_etag(content)
+        if etag is not None:
+            response['ETag'] = etag
 
         # Force the Vary header to only vary responses on Origin, so that XHR and browser requests get cached
         # separately and don't screw over one another. i.e. a browser request that doesn't send Origin, and
@@ -285,7 +417,11 @@ class StaticContentServer(object):
 
             # Now that we fetched it, let's go ahead and try to cache it. We cap this at 1MB
             # because it's the default for memcached and also we don't want to do too much
-            # buffering in memory when we're serving an actual request.
+            # buffering in memory when we're serving an actual request.  Assets which go to
+            # the disk cache are kept out of memcached.
+            disk_cache = get_asset_disk_cache()
+            if disk_cache is not None and disk_cache.is_cacheable(content):
+                return content
             if content.length is not None and content.length < 1048576:
                 content = content.copy_to_in_mem()
                 set_cached_content(content)
@@ -334,3 +470,33 @@ def parse_range_header(header_value, content_length):
         raise ValueError('Invalid syntax')
 
     return unit, ranges
+
+
+def coalesce_ranges(ranges):
+    """
+    Returns the given list of (first, last) ranges sorted, with overlapping or adjacent ranges merged.
+    """
+    coalesced = []
+    for first, last in sorted(ranges):
+        if coalesced and first <= coalesced[-1][1] + 1:
+            coalesced[-1] = (coalesced[-1][0], max(last, coalesced[-1][1]))
+        else:
+            coalesced.append((first, last))
+    return coalesced
+
+
+def get_etag(content):
+    """
+    Returns the entity tag of the given content, which is based on its digest, or None if it has no digest.
+    """
+    digest = getattr(content, 'content_digest', None)
+    if not digest:
+        return None
+    return quote_etag(digest)
+
+
+def strip_weakness(etag):
+    """
+    Returns the given entity tag without its weakness indicator, if it has one.
+    """
+    return etag[2:] if etag.startswith('W/') else etag
@@ -5,11 +5,17 @@ import copy
 
 import datetime
 import ddt
+import hashlib
 import logging
+import os
+import shutil
+import stat
+import tempfile
 import unittest
 from uuid import uuid4
 
 from django.conf import settings
+from django.http import FileResponse
 from django.test import RequestFactory
 from django.test.client import Client
 from django.test.utils import override_settings
@@ -27,7 +33,8 @@ from xmodule.modulestore.exceptions import ItemNotFoundError
 from student.models import CourseEnrollment
 from student.tests.factories import UserFactory, AdminFactory
 
-from ..middleware import parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
+from .. import disk_cache
+from ..middleware import coalesce_ranges, parse_range_header, HTTP_DATE_FORMAT, StaticContentServer
 
 log = logging.getLogger(__name__)
 
@@ -242,16 +249,104 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
 
     def test_range_request_multiple_ranges(self):
         """
-        Test that multiple ranges in request outputs the full content.
+        Test that multiple ranges in request outputs a multipart message with a part for each range.
         """
+        data = self.contentstore.find(self.unlocked_asset).data
         first_byte = self.length_unlocked / 4
         last_byte = self.length_unlocked / 2
         resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}, -100'.format(
             first=first_byte, last=last_byte))
 
-        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.status_code, 206)
         self.assertNotIn('Content-Range', resp)
-        self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        content_type, boundary = resp['Content-Type'].split('; boundary=')
+        self.assertEqual(content_type, 'multipart/byteranges')
+        body = b''.join(resp.streaming_content)
+        self.assertEqual(resp['Content-Length'], str(len(body)))
+
+        parts = body.split(b'--' + boundary)
+        self.assertEqual(len(parts), 4)
+        self.assertEqual(parts[0], b'')
+        self.assertEqual(parts[-1], b'--\r\n')
+        expected_ranges = [(first_byte, last_byte), (self.length_unlocked - 100, self.length_unlocked - 1)]
+        for part, (first, last) in zip(parts[1:-1], expected_ranges):
+            headers, part_data = part.split(b'\r\n\r\n', 1)
+            self.assertIn(
+                'Content-Range: bytes {}-{}/{}'.format(first, last, self.length_unlocked), headers
+            )
+            # Each part is followed by a CRLF before the next boundary.
+            self.assertEqual(part_data[:-2], data[first:last + 1])
+
+    def test_range_request_overlapping_ranges(self):
+        """
+        Test that overlapping ranges are merged into a single range.
+        """
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=10-20, 0-5, 3-12')
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], 'bytes 0-20/{}'.format(self.length_unlocked))
+        self.assertEqual(resp['Content-Length'], '21')
+
+    def test_etag(self):
+        """
+        Test that the ETag is based on the digest of the asset.
+        """
+        resp = self.client.get(self.url_unlocked)
+        digest = self.contentstore.find(self.unlocked_asset).content_digest
+        self.assertEqual(resp['ETag'], '"{}"'.format(digest))
+
+    @ddt.data(
+        ('HTTP_IF_NONE_MATCH', '"{etag}"', 304),
+        ('HTTP_IF_NONE_MATCH', 'W/"{etag}"', 304),
+        ('HTTP_IF_NONE_MATCH', '"other", "{etag}"', 304),
+        ('HTTP_IF_NONE_MATCH', '*', 304),
+        ('HTTP_IF_NONE_MATCH', '"other"', 200),
+        ('HTTP_IF_MODIFIED_SINCE', '{last_modified}', 304),
+        ('HTTP_IF_MODIFIED_SINCE', 'Fri, 01 Jan 2100 00:00:00 GMT', 304),
+        ('HTTP_IF_MODIFIED_SINCE', 'Thu, 01 Jan 1970 00:00:00 GMT', 200),
+        ('HTTP_IF_MODIFIED_SINCE', 'not a date', 200),
+    )
+    @ddt.unpack
+    def test_conditional_request(self, header, value, status_code):
+        """
+        Test that conditional requests which the asset satisfies get a 304 Not Modified response.
+        """
+        resp = self.client.get(self.url_unlocked)
+        value = value.format(etag=resp['ETag'].strip('"'), last_modified=resp['Last-Modified'])
+        resp = self.client.get(self.url_unlocked, **{header: value})
+        self.assertEqual(resp.status_code, status_code)
+        self.assertIn('ETag', resp)
+
+    def test_if_none_match_precedence(self):
+        """
+        Test that If-Modified-Since is ignored when If-None-Match is sent.
+        """
+        resp = self.client.get(
+            self.url_unlocked,
+            HTTP_IF_NONE_MATCH='"other"',
+            HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT',
+        )
+        self.assertEqual(resp.status_code, 200)
+
+    @ddt.data(
+        ('"{etag}"', 206),
+        ('W/"{etag}"', 200),
+        ('"other"', 200),
+        ('{last_modified}', 206),
+        ('Thu, 01 Jan 1970 00:00:00 GMT', 200),
+    )
+    @ddt.unpack
+    def test_if_range(self, value, status_code):
+        """
+        Test that the Range is only honoured if the If-Range validator matches the asset.
+        """
+        resp = self.client.get(self.url_unlocked)
+        value = value.format(etag=resp['ETag'].strip('"'), last_modified=resp['Last-Modified'])
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=value)
+        self.assertEqual(resp.status_code, status_code)
+        if status_code == 200:
+            self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+        else:
+            self.assertEqual(resp['Content-Length'], '10')
 
     @ddt.data(
         'bytes 0-',
@@ -284,6 +379,75 @@ class ContentStoreToyCourseTest(SharedModuleStoreTestCase):
         resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={first}-{last}'.format(
             first=(self.length_unlocked), last=(self.length_unlocked)))
         self.assertEqual(resp.status_code, 416)
+        self.assertEqual(resp['Content-Range'], 'bytes */{}'.format(self.length_unlocked))
+
+    def disk_cache_settings(self, **kwargs):
+        """
+        Returns CONTENTSERVER_DISK_CACHE settings which cache the test assets in a temporary directory.
+        """
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        config = {'ROOT': root, 'MIN_SIZE': 0, 'MAX_SIZE': None, 'X_ACCEL_REDIRECT_PREFIX': None}
+        config.update(kwargs)
+        return config
+
+    def test_disk_cache(self):
+        """
+        Test that an asset is spooled to the disk cache when it is first served,
+        and served from there (including byte ranges) afterwards.
+        """
+        data = self.contentstore.find(self.unlocked_asset).data
+        with override_settings(CONTENTSERVER_DISK_CACHE=self.disk_cache_settings()):
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIsInstance(resp, FileResponse)
+            self.assertEqual(b''.join(resp.streaming_content), data)
+            resp.close()
+
+            resp = self.client.get(self.url_unlocked)
+            self.assertEqual(resp.status_code, 200)
+            self.assertIsInstance(resp, FileResponse)
+            self.assertEqual(resp['Content-Length'], str(self.length_unlocked))
+            self.assertEqual(b''.join(resp.streaming_content), data)
+            resp.close()
+
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=2-5')
+            self.assertEqual(resp.status_code, 206)
+            self.assertEqual(resp['Content-Range'], 'bytes 2-5/{}'.format(self.length_unlocked))
+            self.assertEqual(resp['Content-Length'], '4')
+            self.assertEqual(b''.join(resp.streaming_content), data[2:6])
+
+    def test_disk_cache_abandoned_download(self):
+        """
+        Test that an asset is not cached when the client stops reading it.
+        """
+        config = self.disk_cache_settings()
+        with override_settings(CONTENTSERVER_DISK_CACHE=config):
+            resp = self.client.get(self.url_unlocked)
+            next(iter(resp.streaming_content))
+            resp.close()
+            self.assertEqual([files for __, __, files in os.walk(config['ROOT']) if files], [])
+
+    def test_disk_cache_accel_redirect(self):
+        """
+        Test that cached assets are sent by nginx when X_ACCEL_REDIRECT_PREFIX is set.
+        """
+        with override_settings(CONTENTSERVER_DISK_CACHE=self.disk_cache_settings(
+            X_ACCEL_REDIRECT_PREFIX='/assets-cache/'
+        )):
+            resp = self.client.get(self.url_unlocked)
+            self.assertNotIn('X-Accel-Redirect', resp)
+            b''.join(resp.streaming_content)
+            resp.close()
+
+            resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=2-5')
+            self.assertEqual(resp.status_code, 200)
+            self.assertNotIn('Content-Range', resp)
+            digest = self.contentstore.find(self.unlocked_asset).content_digest
+            self.assertEqual(
+                resp['X-Accel-Redirect'],
+                '/assets-cache/{}/{}/{}'.format(digest[:2], digest[2:4], digest)
+            )
 
     def test_vary_header_sent(self):
         """
@@ -447,3 +611,65 @@ class ParseRangeHeaderTestCase(unittest.TestCase):
         self.assertRaisesRegexp(
             exception_class, exception_message_regex, parse_range_header, header_value, self.content_length
         )
+
+
+class AssetDiskCacheTestCase(unittest.TestCase):
+    """
+    Tests for the AssetDiskCache class.
+    """
+    def setUp(self):
+        super(AssetDiskCacheTestCase, self).setUp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        patcher = patch.dict(disk_cache._last_evictions, clear=True)  # pylint: disable=protected-access
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def spool(self, cache, data):
+        """
+        Spool the data to the cache, and return its digest.
+        """
+        digest = hashlib.md5(data).hexdigest()
+        list(cache.spool(digest, [data]))
+        return digest
+
+    def test_eviction_is_throttled(self):
+        cache = disk_cache.AssetDiskCache(self.root, max_size=10, eviction_interval=60)
+        first_digest = self.spool(cache, b'first asset')
+        second_digest = self.spool(cache, b'second asset')
+
+        # The first spool evicted entries, the second one didn't.
+        self.assertFalse(cache.contains(first_digest))
+        self.assertTrue(cache.contains(second_digest))
+
+        with patch.object(disk_cache.time, 'time', return_value=disk_cache.time.time() + 61):
+            self.spool(cache, b'third asset')
+        self.assertFalse(cache.contains(second_digest))
+
+    def test_entries_are_readable_by_other_users(self):
+        cache = disk_cache.AssetDiskCache(self.root)
+        digest = self.spool(cache, b'asset')
+        self.assertEqual(stat.S_IMODE(os.stat(cache.path(digest)).st_mode), 0o644)
+
+        cache = disk_cache.AssetDiskCache(self.root, file_mode=0o640)
+        digest = self.spool(cache, b'other asset')
+        self.assertEqual(stat.S_IMODE(os.stat(cache.path(digest)).st_mode), 0o640)
+
+
+@ddt.ddt
+class CoalesceRangesTestCase(unittest.TestCase):
+    """
+    Tests for the coalesce_ranges function.
+    """
+
+    @ddt.data(
+        ([(0, 9)], [(0, 9)]),
+        ([(20, 29), (0, 9)], [(0, 9), (20, 29)]),
+        ([(0, 9), (10, 19)], [(0, 19)]),
+        ([(0, 9), (5, 7)], [(0, 9)]),
+        ([(5, 15), (0, 9), (30, 39), (14, 20)], [(0, 20), (30, 39)]),
+        ([], []),
+    )
+    @ddt.unpack
+    def test_coalesce_ranges(self, ranges, expected_ranges):
+        self.assertEqual(coalesce_ranges(ranges), expected_ranges)
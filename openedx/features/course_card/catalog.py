@@ -0,0 +1,22 @@
+"""
+Helpers for rendering the course card catalog without per card queries.
+
+The runs of each card come from the cached rerun families of
+philu_overrides; the current and next class of a card depend on the time,
+so they are worked out from those runs when the catalog is rendered.
+"""
+
+
+def get_next_class(course_runs, current_time):
+    """
+    Return the rerun whose enrollment opens first among those whose
+    enrollment hasn't ended, or None.
+    """
+    open_reruns = [
+        run for run in course_runs
+        if run.is_rerun and run.enrollment_end and run.enrollment_end >= current_time
+    ]
+    if not open_reruns:
+        return None
+    # Runs without an enrollment start come first, as they do when the database sorts them.
+    return min(open_reruns, key=lambda run: (run.enrollment_start is not None, run.enrollment_start))
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytz
+from django.core.cache import cache
+from django.test.utils import override_settings
+
+from course_action_state.models import CourseRerunState
+from lms.djangoapps.philu_overrides.course_reruns import get_rerun_family
+from lms.djangoapps.philu_overrides.courses import get_course_first_chapter_keys, get_enrolled_course_ids
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from student.models import CourseEnrollment
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory, check_mongo_calls
+
+from ..catalog import get_next_class
+from .helpers import set_course_dates
+from .test_views import CourseCardBaseClass
+
+utc = pytz.UTC
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'course_card_catalog',
+    }
+})
+class CourseCardCatalogTestCase(CourseCardBaseClass):
+
+    def setUp(self):
+        super(CourseCardCatalogTestCase, self).setUp()
+        cache.clear()
+
+        self.parent_course = self.courses[0]
+        self.re_run_course = CourseFactory.create(
+            org=self.parent_course.org, number=self.parent_course.number, run='2015_Q2',
+            display_name=self.parent_course.display_name + ' - re run', default_store=ModuleStoreEnum.Type.split
+        )
+        CourseRerunState.objects.initiated(self.parent_course.id, self.re_run_course.id, self.staff,
+                                           display_name=self.re_run_course.display_name)
+        CourseRerunState.objects.succeeded(course_key=self.re_run_course.id)
+
+        set_course_dates(self.parent_course, -30, -15, -10, 20)
+        set_course_dates(self.re_run_course, 1, 10, 15, 30)
+
+    def test_get_next_class(self):
+        runs = get_rerun_family(self.parent_course.id)
+        current_time = datetime.utcnow().replace(tzinfo=utc)
+
+        self.assertEqual(get_next_class(runs, current_time).id, self.re_run_course.id)
+        self.assertIsNone(get_next_class(runs, current_time + timedelta(days=60)))
+
+    def test_get_enrolled_course_ids(self):
+        course_ids = [self.parent_course.id, self.re_run_course.id]
+        self.assertEqual(get_enrolled_course_ids(self.user, course_ids), set())
+
+        CourseEnrollment.enroll(self.user, self.re_run_course.id)
+        with self.assertNumQueries(1):
+            self.assertEqual(get_enrolled_course_ids(self.user, course_ids), {self.re_run_course.id})
+
+    def test_get_course_first_chapter_keys(self):
+        self.assertEqual(get_course_first_chapter_keys(self.parent_course.id), ('', ''))
+
+        chapter = ItemFactory.create(parent_location=self.re_run_course.location, category='chapter')
+        section = ItemFactory.create(parent_location=chapter.location, category='sequential')
+        ItemFactory.create(parent_location=chapter.location, category='sequential')
+        second_chapter = ItemFactory.create(parent_location=self.re_run_course.location, category='chapter')
+        first_chapter_keys = (chapter.location.block_id, section.location.block_id)
+
+        self.assertEqual(get_course_first_chapter_keys(self.re_run_course.id), first_chapter_keys)
+        with check_mongo_calls(0):
+            self.assertEqual(get_course_first_chapter_keys(self.re_run_course.id), first_chapter_keys)
+
+        # Studio saves the overview again when the course is published.
+        with self.store.branch_setting(ModuleStoreEnum.Branch.draft_preferred, self.re_run_course.id):
+            chapter.visible_to_staff_only = True
+            self.store.update_item(chapter, self.staff.id)
+            self.store.publish(chapter.location, self.staff.id)
+        CourseOverview.load_from_module_store(self.re_run_course.id)
+        self.assertEqual(get_course_first_chapter_keys(self.re_run_course.id), (second_chapter.location.block_id, ''))
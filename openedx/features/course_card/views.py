@@ -1,13 +1,15 @@
 from datetime import datetime
 
 import pytz
-from course_action_state.models import CourseRerunState
-from philu_overrides.helpers import get_user_current_enrolled_class
+from django.core.urlresolvers import reverse
 from edxmako.shortcuts import render_to_response
 from openedx.features.course_card.models import CourseCard
 from django.views.decorators.csrf import csrf_exempt
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
-from student.models import CourseEnrollment
+from lms.djangoapps.philu_overrides.course_reruns import get_current_run, get_rerun_families
+from lms.djangoapps.philu_overrides.courses import get_course_first_chapter_keys, get_enrolled_course_ids
+from six import text_type
+from .catalog import get_next_class
 from .helpers import get_course_open_date
 
 utc = pytz.UTC
@@ -39,22 +41,29 @@ def get_course_cards(request):
     course_card_ids = [cc.course_id for cc in cards_query_set]
     courses_list = CourseOverview.objects.select_related('image_set').filter(id__in=course_card_ids)
     courses_list = sorted(courses_list, key=lambda _course: _course.number)
-    current_time = datetime.utcnow()
+    current_time = datetime.utcnow().replace(tzinfo=utc)
+
+    rerun_families = get_rerun_families([course.id for course in courses_list])
+    current_classes = {
+        course.id: get_current_run(rerun_families[course.id], current_time) for course in courses_list
+    }
+    enrolled_course_ids = get_enrolled_course_ids(
+        request.user,
+        [course.id for course in courses_list if course.invitation_only] +
+        [current_class.id for current_class in current_classes.values() if current_class]
+    )
 
     filtered_courses = []
 
     for course in courses_list:
 
-        if course.invitation_only and not CourseEnrollment.is_enrolled(request.user, course.id):
+        if course.invitation_only and course.id not in enrolled_course_ids:
             continue
 
-        course_rerun_states = [crs.course_key for crs in CourseRerunState.objects.filter(
-            source_course_key=course.id, action="rerun", state="succeeded")]
-
-        course_rerun_object = CourseOverview.objects.select_related('image_set').filter(
-            id__in=course_rerun_states, enrollment_end__gte=current_time).order_by('enrollment_start').first()
-
-        course = get_course_with_link_and_start_date(course, course_rerun_object, request)
+        course_rerun_object = get_next_class(rerun_families[course.id], current_time)
+        course = get_course_with_link_and_start_date(
+            course, course_rerun_object, current_classes[course.id], enrolled_course_ids, current_time
+        )
 
         filtered_courses.append(course)
 
@@ -66,48 +75,42 @@ def get_course_cards(request):
     )
 
 
-def get_course_with_link_and_start_date(course, course_rerun_object, request):
-
+def get_course_with_link_and_start_date(course, course_rerun_object, current_class, enrolled_course_ids,
+                                        current_time):
+    """
+    Set the start date, pacing and, if the user is enrolled in its current
+    class, the courseware link of the course card, from the runs of its
+    rerun family.
+    """
     date_time_format = '%b %-d, %Y'
-    current_time = datetime.utcnow().replace(tzinfo=utc)
 
-    current_class, user_current_enrolled_class, current_enrolled_class_target = get_user_current_enrolled_class(
-        request, course)
-
-    if current_class:
-        current_class_start_date = get_course_open_date(current_class)
-
-    if user_current_enrolled_class:
+    if current_class and current_class.id in enrolled_course_ids:
         course.is_enrolled = True
-        course.course_target = current_enrolled_class_target
-        course.start_date = current_class_start_date.strftime(date_time_format)
+        course.course_target = reverse(
+            'courseware_section',
+            args=[text_type(current_class.id)] + list(get_course_first_chapter_keys(current_class.id))
+        )
+        course.start_date = current_class.course_open_date.strftime(date_time_format)
         course.self_paced = current_class.self_paced
         return course
 
-    course_start_time = get_course_start_date(course)
-    rerun_start_time = get_course_start_date(course_rerun_object)
-
     if course.enrollment_end:
         _enrollment_end_date = course.enrollment_end.replace(tzinfo=utc)
         if _enrollment_end_date > current_time:
-            course.start_date = course_start_time.strftime(date_time_format)
+            course.start_date = get_course_start_date(course).strftime(date_time_format)
             return course
 
     if course_rerun_object and course_rerun_object.enrollment_end:
         _enrollment_end_date = course_rerun_object.enrollment_end.replace(tzinfo=utc)
         if _enrollment_end_date > current_time:
-            course.start_date = rerun_start_time.strftime(date_time_format)
+            course.start_date = course_rerun_object.course_open_date.strftime(date_time_format)
             course.self_paced = course_rerun_object.self_paced
             return course
 
     if current_class:
-        course.start_date = current_class_start_date.strftime(date_time_format)
+        course.start_date = current_class.course_open_date.strftime(date_time_format)
         course.self_paced = current_class.self_paced
         return course
 
     course.start_date = None
     return course
-
-
-
-